@@ -0,0 +1,202 @@
+"""
+Benchmarks for the videogame enemies, using only the standard library.
+
+Usage (from the repository root):
+    python -m creational.abstract_factory_method.python.benchmarks --count 1000000
+
+Prints JSON with the memory used per enemy by each storage layout:
+- dict_instances: the former layout, every enemy an object with a __dict__
+  holding health, speed, ai_level and name
+- flyweight_instances: the current classes, mutable state in __slots__ and
+  everything else in the shared EnemyType record
+- enemy_world: the columnar EnemyWorld
+
+the time taken by the spawn paths for a 25k-enemy wave (WAVE_SPEC):
+one create_* call per enemy, create_wave as a list and as a columnar block,
+the time of one FixedStepScheduler tick over 50k enemies (columnar and
+object paths; 60 ticks/s leaves 16.7 ms per tick), and the SpatialGrid
+costs at 10k, 100k and 1M enemies (--spatial-sizes): build time, radius and k-nearest queries, incremental moves, and the
+brute-force nearest scan the grid replaces.
+"""
+from typing import Any, Callable, Iterable, Union
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from .enemy_world import EnemyWorld
+from .scheduler import FixedStepScheduler
+from .spatial import SpatialGrid
+from .videogame import EnemyFactory, GhostFactory, WheelChairGhost
+
+Benchmark = tuple[str, Callable[[int], Any]]
+TimingBenchmark = tuple[str, Callable[[], Any]]
+
+WAVE_SPEC = {"flier": 5000, "boss": 3, "wheel_chair": 20000}
+
+TICK_ENEMIES = 50_000
+
+SPATIAL_SIZES = (10_000, 100_000, 1_000_000)
+SPATIAL_QUERIES = 1000
+
+
+class DictEnemy:
+    # Per-instance layout of the enemy classes before the flyweight split
+    def __init__(self, health=60, speed=1.5, ai_level=3):
+        self.health = health
+        self.speed = speed
+        self.ai_level = ai_level
+        self.name = self.__class__.__name__
+
+
+def _dict_instances(count: int) -> list[DictEnemy]:
+    return [DictEnemy() for _ in range(count)]
+
+
+def _flyweight_instances(count: int) -> list[WheelChairGhost]:
+    return [WheelChairGhost() for _ in range(count)]
+
+
+def _enemy_world(count: int) -> EnemyWorld:
+    world = EnemyWorld(capacity=count)
+    world.spawn_many(WheelChairGhost, count)
+    return world
+
+
+def memory_benchmarks() -> Iterable[Benchmark]:
+    yield "dict_instances", _dict_instances
+    yield "flyweight_instances", _flyweight_instances
+    yield "enemy_world", _enemy_world
+
+
+def _spawn_one_by_one(factory: EnemyFactory, spec: dict[str, int]) -> list[Any]:
+    # The per-enemy loop that create_wave replaces
+    create = {
+        "wheel_chair": factory.create_wheel_chair_enemy,
+        "flier": factory.create_flier_enemy,
+        "boss": factory.create_boss_enemy,
+    }
+    return [create[role]() for role, count in spec.items() for _ in range(count)]
+
+
+def timing_benchmarks() -> Iterable[TimingBenchmark]:
+    factory = GhostFactory()
+    yield "spawn/one_by_one", lambda: _spawn_one_by_one(factory, WAVE_SPEC)
+    yield "spawn/wave_list", lambda: factory.create_wave(WAVE_SPEC)
+    yield "spawn/wave_columnar", lambda: factory.create_wave(WAVE_SPEC, columnar=True)
+
+    rng = random.Random(TICK_ENEMIES)
+    world = factory.create_wave({"flier": TICK_ENEMIES}, columnar=True)
+    enemies = factory.create_wave({"flier": TICK_ENEMIES})
+    x, y = world.column("x"), world.column("y")
+    for index, enemy in enumerate(enemies):
+        x[index] = enemy.x = rng.uniform(-500, 500)
+        y[index] = enemy.y = rng.uniform(-500, 500)
+    yield "tick/columnar_50k", FixedStepScheduler(world, attack_range=5.0).step
+    yield "tick/objects_50k", FixedStepScheduler(enemies, attack_range=5.0).step
+
+
+def measure_time(function: Callable[[], Any], repeat: int = 5) -> dict[str, float]:
+    """Best milliseconds per call over `repeat` runs."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return {"ms_per_call": min(timer.repeat(repeat=repeat, number=number)) / number * 1e3}
+
+
+def _per_call_us(function: Callable[..., Any], arguments: list[tuple[Any, ...]]) -> float:
+    start = time.perf_counter()
+    for args in arguments:
+        function(*args)
+    return (time.perf_counter() - start) / len(arguments) * 1e6
+
+
+def spatial_benchmarks(sizes: Iterable[int] = SPATIAL_SIZES) -> Iterable[tuple[str, dict[str, float]]]:
+    """Yield (name, metrics) for a grid over `count` enemies spread at constant density."""
+    for count in sizes:
+        rng = random.Random(count)
+        side = (count ** 0.5) * 10
+        enemies = GhostFactory().create_wave({"flier": count})
+        for enemy in enemies:
+            enemy.x = rng.uniform(0, side)
+            enemy.y = rng.uniform(0, side)
+        grid = SpatialGrid(cell_size=32.0)
+        start = time.perf_counter()
+        grid.add_all(enemies)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        points = [(rng.uniform(0, side), rng.uniform(0, side)) for _ in range(SPATIAL_QUERIES)]
+        moves = [(rng.choice(enemies), rng.uniform(-3, 3), rng.uniform(-3, 3)) for _ in range(SPATIAL_QUERIES)]
+        yield f"spatial/{count}", {
+            "build_ms": build_ms,
+            "radius_query_us": _per_call_us(grid.query_radius, [(x, y, 50.0) for x, y in points]),
+            "nearest_8_us": _per_call_us(grid.nearest, [(x, y, 8) for x, y in points]),
+            "move_us": _per_call_us(lambda enemy, dx, dy: enemy.move(dx, dy), moves),
+            "linear_nearest_us": _per_call_us(grid.nearest_linear, [(x, y, 1) for x, y in points[:10]]),
+        }
+
+
+def measure_memory(build: Callable[[int], Any], count: int) -> dict[str, float]:
+    """Bytes allocated per enemy (including the list holding them) and build time."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        built = build(count)
+        elapsed = time.perf_counter() - start
+        allocated, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del built
+    return {"bytes_per_enemy": allocated / count, "build_ms": elapsed * 1e3}
+
+
+def run(selected: Union[str, None] = None, count: int = 1_000_000,
+        spatial_sizes: Iterable[int] = SPATIAL_SIZES) -> dict[str, Any]:
+    results: dict[str, dict[str, float]] = {}
+    for name, build in memory_benchmarks():
+        name = f"memory/{name}"
+        if selected is not None and selected not in name:
+            continue
+        results[name] = measure_memory(build, count)
+    for name, function in timing_benchmarks():
+        if selected is not None and selected not in name:
+            continue
+        results[name] = measure_time(function)
+    if selected is None or "spatial" in selected:
+        results.update(spatial_benchmarks(spatial_sizes))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "count": count,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+
+
+def main(argv: Union[list[str], None] = None) -> int:
+    parser = argparse.ArgumentParser(description="Videogame enemy benchmarks")
+    parser.add_argument("--count", type=int, default=1_000_000, help="number of enemies")
+    parser.add_argument("--spatial-sizes", type=int, nargs="+", default=list(SPATIAL_SIZES),
+                        help="enemy counts for the spatial index benchmarks")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--output", help="write results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    text = json.dumps(run(args.filter, args.count, args.spatial_sizes), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Data-driven enemy catalog.
+
+Enemy types and factories are generated from a CSV table with one row per
+faction and role:
+
+    faction,role,name,health,speed,ai_level,attack,move,special_ability
+    ghost,boss,BossGhost,120,2.0,6,"devastador fantasmal ",silla,silla
+
+Every row becomes a FlyweightEnemy subclass named after `name` whose
+flyweight record holds the row, and every faction becomes a CatalogFactory
+subclass (e.g. "ghost" -> GhostFactory) whose enemy_types dict maps each
+role to its class. The built-in enemies in videogame.py come from
+enemies.csv next to this module; load_catalog() reads other tables the
+same way, so adding a faction is a new group of rows rather than new code.
+
+Catalogs are cached per file and modification time: loading the same table
+twice returns the same classes, so isinstance checks keep working across
+callers.
+"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Union
+import csv
+import os
+
+if TYPE_CHECKING:
+    from .videogame import CatalogFactory, EnemyFactory, FlyweightEnemy
+
+BUILTIN_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "enemies.csv")
+
+ROLES = ("wheel_chair", "flier", "boss")
+FIELDS = ("faction", "role", "name", "health", "speed", "ai_level", "attack", "move", "special_ability")
+
+Path = Union[str, "os.PathLike[str]"]
+
+
+@dataclass
+class EnemyCatalog:
+    path: str
+    # Generated enemy classes by name, in file order
+    enemy_types: dict[str, type["FlyweightEnemy"]]
+    # Generated factory classes by faction, in file order
+    factories: dict[str, type["CatalogFactory"]]
+
+    def factory(self, faction: str) -> "EnemyFactory":
+        try:
+            return self.factories[faction]()
+        except KeyError:
+            raise ValueError(f"Unknown faction: {faction}")
+
+
+_cache: dict[tuple[str, int, int, str], EnemyCatalog] = {}
+
+
+def _number(value: str, column: str, line: int) -> Union[int, float]:
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Invalid {column} on line {line}: {value!r}")
+
+
+def _factory_name(faction: str) -> str:
+    return "".join(part.capitalize() for part in faction.split("_")) + "Factory"
+
+
+def _read_rows(path: str) -> list[tuple[int, dict[str, str]]]:
+    with open(path, newline="", encoding="utf-8") as table:
+        reader = csv.DictReader(table)
+        missing = [field for field in FIELDS if field not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+        return [(reader.line_num, row) for row in reader]
+
+
+def _build(path: str, module: str) -> EnemyCatalog:
+    from .videogame import CatalogFactory, EnemyType, FlyweightEnemy
+
+    enemy_types: dict[str, type[FlyweightEnemy]] = {}
+    roles_by_faction: dict[str, dict[str, type[FlyweightEnemy]]] = {}
+    for line, row in _read_rows(path):
+        faction, role, name = row["faction"], row["role"], row["name"]
+        if role not in ROLES:
+            raise ValueError(f"Unknown enemy role on line {line}: {role}")
+        if not faction.isidentifier():
+            raise ValueError(f"Invalid faction on line {line}: {faction!r}")
+        if not name.isidentifier():
+            raise ValueError(f"Invalid name on line {line}: {name!r}")
+        if name in enemy_types:
+            raise ValueError(f"Duplicate enemy name on line {line}: {name}")
+        roles = roles_by_faction.setdefault(faction, {})
+        if role in roles:
+            raise ValueError(f"Duplicate role on line {line}: {faction} {role}")
+        flyweight = EnemyType(
+            name,
+            _number(row["health"], "health", line),
+            _number(row["speed"], "speed", line),
+            int(_number(row["ai_level"], "ai_level", line)),
+            row["attack"],
+            row["move"],
+            row["special_ability"],
+        )
+        enemy_type = type(name, (FlyweightEnemy,), {"__slots__": (), "__module__": module, "flyweight": flyweight})
+        enemy_types[name] = roles[role] = enemy_type
+
+    factories: dict[str, type[CatalogFactory]] = {}
+    for faction, roles in roles_by_faction.items():
+        missing = [role for role in ROLES if role not in roles]
+        if missing:
+            raise ValueError(f"Faction {faction} is missing roles: {', '.join(missing)}")
+        factories[faction] = type(_factory_name(faction), (CatalogFactory,), {
+            "__module__": module,
+            "faction": faction,
+            "enemy_types": {role: roles[role] for role in ROLES},
+        })
+    return EnemyCatalog(path, enemy_types, factories)
+
+
+def load_catalog(path: Path = BUILTIN_CATALOG, module: str = __name__, register: bool = True) -> EnemyCatalog:
+    """
+    Generate (or return the cached) enemy and factory classes for a table.
+    `module` becomes the classes' __module__; pickling needs the classes to be
+    reachable there under their names. With `register`, the enemy types get
+    EnemyWorld type codes so they can be spawned into worlds and snapshots.
+    """
+    path = os.path.abspath(os.fspath(path))
+    status = os.stat(path)
+    key = (path, status.st_mtime_ns, status.st_size, module)
+    catalog = _cache.get(key)
+    if catalog is None:
+        catalog = _cache[key] = _build(path, module)
+    if register:
+        from .enemy_world import register_type
+        for enemy_type in catalog.enemy_types.values():
+            register_type(enemy_type)
+    return catalog
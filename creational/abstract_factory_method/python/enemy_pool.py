@@ -0,0 +1,84 @@
+"""
+Free-list pooling of enemy objects.
+
+Spawn/despawn cycles that create a fresh enemy every time leave the old
+ones to the garbage collector. EnemyPool keeps released enemies in one free
+list per type and hands them out again, reset to the type's default stats.
+At most `max_size` enemies are kept per type; further releases are dropped.
+"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from .videogame import FlyweightEnemy
+
+E = TypeVar("E", bound="FlyweightEnemy")
+
+
+@dataclass
+class PoolStats:
+    created: int = 0
+    reused: int = 0
+    released: int = 0
+    # Releases refused because the free list was full
+    dropped: int = 0
+    free: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        acquired = self.created + self.reused
+        return self.reused / acquired if acquired else 0.0
+
+
+class EnemyPool:
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._free: dict[type, list] = {}
+        self._pooled: set[int] = set()
+        self._stats = PoolStats()
+
+    def acquire(self, enemy_type: type[E]) -> E:
+        free = self._free.get(enemy_type)
+        if free:
+            enemy = free.pop()
+            self._pooled.discard(id(enemy))
+            enemy.reset()
+            self._stats.reused += 1
+            return enemy
+        self._stats.created += 1
+        return enemy_type()
+
+    def release(self, enemy: "FlyweightEnemy") -> bool:
+        """Return an enemy to its free list. Returns False if the list is full."""
+        if id(enemy) in self._pooled:
+            raise ValueError(f"{enemy.name} was already released")
+        # A released enemy is despawned: it must no longer show up in spatial queries
+        if enemy.spatial_index is not None:
+            enemy.spatial_index.discard(enemy)
+        free = self._free.setdefault(type(enemy), [])
+        self._stats.released += 1
+        if len(free) >= self.max_size:
+            self._stats.dropped += 1
+            return False
+        free.append(enemy)
+        self._pooled.add(id(enemy))
+        return True
+
+    def prefill(self, enemy_type: type["FlyweightEnemy"], count: int) -> None:
+        """Create enemies ahead of time, e.g. before a wave starts."""
+        free = self._free.setdefault(enemy_type, [])
+        for _ in range(min(count, self.max_size - len(free))):
+            enemy = enemy_type()
+            free.append(enemy)
+            self._pooled.add(id(enemy))
+            self._stats.created += 1
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            self._stats.created, self._stats.reused, self._stats.released, self._stats.dropped,
+            sum(len(free) for free in self._free.values()),
+        )
+
+    def clear(self) -> None:
+        self._free.clear()
+        self._pooled.clear()
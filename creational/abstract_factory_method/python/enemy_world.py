@@ -0,0 +1,289 @@
+"""
+Columnar storage for large numbers of enemies.
+
+EnemyWorld keeps enemy state in one array per column (type code, health,
+speed, ai_level, position, alive) instead of one Python object per enemy, so whole
+waves can be spawned and updated in bulk. Enemy ids are slot indexes;
+despawned slots are reused by later spawns. EnemyView gives per-enemy,
+Enemy-compatible access to a slot for code that still wants objects.
+"""
+from array import array
+from typing import TYPE_CHECKING, Iterator, Sequence, Union
+from .videogame import (BossGhost, BossRobot, BossZombie, Enemy, EnemyType, FlierGhost, FlierRobot, FlierZombie,
+    FlyweightEnemy, WheelChairGhost, WheelChairRobot, WheelChairZombie)
+
+if TYPE_CHECKING:
+    from .spatial import SpatialGrid
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+# Type codes stored in the type column: the position in ENEMY_TYPES for the
+# built-in types, then register_type order for types loaded from a catalog
+ENEMY_TYPES: tuple[type[FlyweightEnemy], ...] = (
+    WheelChairGhost, FlierGhost, BossGhost,
+    WheelChairZombie, FlierZombie, BossZombie,
+    WheelChairRobot, FlierRobot, BossRobot,
+)
+_CODE_BY_TYPE = {enemy_type: code for code, enemy_type in enumerate(ENEMY_TYPES)}
+
+# Shared intrinsic data per type code: default stats and behaviour strings
+FLYWEIGHTS: tuple[EnemyType, ...] = tuple(enemy_type.flyweight for enemy_type in ENEMY_TYPES)
+
+# Every type with a code, the built-in ones first, then those added by register_type
+_TYPES: list[type[FlyweightEnemy]] = list(ENEMY_TYPES)
+_FLYWEIGHTS: list[EnemyType] = list(FLYWEIGHTS)
+MAX_TYPES = 256
+
+# Column name -> array typecode
+COLUMNS = {"type_code": "B", "health": "d", "speed": "d", "ai_level": "i", "x": "d", "y": "d", "alive": "B"}
+
+EnemyTypeKey = Union[type[Enemy], int]
+
+
+def register_type(enemy_type: type[FlyweightEnemy]) -> int:
+    """
+    Give a type generated at run time (see catalog.py) a type code and return
+    it. Codes follow registration order, so snapshots holding such types must
+    be restored after registering the same types in the same order.
+    """
+    code = _CODE_BY_TYPE.get(enemy_type)
+    if code is not None:
+        return code
+    if not (isinstance(enemy_type, type) and issubclass(enemy_type, FlyweightEnemy)):
+        raise ValueError(f"Not a flyweight enemy type: {enemy_type!r}")
+    if len(_TYPES) >= MAX_TYPES:
+        raise ValueError(f"Cannot register more than {MAX_TYPES} enemy types")
+    code = _CODE_BY_TYPE[enemy_type] = len(_TYPES)
+    _TYPES.append(enemy_type)
+    _FLYWEIGHTS.append(enemy_type.flyweight)
+    return code
+
+
+def type_code(enemy_type: EnemyTypeKey) -> int:
+    if isinstance(enemy_type, int):
+        if not 0 <= enemy_type < len(_TYPES):
+            raise ValueError(f"Invalid enemy type code: {enemy_type}")
+        return enemy_type
+    try:
+        return _CODE_BY_TYPE[enemy_type]
+    except KeyError:
+        raise ValueError(f"Unknown enemy type: {enemy_type.__name__}")
+
+
+class EnemyWorld:
+    def __init__(self, capacity: int = 1024):
+        self.capacity = max(1, capacity)
+        for name, typecode in COLUMNS.items():
+            setattr(self, name, array(typecode, bytes(self.capacity * array(typecode).itemsize)))
+        # Slots in use so far; slots below it that are not alive are in _free
+        self.size = 0
+        self.live = 0
+        self._free: list[int] = []
+        # Optional index of live enemy ids, see SpatialGrid.from_world
+        self.spatial_index: "SpatialGrid | None" = None
+
+    def __len__(self) -> int:
+        return self.live
+
+    def _reserve(self, count: int) -> None:
+        needed = self.size + count
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        # New arrays instead of in-place growth, so outstanding NumPy views stay valid
+        for name, typecode in COLUMNS.items():
+            column = getattr(self, name)
+            setattr(self, name, column + array(typecode, bytes((capacity - self.capacity) * column.itemsize)))
+        self.capacity = capacity
+
+    def _allocate(self, count: int) -> tuple[list[int], int, int]:
+        """Take up to `count` free slots, then grow into fresh ones: (reused, fresh start, fresh stop)."""
+        reused = self._free[len(self._free) - min(count, len(self._free)):]
+        del self._free[len(self._free) - len(reused):]
+        fresh = count - len(reused)
+        self._reserve(fresh)
+        start = self.size
+        self.size += fresh
+        return reused, start, self.size
+
+    def spawn(self, enemy_type: EnemyTypeKey, health: Union[float, None] = None, speed: Union[float, None] = None,
+              ai_level: Union[int, None] = None, x: float = 0.0, y: float = 0.0) -> int:
+        """Spawn one enemy with the type's default stats unless given, and return its id."""
+        return self.spawn_many(enemy_type, 1, health, speed, ai_level, x, y)[0]
+
+    def spawn_many(self, enemy_type: EnemyTypeKey, count: int, health: Union[float, None] = None,
+                   speed: Union[float, None] = None, ai_level: Union[int, None] = None,
+                   x: float = 0.0, y: float = 0.0) -> Sequence[int]:
+        if count < 0:
+            raise ValueError(f"Negative enemy count: {count}")
+        code = type_code(enemy_type)
+        flyweight = _FLYWEIGHTS[code]
+        values = {
+            "type_code": code,
+            "health": flyweight.health if health is None else health,
+            "speed": flyweight.speed if speed is None else speed,
+            "ai_level": flyweight.ai_level if ai_level is None else ai_level,
+            "x": x,
+            "y": y,
+            "alive": 1,
+        }
+        reused, start, stop = self._allocate(count)
+        for name, value in values.items():
+            column = getattr(self, name)
+            for slot in reused:
+                column[slot] = value
+            # Fresh slots are contiguous: one slice assignment per column
+            column[start:stop] = array(COLUMNS[name], [value]) * (stop - start)
+        self.live += count
+        # A range avoids building a list of ids for large spawns into fresh slots
+        ids = reused + list(range(start, stop)) if reused else range(start, stop)
+        if self.spatial_index is not None:
+            for enemy_id in ids:
+                self.spatial_index.insert(enemy_id, x, y)
+        return ids
+
+    def despawn(self, enemy_id: int) -> None:
+        if not self.is_alive(enemy_id):
+            raise KeyError(f"No live enemy with id {enemy_id}")
+        self.alive[enemy_id] = 0
+        self._free.append(enemy_id)
+        self.live -= 1
+        if self.spatial_index is not None:
+            self.spatial_index.remove(enemy_id)
+
+    def despawn_many(self, ids: Sequence[int]) -> None:
+        """Despawn several distinct live enemies at once; nothing is despawned if one is not alive."""
+        if np is not None:
+            slots = np.asarray(ids, dtype=np.intp)
+            alive = self.column("alive")
+            in_range = (slots >= 0) & (slots < self.size)
+            dead = ~in_range | (alive[np.where(in_range, slots, 0)] == 0)
+            if dead.any():
+                raise KeyError(f"No live enemy with id {slots[dead][0]}")
+            if len(np.unique(slots)) < len(slots):
+                raise ValueError("Duplicate enemy ids")
+            alive[slots] = 0
+            ids = slots.tolist()
+        else:
+            ids = list(ids)
+            for enemy_id in ids:
+                if not self.is_alive(enemy_id):
+                    raise KeyError(f"No live enemy with id {enemy_id}")
+            if len(set(ids)) < len(ids):
+                raise ValueError("Duplicate enemy ids")
+            for enemy_id in ids:
+                self.alive[enemy_id] = 0
+        self._free.extend(ids)
+        self.live -= len(ids)
+        if self.spatial_index is not None:
+            for enemy_id in ids:
+                self.spatial_index.remove(enemy_id)
+
+    def is_alive(self, enemy_id: int) -> bool:
+        return 0 <= enemy_id < self.size and bool(self.alive[enemy_id])
+
+    def ids(self) -> list[int]:
+        if np is not None:
+            return np.flatnonzero(self.column("alive")).tolist()
+        alive = self.alive
+        return [slot for slot in range(self.size) if alive[slot]]
+
+    def __getitem__(self, enemy_id: int) -> "EnemyView":
+        if not self.is_alive(enemy_id):
+            raise KeyError(f"No live enemy with id {enemy_id}")
+        return EnemyView(self, enemy_id)
+
+    def __iter__(self) -> Iterator["EnemyView"]:
+        for enemy_id in self.ids():
+            yield EnemyView(self, enemy_id)
+
+    def column(self, name: str):
+        """
+        The used part of a column, as a writable NumPy view when NumPy is
+        installed, otherwise as a memoryview of the array.
+        """
+        column = getattr(self, name)
+        if np is not None:
+            return np.frombuffer(column, dtype=column.typecode)[:self.size]
+        return memoryview(column)[:self.size]
+
+
+class EnemyView(Enemy):
+    """Enemy-compatible access to one slot of an EnemyWorld."""
+
+    __slots__ = ("world", "id")
+
+    def __init__(self, world: EnemyWorld, enemy_id: int):
+        self.world = world
+        self.id = enemy_id
+
+    @property
+    def enemy_type(self) -> type[FlyweightEnemy]:
+        return _TYPES[self.world.type_code[self.id]]
+
+    @property
+    def flyweight(self) -> EnemyType:
+        return _FLYWEIGHTS[self.world.type_code[self.id]]
+
+    @property
+    def name(self) -> str:
+        return self.flyweight.name
+
+    @property
+    def health(self) -> float:
+        return self.world.health[self.id]
+
+    @health.setter
+    def health(self, value: float) -> None:
+        self.world.health[self.id] = value
+
+    @property
+    def speed(self) -> float:
+        return self.world.speed[self.id]
+
+    @speed.setter
+    def speed(self, value: float) -> None:
+        self.world.speed[self.id] = value
+
+    @property
+    def ai_level(self) -> int:
+        return self.world.ai_level[self.id]
+
+    @ai_level.setter
+    def ai_level(self, value: int) -> None:
+        self.world.ai_level[self.id] = value
+
+    @property
+    def x(self) -> float:
+        return self.world.x[self.id]
+
+    @property
+    def y(self) -> float:
+        return self.world.y[self.id]
+
+    def attack(self):
+        return self.flyweight.attack
+
+    def move(self, dx=0.0, dy=0.0):
+        if dx or dy:
+            world = self.world
+            x = world.x[self.id] = world.x[self.id] + dx
+            y = world.y[self.id] = world.y[self.id] + dy
+            if world.spatial_index is not None:
+                world.spatial_index.update(self.id, x, y)
+        return self.flyweight.move
+
+    def special_ability(self):
+        return self.flyweight.special_ability
+
+    def get_stats(self):
+        return {"name": self.name, "health": self.health, "speed": self.speed, "ai_level": self.ai_level}
+
+    def to_enemy(self) -> FlyweightEnemy:
+        """Materialize a standalone instance of the enemy's class with its current stats."""
+        return self.enemy_type(health=self.health, speed=self.speed, ai_level=self.ai_level, x=self.x, y=self.y)
@@ -0,0 +1,205 @@
+"""
+Fixed-timestep simulation of enemy waves.
+
+Every tick runs three phases over all live enemies:
+- move: each enemy walks `speed * timestep` towards the target point and
+  stops at `attack_range`
+- decide: enemies in range attack once every `10 - ai_level` ticks, so
+  smarter enemies attack more often
+- attack: the attackers' damage (`ai_level * damage_per_level`) is
+  reported to `on_attack(attacker_ids, damages)` and added to
+  `damage_dealt`
+
+An EnemyWorld is updated column-wise with NumPy when it is installed.
+Lists of enemy objects (or a world without NumPy) are updated enemy by
+enemy through move(), with the same rules. advance(elapsed) runs as many
+whole ticks as fit in the elapsed time, carrying the remainder over, and at
+most `max_steps` per call so a slow frame cannot snowball.
+"""
+from dataclasses import dataclass, field
+from math import hypot
+from typing import Any, Callable, Iterable, Sequence, Union
+import time
+from .enemy_world import EnemyWorld
+from .videogame import Enemy
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+PHASES = ("move", "decide", "attack")
+
+AttackCallback = Callable[[Sequence[int], Sequence[float]], Any]
+
+
+@dataclass
+class PhaseStats:
+    ticks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.seconds / self.ticks * 1e3 if self.ticks else 0.0
+
+
+@dataclass
+class SchedulerStats:
+    ticks: int = 0
+    # Ticks skipped by advance() because more than max_steps were due
+    dropped_ticks: int = 0
+    phases: dict[str, PhaseStats] = field(default_factory=lambda: {name: PhaseStats() for name in PHASES})
+
+    @property
+    def mean_tick_ms(self) -> float:
+        return sum(phase.mean_ms for phase in self.phases.values())
+
+
+class FixedStepScheduler:
+    def __init__(
+        self,
+        enemies: Union[EnemyWorld, Iterable[Enemy]],
+        timestep: float = 1 / 60,
+        target: tuple[float, float] = (0.0, 0.0),
+        attack_range: float = 1.0,
+        damage_per_level: float = 1.0,
+        on_attack: Union[AttackCallback, None] = None,
+        max_steps: int = 5,
+    ):
+        """
+        `enemies` is an EnemyWorld or a sequence of enemies with a position
+        (FlyweightEnemy or EnemyView). Attacker ids are world ids for a
+        world and list positions otherwise.
+        """
+        self.world = enemies if isinstance(enemies, EnemyWorld) else None
+        self.enemies = None if self.world is not None else list(enemies)
+        self.timestep = timestep
+        self.target = target
+        self.attack_range = attack_range
+        self.damage_per_level = damage_per_level
+        self.on_attack = on_attack
+        self.max_steps = max_steps
+        self.tick = 0
+        self.damage_dealt = 0.0
+        self.stats = SchedulerStats()
+        self._accumulator = 0.0
+
+    @property
+    def vectorized(self) -> bool:
+        return self.world is not None and np is not None
+
+    def advance(self, elapsed: float) -> int:
+        """Run the ticks due after `elapsed` seconds of game time and return how many ran."""
+        self._accumulator += elapsed
+        # The epsilon keeps e.g. 1.0 / 0.1 from counting as 9 ticks
+        due = int(self._accumulator / self.timestep + 1e-9)
+        self._accumulator = max(0.0, self._accumulator - due * self.timestep)
+        steps = min(due, self.max_steps)
+        self.stats.dropped_ticks += due - steps
+        for _ in range(steps):
+            self.step()
+        return steps
+
+    def run(self, ticks: int) -> None:
+        for _ in range(ticks):
+            self.step()
+
+    def step(self) -> None:
+        phases = self.stats.phases
+        clock = time.perf_counter
+        if self.vectorized:
+            start = clock()
+            ids, distances = self._move_columns()
+            moved = clock()
+            attackers = self._decide_columns(ids, distances)
+            decided = clock()
+            damages = self.world.column("ai_level")[attackers] * self.damage_per_level  # type: ignore
+        else:
+            enemies = self._live_enemies()
+            start = clock()
+            distances = [self._move_enemy(enemy) for _, enemy in enemies]
+            moved = clock()
+            attackers = self._decide_enemies(enemies, distances)
+            decided = clock()
+            damages = [enemy.ai_level * self.damage_per_level for enemy in self._attacking(enemies, attackers)]
+        self._attack(attackers, damages)
+        attacked = clock()
+
+        phases["move"].seconds += moved - start
+        phases["decide"].seconds += decided - moved
+        phases["attack"].seconds += attacked - decided
+        for phase in phases.values():
+            phase.ticks += 1
+        self.tick += 1
+        self.stats.ticks += 1
+
+    def _attack(self, attackers: Sequence[int], damages: Sequence[float]) -> None:
+        if len(attackers) == 0:
+            return
+        self.damage_dealt += float(sum(damages))
+        if self.on_attack is not None:
+            self.on_attack(attackers, damages)
+
+    # Columnar path
+
+    def _move_columns(self) -> tuple["np.ndarray", "np.ndarray"]:
+        world = self.world
+        ids = np.flatnonzero(world.column("alive"))  # type: ignore
+        # Without dead slots, work on the columns in place instead of gathering and scattering
+        live: Union[slice, "np.ndarray"] = slice(None) if len(ids) == world.size else ids  # type: ignore
+        x, y = world.column("x"), world.column("y")  # type: ignore
+        dx = self.target[0] - x[live]
+        dy = self.target[1] - y[live]
+        distances = np.hypot(dx, dy)
+        steps = distances - self.attack_range
+        np.clip(steps, 0.0, world.column("speed")[live] * self.timestep, out=steps)  # type: ignore
+        factor = np.divide(steps, distances, out=np.zeros_like(distances), where=distances > 0)
+        dx *= factor
+        dy *= factor
+        x[live] += dx
+        y[live] += dy
+        index = world.spatial_index  # type: ignore
+        if index is not None:
+            for enemy_id in ids[steps > 0].tolist():
+                index.update(enemy_id, float(x[enemy_id]), float(y[enemy_id]))
+        distances -= steps
+        return ids, distances
+
+    def _decide_columns(self, ids: "np.ndarray", distances: "np.ndarray") -> "np.ndarray":
+        intervals = np.maximum(1, 10 - self.world.column("ai_level")[ids])  # type: ignore
+        ready = (self.tick + ids) % intervals == 0
+        return ids[(distances <= self.attack_range) & ready]
+
+    # Per-enemy path
+
+    def _live_enemies(self) -> list[tuple[int, Any]]:
+        if self.world is not None:
+            return [(view.id, view) for view in self.world]
+        return list(enumerate(self.enemies))  # type: ignore
+
+    def _move_enemy(self, enemy: Any) -> float:
+        dx = self.target[0] - enemy.x
+        dy = self.target[1] - enemy.y
+        distance = hypot(dx, dy)
+        step = min(max(distance - self.attack_range, 0.0), enemy.speed * self.timestep)
+        if step > 0:
+            enemy.move(dx * step / distance, dy * step / distance)
+        return distance - step
+
+    def _decide_enemies(self, enemies: list[tuple[int, Any]], distances: list[float]) -> list[int]:
+        tick = self.tick
+        attack_range = self.attack_range
+        return [
+            enemy_id
+            for (enemy_id, enemy), distance in zip(enemies, distances)
+            if distance <= attack_range and (tick + enemy_id) % max(1, 10 - enemy.ai_level) == 0
+        ]
+
+    def _attacking(self, enemies: list[tuple[int, Any]], attackers: list[int]) -> list[Any]:
+        chosen = set(attackers)
+        attacking = []
+        for enemy_id, enemy in enemies:
+            if enemy_id in chosen:
+                enemy.attack()
+                attacking.append(enemy)
+        return attacking
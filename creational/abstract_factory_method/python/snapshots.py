@@ -0,0 +1,259 @@
+"""
+Binary snapshots of enemy state.
+
+A snapshot is one little-endian file laid out column by column, so saving
+and restoring an EnemyWorld is a handful of large buffer copies instead of
+pickling an object per enemy:
+
+    header      magic, version, block size, enemy count, block count
+    blocks      per block of `block_size` enemies: min x, min y, max x, max y
+    columns     type_code (B), health (d), speed (d), ai_level (i), x (d), y (d)
+                each padded to a multiple of 8 bytes
+
+Only live enemies are written, sorted by a coarse grid cell so that every
+block covers a small area. load_region() memory-maps the file, checks the
+block bounding boxes and reads only the blocks that overlap the requested
+rectangle. Enemy ids are not kept: a restored world numbers its enemies
+from 0 in file order. Loading raises ValueError for type codes that are not
+registered.
+"""
+from array import array
+from typing import Iterable, Union
+import mmap
+import os
+import struct
+import sys
+from .enemy_world import COLUMNS, EnemyWorld, type_code
+from .videogame import FlyweightEnemy
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+MAGIC = b"ENEMYSNP"
+VERSION = 1
+BLOCK_SIZE = 4096
+
+# Columns stored in a snapshot, in file order; alive is implied
+SNAPSHOT_COLUMNS = tuple(name for name in COLUMNS if name != "alive")
+
+_HEADER = struct.Struct("<8sIIQQ")
+_BOX = struct.Struct("<4d")
+
+Path = Union[str, "os.PathLike[str]"]
+Box = tuple[float, float, float, float]
+
+
+def _padded(size: int) -> int:
+    return -(-size // 8) * 8
+
+
+def _little_endian(column):
+    """The column (an array or a NumPy array) with little-endian items, copied on big-endian machines."""
+    if sys.byteorder == "big":  # pragma: no cover - depends on the machine
+        if isinstance(column, array):
+            column = array(column.typecode, column)
+            column.byteswap()
+        else:
+            column = column.byteswap()
+    return column
+
+
+def _from_world(world: EnemyWorld) -> dict:
+    if np is not None:
+        alive = np.flatnonzero(world.column("alive")) if world.live < world.size else slice(None)
+        return {name: world.column(name)[alive] for name in SNAPSHOT_COLUMNS}
+    if world.live == world.size:
+        return {name: getattr(world, name)[:world.size] for name in SNAPSHOT_COLUMNS}
+    ids = world.ids()
+    return {name: array(COLUMNS[name], map(getattr(world, name).__getitem__, ids)) for name in SNAPSHOT_COLUMNS}
+
+
+def _from_enemies(enemies: Iterable[FlyweightEnemy]) -> dict[str, array]:
+    columns = {name: array(COLUMNS[name]) for name in SNAPSHOT_COLUMNS}
+    codes: dict[type, int] = {}
+    for enemy in enemies:
+        enemy_type = type(enemy)
+        code = codes.get(enemy_type)
+        if code is None:
+            code = codes[enemy_type] = type_code(enemy_type)
+        columns["type_code"].append(code)
+        columns["health"].append(enemy.health)
+        columns["speed"].append(enemy.speed)
+        columns["ai_level"].append(enemy.ai_level)
+        columns["x"].append(enemy.x)
+        columns["y"].append(enemy.y)
+    return columns
+
+
+def _spatial_order(x: array, y: array, blocks: int):
+    """Order enemies row by row over a grid of about `blocks` cells, or None if one block holds them all."""
+    if blocks <= 1:
+        return None
+    side = int(blocks ** 0.5) + 1
+    if np is not None:
+        xs, ys = np.asarray(x), np.asarray(y)
+        min_x, min_y = xs.min(), ys.min()
+        width = max(float(xs.max() - min_x), 1e-9) / side
+        height = max(float(ys.max() - min_y), 1e-9) / side
+        # Small integer keys let the stable sort use a linear-time radix sort;
+        # offsets are never negative, so truncating is the same as flooring
+        dtype = np.uint16 if (side + 1) ** 2 <= 1 << 16 else np.int64
+        rows = ((ys - min_y) * (1 / height)).astype(dtype)
+        rows *= dtype(side + 1)
+        rows += ((xs - min_x) * (1 / width)).astype(dtype)
+        return np.argsort(rows, kind="stable")
+    min_x, min_y = min(x), min(y)
+    width = max(max(x) - min_x, 1e-9) / side
+    height = max(max(y) - min_y, 1e-9) / side
+    return sorted(range(len(x)), key=lambda i: ((y[i] - min_y) // height, (x[i] - min_x) // width))
+
+
+def _block_boxes(x: array, y: array, block_size: int) -> list[Box]:
+    if np is not None and len(x):
+        xs, ys = np.asarray(x), np.asarray(y)
+        starts = np.arange(0, len(xs), block_size)
+        return list(zip(
+            np.minimum.reduceat(xs, starts).tolist(), np.minimum.reduceat(ys, starts).tolist(),
+            np.maximum.reduceat(xs, starts).tolist(), np.maximum.reduceat(ys, starts).tolist(),
+        ))
+    boxes = []
+    for start in range(0, len(x), block_size):
+        bx, by = x[start:start + block_size], y[start:start + block_size]
+        boxes.append((min(bx), min(by), max(bx), max(by)))
+    return boxes
+
+
+def save(path: Path, enemies: Union[EnemyWorld, Iterable[FlyweightEnemy]], block_size: int = BLOCK_SIZE) -> int:
+    """Write the live enemies of a world, or a list of enemy objects, and return how many were saved."""
+    if block_size < 1:
+        raise ValueError("block_size must be positive")
+    columns = _from_world(enemies) if isinstance(enemies, EnemyWorld) else _from_enemies(enemies)
+    count = len(columns["x"])
+    blocks = -(-count // block_size)
+    order = _spatial_order(columns["x"], columns["y"], blocks)
+    if order is not None:
+        if np is not None:
+            columns = {name: np.asarray(column)[order] for name, column in columns.items()}
+        else:
+            columns = {name: array(column.typecode, map(column.__getitem__, order))
+                       for name, column in columns.items()}
+
+    with open(path, "wb", buffering=1 << 20) as output:
+        output.write(_HEADER.pack(MAGIC, VERSION, block_size, count, blocks))
+        for box in _block_boxes(columns["x"], columns["y"], block_size):
+            output.write(_BOX.pack(*box))
+        for name in SNAPSHOT_COLUMNS:
+            column = memoryview(_little_endian(columns[name])).cast("B")
+            output.write(column)
+            size = len(column)
+            output.write(bytes(_padded(size) - size))
+    return count
+
+
+class _Snapshot:
+    """A memory-mapped snapshot file."""
+
+    def __init__(self, path: Path):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is not an enemy snapshot")
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not an enemy snapshot")
+        magic, version, self.block_size, self.count, blocks = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an enemy snapshot")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported snapshot version: {version}")
+        if _HEADER.size + blocks * _BOX.size > len(self._map):
+            self.close()
+            raise ValueError(f"{path} is not an enemy snapshot")
+        self.boxes = [_BOX.unpack_from(self._map, _HEADER.size + index * _BOX.size) for index in range(blocks)]
+        self.offsets = {}
+        offset = _HEADER.size + blocks * _BOX.size
+        for name in SNAPSHOT_COLUMNS:
+            self.offsets[name] = offset
+            offset += _padded(self.count * array(COLUMNS[name]).itemsize)
+        # The padding after the last column is written too, so a complete file ends exactly here
+        if offset > len(self._map):
+            self.close()
+            raise ValueError(f"{path} is not an enemy snapshot")
+
+    def __enter__(self) -> "_Snapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def read(self, name: str, runs: list[tuple[int, int]]) -> array:
+        """The values of one column for the given (start, stop) index runs, as a native array."""
+        column = array(COLUMNS[name])
+        itemsize = column.itemsize
+        offset = self.offsets[name]
+        with memoryview(self._map) as view:
+            for start, stop in runs:
+                column.frombytes(view[offset + start * itemsize:offset + stop * itemsize])
+        return _little_endian(column)
+
+
+def _to_world(columns: dict[str, array], count: int) -> EnemyWorld:
+    # Codes past the registered types come from a corrupt file or from catalog types not registered yet
+    if count:
+        type_code(max(columns["type_code"]))
+    # A minimal world whose columns are then swapped for the loaded ones, filled to capacity
+    world = EnemyWorld(capacity=1)
+    world.capacity = max(1, count)
+    for name, column in columns.items():
+        if count < world.capacity:
+            column.extend(array(column.typecode, bytes(column.itemsize)))
+        setattr(world, name, column)
+    world.alive = array("B", b"\x01" * count + bytes(world.capacity - count))
+    world.size = world.live = count
+    return world
+
+
+def load(path: Path) -> EnemyWorld:
+    """Restore every enemy of a snapshot into a new EnemyWorld."""
+    with _Snapshot(path) as snapshot:
+        count = snapshot.count
+        return _to_world({name: snapshot.read(name, [(0, count)]) for name in SNAPSHOT_COLUMNS}, count)
+
+
+def load_region(path: Path, min_x: float, min_y: float, max_x: float, max_y: float) -> EnemyWorld:
+    """Restore the enemies inside a rectangle (edges included), reading only the blocks that overlap it."""
+    with _Snapshot(path) as snapshot:
+        runs: list[tuple[int, int]] = []
+        for index, (bx0, by0, bx1, by1) in enumerate(snapshot.boxes):
+            if bx0 > max_x or bx1 < min_x or by0 > max_y or by1 < min_y:
+                continue
+            start = index * snapshot.block_size
+            stop = min(start + snapshot.block_size, snapshot.count)
+            if runs and runs[-1][1] == start:
+                runs[-1] = (runs[-1][0], stop)
+            else:
+                runs.append((start, stop))
+        columns = {name: snapshot.read(name, runs) for name in SNAPSHOT_COLUMNS}
+
+    x, y = columns["x"], columns["y"]
+    if np is not None:
+        xs, ys = np.frombuffer(x, dtype=np.float64), np.frombuffer(y, dtype=np.float64)
+        inside = np.flatnonzero((xs >= min_x) & (xs <= max_x) & (ys >= min_y) & (ys <= max_y))
+        if len(inside) < len(xs):
+            columns = {name: array(column.typecode, np.frombuffer(column, dtype=column.typecode)[inside].tobytes())
+                       for name, column in columns.items()}
+        return _to_world(columns, len(inside))
+    inside = [i for i in range(len(x)) if min_x <= x[i] <= max_x and min_y <= y[i] <= max_y]
+    if len(inside) < len(x):
+        columns = {name: array(column.typecode, map(column.__getitem__, inside)) for name, column in columns.items()}
+    return _to_world(columns, len(inside))
@@ -0,0 +1,194 @@
+"""
+Uniform-grid spatial index for enemy positions.
+
+SpatialGrid buckets keys (enemy objects or EnemyWorld ids) into square
+cells of `cell_size`. A radius query only looks at the cells overlapping the
+circle, and a k-nearest query walks outward ring by ring and stops as soon
+as no unvisited cell can hold anything closer than the k-th best hit.
+Moving a key only touches the index when it crosses into another cell, so
+the grid is cheap to keep up to date as enemies move every frame.
+
+Enemies added with add() report their own moves: FlyweightEnemy.move()
+and EnemyView.move() call update() on the index they belong to.
+"""
+from heapq import heappush, heappushpop, nsmallest
+from math import floor
+from typing import TYPE_CHECKING, Hashable, Iterable
+
+if TYPE_CHECKING:
+    from .enemy_world import EnemyWorld
+    from .videogame import FlyweightEnemy
+
+Cell = tuple[int, int]
+
+
+class SpatialGrid:
+    def __init__(self, cell_size: float = 32.0):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        self._cells: dict[Cell, set[Hashable]] = {}
+        self._positions: dict[Hashable, tuple[float, float, Cell]] = {}
+        # Bounding box of every cell ever used, in cell coordinates; bounds the k-nearest walk
+        self._min_cx = self._min_cy = 0
+        self._max_cx = self._max_cy = -1
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._positions
+
+    def _cell(self, x: float, y: float) -> Cell:
+        return floor(x / self.cell_size), floor(y / self.cell_size)
+
+    def position(self, key: Hashable) -> tuple[float, float]:
+        x, y, _ = self._positions[key]
+        return x, y
+
+    def insert(self, key: Hashable, x: float, y: float) -> None:
+        if key in self._positions:
+            raise KeyError(f"{key!r} is already in the index")
+        cell = self._cell(x, y)
+        self._positions[key] = (x, y, cell)
+        bucket = self._cells.get(cell)
+        if bucket is None:
+            bucket = self._cells[cell] = set()
+            cx, cy = cell
+            if self._max_cx < self._min_cx:
+                self._min_cx = self._max_cx = cx
+                self._min_cy = self._max_cy = cy
+            else:
+                self._min_cx, self._max_cx = min(self._min_cx, cx), max(self._max_cx, cx)
+                self._min_cy, self._max_cy = min(self._min_cy, cy), max(self._max_cy, cy)
+        bucket.add(key)
+
+    def remove(self, key: Hashable) -> None:
+        _, _, cell = self._positions.pop(key)
+        bucket = self._cells[cell]
+        bucket.discard(key)
+        if not bucket:
+            del self._cells[cell]
+
+    def update(self, key: Hashable, x: float, y: float) -> None:
+        _, _, old = self._positions[key]
+        cell = self._cell(x, y)
+        if cell == old:
+            self._positions[key] = (x, y, cell)
+            return
+        self.remove(key)
+        self.insert(key, x, y)
+
+    def add(self, enemy: "FlyweightEnemy") -> None:
+        """Index an enemy object and have its move() calls keep the index up to date."""
+        self.insert(enemy, enemy.x, enemy.y)
+        enemy.spatial_index = self
+
+    def add_all(self, enemies: Iterable["FlyweightEnemy"]) -> None:
+        for enemy in enemies:
+            self.add(enemy)
+
+    def discard(self, enemy: "FlyweightEnemy") -> None:
+        """Stop indexing an enemy object added with add()."""
+        if enemy in self._positions:
+            self.remove(enemy)
+        enemy.spatial_index = None
+
+    @classmethod
+    def from_world(cls, world: "EnemyWorld", cell_size: float = 32.0) -> "SpatialGrid":
+        """Index every live enemy of an EnemyWorld by id, and keep it attached to the world."""
+        grid = cls(cell_size)
+        x, y = world.x, world.y
+        for enemy_id in world.ids():
+            grid.insert(enemy_id, x[enemy_id], y[enemy_id])
+        world.spatial_index = grid
+        return grid
+
+    def query_radius(self, x: float, y: float, radius: float) -> list[Hashable]:
+        """Keys within `radius` of (x, y), in no particular order."""
+        size = self.cell_size
+        radius_squared = radius * radius
+        positions = self._positions
+        cells = self._cells
+        found: list[Hashable] = []
+        # Cells outside the bounding box of used cells are empty
+        min_cx, max_cx = max(floor((x - radius) / size), self._min_cx), min(floor((x + radius) / size), self._max_cx)
+        min_cy, max_cy = max(floor((y - radius) / size), self._min_cy), min(floor((y + radius) / size), self._max_cy)
+        if max_cx < min_cx or max_cy < min_cy:
+            return found
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(cells):
+            # A huge radius: walking the occupied cells is cheaper than probing empty ones
+            buckets = [bucket for (cx, cy), bucket in cells.items()
+                       if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy]
+        else:
+            buckets = []
+            for cx in range(min_cx, max_cx + 1):
+                for cy in range(min_cy, max_cy + 1):
+                    bucket = cells.get((cx, cy))
+                    if bucket:
+                        buckets.append(bucket)
+        for bucket in buckets:
+            for key in bucket:
+                kx, ky, _ = positions[key]
+                if (kx - x) ** 2 + (ky - y) ** 2 <= radius_squared:
+                    found.append(key)
+        return found
+
+    def nearest(self, x: float, y: float, k: int = 1) -> list[Hashable]:
+        """The `k` keys closest to (x, y), closest first."""
+        if k < 1 or not self._positions:
+            return []
+        size = self.cell_size
+        positions = self._positions
+        cells = self._cells
+        cx, cy = self._cell(x, y)
+        # Max-heap of the best k as (-distance squared, order, key)
+        best: list[tuple[float, int, Hashable]] = []
+        order = 0
+        ring = 0
+        visited = 0
+        while True:
+            # Far from every key the rings are mostly empty: a plain scan is cheaper
+            visited += max(1, 8 * ring)
+            if visited > len(positions):
+                return self.nearest_linear(x, y, k)
+            for cell in _ring_cells(cx, cy, ring):
+                bucket = cells.get(cell)
+                if not bucket:
+                    continue
+                for key in bucket:
+                    kx, ky, _ = positions[key]
+                    entry = (-((kx - x) ** 2 + (ky - y) ** 2), order, key)
+                    order += 1
+                    if len(best) < k:
+                        heappush(best, entry)
+                    elif entry > best[0]:
+                        heappushpop(best, entry)
+            # Anything not visited yet is at least this far from (x, y)
+            reach = min(x - (cx - ring) * size, (cx + ring + 1) * size - x,
+                        y - (cy - ring) * size, (cy + ring + 1) * size - y)
+            if len(best) == k and -best[0][0] <= reach * reach:
+                break
+            if (cx - ring <= self._min_cx and cx + ring >= self._max_cx
+                    and cy - ring <= self._min_cy and cy + ring >= self._max_cy):
+                break
+            ring += 1
+        return [key for _, _, key in sorted(best, reverse=True)]
+
+    def nearest_linear(self, x: float, y: float, k: int = 1) -> list[Hashable]:
+        """Brute-force k-nearest over every key, for testing and benchmarks."""
+        ranked = nsmallest(k, self._positions.items(), key=lambda item: (item[1][0] - x) ** 2 + (item[1][1] - y) ** 2)
+        return [key for key, _ in ranked]
+
+
+def _ring_cells(cx: int, cy: int, ring: int) -> Iterable[Cell]:
+    if ring == 0:
+        yield cx, cy
+        return
+    for dx in range(-ring, ring + 1):
+        yield cx + dx, cy - ring
+        yield cx + dx, cy + ring
+    for dy in range(-ring + 1, ring):
+        yield cx - ring, cy + dy
+        yield cx + ring, cy + dy
+
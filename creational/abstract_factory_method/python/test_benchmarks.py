@@ -0,0 +1,63 @@
+import json
+from .benchmarks import WAVE_SPEC, main, measure_memory, run, spatial_benchmarks, timing_benchmarks, _dict_instances, _flyweight_instances
+
+
+class TestMemoryBenchmarks:
+    """Tests para los benchmarks de memoria de enemigos"""
+
+    def test_flyweight_uses_less_memory(self):
+        """Test que verifica que los enemigos flyweight ocupan menos que los de __dict__"""
+        before = measure_memory(_dict_instances, 20_000)["bytes_per_enemy"]
+        after = measure_memory(_flyweight_instances, 20_000)["bytes_per_enemy"]
+
+        assert after < before
+
+    def test_run_reports_every_layout(self):
+        """Test que verifica que run mide todas las representaciones"""
+        results = run("memory", count=1000)["results"]
+
+        assert set(results) == {"memory/dict_instances", "memory/flyweight_instances", "memory/enemy_world"}
+        assert results["memory/enemy_world"]["bytes_per_enemy"] < results["memory/flyweight_instances"]["bytes_per_enemy"]
+
+    def test_main_writes_json(self, tmp_path):
+        """Test que verifica que la línea de comandos escribe los resultados en JSON"""
+        output = tmp_path / "memory.json"
+
+        assert main(["--count", "100", "--filter", "world", "--output", str(output), "--spatial-sizes", "100"]) == 0
+        assert list(json.loads(output.read_text())["results"]) == ["memory/enemy_world"]
+
+
+class TestSpawnBenchmarks:
+    """Tests para los benchmarks de generación de oleadas"""
+
+    def test_every_spawn_path_builds_the_wave(self):
+        """Test que verifica que todas las variantes generan la oleada completa"""
+        for name, function in timing_benchmarks():
+            if name.startswith("spawn/"):
+                assert len(function()) == sum(WAVE_SPEC.values()), name
+
+
+class TestTickBenchmarks:
+    """Tests para los benchmarks del planificador"""
+
+    def test_tick_benchmarks_step(self):
+        """Test que verifica que los benchmarks de tick ejecutan el planificador"""
+        ticks = {name: function for name, function in timing_benchmarks() if name.startswith("tick/")}
+
+        assert set(ticks) == {"tick/columnar_50k", "tick/objects_50k"}
+        for step in ticks.values():
+            step()
+            assert step.__self__.tick == 1
+
+
+class TestSpatialBenchmarks:
+    """Tests para los benchmarks del índice espacial"""
+
+    def test_spatial_metrics(self):
+        """Test que verifica que se miden todas las operaciones del índice para cada tamaño"""
+        results = dict(spatial_benchmarks((500, 1000)))
+
+        assert set(results) == {"spatial/500", "spatial/1000"}
+        assert set(results["spatial/500"]) == {
+            "build_ms", "radius_query_us", "nearest_8_us", "move_us", "linear_nearest_us"
+        }
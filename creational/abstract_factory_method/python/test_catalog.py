@@ -0,0 +1,111 @@
+import pytest
+from . import videogame
+from .catalog import BUILTIN_CATALOG, FIELDS, load_catalog
+from .enemy_world import EnemyWorld
+from .videogame import BossGhost, CatalogFactory, Enemy, EnemyFactory, FlyweightEnemy, GhostFactory
+
+HEADER = ",".join(FIELDS)
+ALIENS = """
+alien,wheel_chair,WheelChairAlien,90,1.1,3,"silla abducción ",silla,silla
+alien,flier,FlierAlien,70,3.5,4,"ovni abducción ",ovni,ovni
+alien,boss,BossAlien,400,1.0,8,"nave nodriza ",nave,nave
+"""
+
+
+def _table(tmp_path, rows=ALIENS, name="aliens.csv"):
+    path = tmp_path / name
+    path.write_text(HEADER + rows, encoding="utf-8")
+    return path
+
+
+class TestBuiltinCatalog:
+    """Tests para los enemigos incluidos generados desde enemies.csv"""
+
+    def test_builtin_classes_come_from_catalog(self):
+        """Test que verifica que las clases de videogame son las del catálogo incluido"""
+        catalog = load_catalog(BUILTIN_CATALOG, module=videogame.__name__, register=False)
+
+        assert catalog.factories["ghost"] is GhostFactory
+        assert catalog.enemy_types["BossGhost"] is BossGhost
+        assert list(catalog.factories) == ["ghost", "zombie", "robot"]
+
+    def test_builtin_classes_keep_their_names(self):
+        """Test que verifica que las clases generadas conservan nombre y módulo"""
+        assert BossGhost.__name__ == "BossGhost"
+        assert BossGhost.__module__ == videogame.__name__
+        assert issubclass(GhostFactory, CatalogFactory)
+        assert GhostFactory.faction == "ghost"
+
+
+class TestLoadCatalog:
+    """Tests para cargar facciones desde una tabla"""
+
+    def test_new_faction(self, tmp_path):
+        """Test que verifica que una facción nueva funciona como las incluidas"""
+        factory = load_catalog(_table(tmp_path)).factory("alien")
+        boss = factory.create_boss_enemy()
+
+        assert isinstance(factory, EnemyFactory)
+        assert type(factory).__name__ == "AlienFactory"
+        assert isinstance(boss, FlyweightEnemy)
+        assert isinstance(boss, Enemy)
+        assert boss.get_stats() == {"name": "BossAlien", "health": 400, "speed": 1.0, "ai_level": 8}
+        assert boss.attack() == "nave nodriza "
+        assert [enemy.name for enemy in factory.create_wave({"flier": 2})] == ["FlierAlien", "FlierAlien"]
+        assert not hasattr(boss, "__dict__")
+
+    def test_new_faction_in_world(self, tmp_path):
+        """Test que verifica que los tipos del catálogo se pueden generar en un EnemyWorld"""
+        factory = load_catalog(_table(tmp_path)).factory("alien")
+        world = factory.create_wave({"wheel_chair": 3}, columnar=True)
+
+        assert isinstance(world, EnemyWorld)
+        assert world[0].name == "WheelChairAlien"
+        assert isinstance(world[0].to_enemy(), factory.enemy_types["wheel_chair"])
+
+    def test_catalog_is_cached(self, tmp_path):
+        """Test que verifica que cargar la misma tabla devuelve las mismas clases"""
+        path = _table(tmp_path)
+        catalog = load_catalog(path)
+
+        assert load_catalog(str(path)) is catalog
+        enemy = catalog.factory("alien").create_flier_enemy()
+        assert isinstance(enemy, load_catalog(path).enemy_types["FlierAlien"])
+
+    def test_changed_table_is_reloaded(self, tmp_path):
+        """Test que verifica que una tabla modificada genera clases nuevas"""
+        path = _table(tmp_path)
+        before = load_catalog(path)
+        _table(tmp_path, ALIENS.replace("400", "450"))
+        after = load_catalog(path)
+
+        assert after is not before
+        assert after.enemy_types["BossAlien"].flyweight.health == 450
+
+    def test_unknown_faction(self, tmp_path):
+        """Test que verifica que una facción desconocida lanza ValueError"""
+        with pytest.raises(ValueError):
+            load_catalog(_table(tmp_path)).factory("ghost")
+
+
+class TestInvalidCatalog:
+    """Tests para las tablas mal formadas"""
+
+    @pytest.mark.parametrize("rows, message", [
+        (ALIENS.replace("alien,boss", "alien,tank"), "Unknown enemy role on line 4"),
+        (ALIENS.replace(",400,", ",mucho,"), "Invalid health on line 4"),
+        (ALIENS.replace("FlierAlien", "WheelChairAlien"), "Duplicate enemy name on line 3"),
+        (ALIENS.replace("FlierAlien", "Flier Alien"), "Invalid name on line 3"),
+        (ALIENS.rsplit("alien,boss", 1)[0], "Faction alien is missing roles: boss"),
+    ])
+    def test_invalid_rows(self, tmp_path, rows, message):
+        """Test que verifica que las filas inválidas indican la línea del error"""
+        with pytest.raises(ValueError, match=message):
+            load_catalog(_table(tmp_path, rows))
+
+    def test_missing_columns(self, tmp_path):
+        """Test que verifica que faltan columnas obligatorias"""
+        path = tmp_path / "short.csv"
+        path.write_text("faction,role,name\nalien,boss,BossAlien\n", encoding="utf-8")
+        with pytest.raises(ValueError, match="missing columns"):
+            load_catalog(path)
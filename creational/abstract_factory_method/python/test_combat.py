@@ -0,0 +1,117 @@
+import pytest
+from . import combat, enemy_world
+from .combat import CombatEngine
+from .enemy_world import EnemyWorld
+from .spatial import SpatialGrid
+from .videogame import BossRobot, FlierZombie, WheelChairGhost
+
+
+def _world():
+    world = EnemyWorld()
+    world.spawn_many(WheelChairGhost, 3)  # 60 de salud
+    world.spawn(BossRobot)  # 300 de salud
+    return world
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine_factory(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(combat, "np", None)
+    return CombatEngine
+
+
+class TestCombatEngine:
+    """Tests para la resolución de combate en bloque"""
+
+    def test_damage_is_summed_per_target(self, engine_factory):
+        """Test que verifica que el daño de varios golpes al mismo objetivo se suma"""
+        world = _world()
+        log = engine_factory(world).resolve([10, 11, 12, 13], [3, 0, 3, 3], [20.0, 5.0, 30.0, 50.0])
+
+        assert list(log.targets) == [0, 3]
+        assert list(log.damage) == [5.0, 100.0]
+        assert world.health[0] == 55
+        assert world.health[3] == 200
+        assert len(log.kills) == 0
+
+    def test_kills_are_despawned_and_credited(self, engine_factory):
+        """Test que verifica que los muertos se eliminan y el golpe final se atribuye"""
+        world = _world()
+        engine = engine_factory(world)
+        log = engine.resolve([7, 8, 9, 7], [1, 1, 2, 1], [40.0, 30.0, 60.0, 10.0])
+
+        assert log.kill_records() == [(1, 8), (2, 9)]
+        assert world.ids() == [0, 3]
+        assert engine.stats.kills == 2
+        assert engine.stats.damage == 140.0
+
+    def test_dead_targets_are_ignored(self, engine_factory):
+        """Test que verifica que los eventos contra objetivos muertos o inexistentes se descartan"""
+        world = _world()
+        world.despawn(0)
+        log = engine_factory(world).resolve([1, 1, 1], [0, 99, 3], 10.0)
+
+        assert log.ignored == 2
+        assert list(log.targets) == [3]
+        assert world.health[3] == 290
+
+    def test_keep_dead_enemies(self, engine_factory):
+        """Test que verifica que despawn_dead=False deja los muertos en el mundo"""
+        world = _world()
+        engine = engine_factory(world, despawn_dead=False)
+        assert engine.resolve([0], [0], 100.0).kill_records() == [(0, 0)]
+        assert world.is_alive(0)
+        assert len(engine.resolve([0], [0], 100.0).kills) == 0
+
+    def test_invalid_events(self, engine_factory):
+        """Test que verifica que se rechazan longitudes distintas y daño negativo"""
+        engine = engine_factory(_world())
+        with pytest.raises(ValueError):
+            engine.resolve([0, 1], [0], 1.0)
+        with pytest.raises(ValueError):
+            engine.resolve([0], [0], [-1.0])
+
+    def test_kills_leave_spatial_index(self, engine_factory):
+        """Test que verifica que los muertos desaparecen del índice espacial"""
+        world = EnemyWorld()
+        world.spawn_many(FlierZombie, 4)
+        grid = SpatialGrid.from_world(world)
+        engine_factory(world).resolve([0, 0], [1, 2], 1000.0)
+
+        assert sorted(grid.query_radius(0.0, 0.0, 1.0)) == [0, 3]
+
+
+class TestDespawnMany:
+    """Tests para la eliminación en bloque del mundo"""
+
+    def test_despawn_many_reuses_slots(self):
+        """Test que verifica que despawn_many libera los huecos para reutilizarlos"""
+        world = _world()
+        world.despawn_many([0, 2])
+
+        assert len(world) == 2
+        assert sorted(world.spawn_many(FlierZombie, 2)) == [0, 2]
+
+    def test_despawn_many_is_all_or_nothing(self):
+        """Test que verifica que no se elimina nada si algún enemigo no está vivo"""
+        world = _world()
+        with pytest.raises(KeyError):
+            world.despawn_many([0, 7])
+        assert len(world) == 4
+
+    @pytest.mark.parametrize("backend", ["numpy", "python"])
+    def test_despawn_many_rejects_duplicates(self, backend, monkeypatch):
+        """Test que verifica que un id repetido se rechaza sin corromper los huecos libres"""
+        if backend == "numpy":
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(enemy_world, "np", None)
+        world = _world()
+        with pytest.raises(ValueError):
+            world.despawn_many([0, 0])
+        assert len(world) == 4
+        world.despawn(0)
+        assert world.spawn(FlierZombie) == 0
+        assert world.spawn(FlierZombie) == 4
@@ -0,0 +1,86 @@
+import pytest
+from .enemy_pool import EnemyPool
+from .videogame import BossGhost, FlierZombie, GhostFactory, RobotFactory, WheelChairRobot, ZombieFactory
+
+
+class TestEnemyPool:
+    """Tests para el pool de enemigos"""
+
+    def test_reuses_released_enemy(self):
+        """Test que verifica que un enemigo liberado se reutiliza con sus valores por defecto"""
+        pool = EnemyPool()
+        ghost = pool.acquire(BossGhost)
+        ghost.health = 1
+        pool.release(ghost)
+
+        reused = pool.acquire(BossGhost)
+        assert reused is ghost
+        assert reused.health == 120
+
+    def test_free_list_per_type(self):
+        """Test que verifica que cada tipo tiene su propia lista libre"""
+        pool = EnemyPool()
+        pool.release(FlierZombie())
+
+        assert isinstance(pool.acquire(BossGhost), BossGhost)
+        assert pool.stats().free == 1
+
+    def test_pool_cap(self):
+        """Test que verifica que el pool no guarda más enemigos que su límite"""
+        pool = EnemyPool(max_size=2)
+        results = [pool.release(WheelChairRobot()) for _ in range(3)]
+
+        assert results == [True, True, False]
+        stats = pool.stats()
+        assert (stats.released, stats.dropped, stats.free) == (3, 1, 2)
+
+    def test_double_release(self):
+        """Test que verifica que liberar dos veces el mismo enemigo lanza ValueError"""
+        pool = EnemyPool()
+        enemy = FlierZombie()
+        pool.release(enemy)
+        with pytest.raises(ValueError):
+            pool.release(enemy)
+
+    def test_prefill_and_hit_rate(self):
+        """Test que verifica el precalentado del pool y la tasa de aciertos"""
+        pool = EnemyPool()
+        pool.prefill(BossGhost, 3)
+        for _ in range(4):
+            pool.acquire(BossGhost)
+
+        stats = pool.stats()
+        assert (stats.created, stats.reused) == (4, 3)
+        assert stats.hit_rate == 3 / 7
+
+
+class TestFactoryPooling:
+    """Tests para las variantes con pool de las factories"""
+
+    def test_every_factory_supports_pooling(self):
+        """Test que verifica que las tres factories reutilizan enemigos liberados"""
+        for factory in (GhostFactory(), ZombieFactory(), RobotFactory()):
+            acquirers = {
+                "wheel_chair": factory.acquire_wheel_chair_enemy,
+                "flier": factory.acquire_flier_enemy,
+                "boss": factory.acquire_boss_enemy,
+            }
+            for role, acquire in acquirers.items():
+                enemy = acquire()
+                assert isinstance(enemy, factory.enemy_types[role])
+                factory.release(enemy)
+                assert acquire() is enemy
+            assert factory.pool_stats().reused == 3
+
+    def test_pool_size_is_configurable(self):
+        """Test que verifica que el límite del pool se configura por factory"""
+        factory = GhostFactory()
+        factory.pool_size = 1
+        factory.release(factory.create_boss_enemy())
+
+        assert not factory.release(factory.create_boss_enemy())
+
+    def test_unknown_role(self):
+        """Test que verifica que un rol desconocido lanza ValueError"""
+        with pytest.raises(ValueError):
+            RobotFactory().acquire("tank")
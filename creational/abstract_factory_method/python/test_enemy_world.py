@@ -0,0 +1,122 @@
+import pytest
+from .enemy_world import ENEMY_TYPES, EnemyView, EnemyWorld, type_code
+from .videogame import BossRobot, BossZombie, Enemy, FlierGhost, GhostFactory, RobotFactory, WheelChairGhost, ZombieFactory
+
+
+class TestEnemyWorld:
+    """Tests para el almacenamiento columnar de enemigos"""
+
+    def test_spawn_with_default_stats(self):
+        """Test que verifica que spawn usa las estadísticas por defecto del tipo"""
+        world = EnemyWorld()
+        enemy_id = world.spawn(WheelChairGhost)
+
+        assert world.health[enemy_id] == 60
+        assert world.speed[enemy_id] == 1.5
+        assert world.ai_level[enemy_id] == 3
+        assert world.type_code[enemy_id] == type_code(WheelChairGhost)
+        assert len(world) == 1
+
+    def test_spawn_many_grows_columns(self):
+        """Test que verifica que las columnas crecen al generar muchos enemigos"""
+        world = EnemyWorld(capacity=4)
+        ids = world.spawn_many(BossZombie, 10)
+
+        assert list(ids) == list(range(10))
+        assert world.capacity >= 10
+        assert all(world.health[enemy_id] == 200 for enemy_id in ids)
+
+    def test_despawn_reuses_slots(self):
+        """Test que verifica que los huecos de enemigos eliminados se reutilizan"""
+        world = EnemyWorld()
+        ids = world.spawn_many(FlierGhost, 5)
+        world.despawn(ids[1])
+        world.despawn(ids[3])
+
+        assert len(world) == 3
+        assert sorted(world.spawn_many(BossRobot, 3)) == [1, 3, 5]
+        assert world.health[1] == 300
+        assert world.ids() == [0, 1, 2, 3, 4, 5]
+
+    def test_despawn_unknown_enemy(self):
+        """Test que verifica que no se puede eliminar un enemigo inexistente"""
+        world = EnemyWorld()
+        with pytest.raises(KeyError):
+            world.despawn(0)
+
+    def test_unknown_type(self):
+        """Test que verifica que se rechazan tipos que no son enemigos conocidos"""
+        with pytest.raises(ValueError):
+            EnemyWorld().spawn(EnemyView)
+
+    def test_negative_count(self):
+        """Test que verifica que no se puede generar un número negativo de enemigos"""
+        world = EnemyWorld()
+        world.spawn(WheelChairGhost)
+        with pytest.raises(ValueError):
+            world.spawn_many(WheelChairGhost, -1)
+        assert len(world) == 1 and world.size == 1
+
+    def test_column_view_is_writable(self):
+        """Test que verifica que column permite actualizar toda una columna de una vez"""
+        world = EnemyWorld()
+        world.spawn_many(WheelChairGhost, 3)
+        health = world.column("health")
+        for index in range(len(health)):
+            health[index] = health[index] - 10
+
+        assert [world.health[enemy_id] for enemy_id in range(3)] == [50, 50, 50]
+
+
+class TestFactoriesSpawnIntoWorld:
+    """Tests para la generación directa desde las factories"""
+
+    def test_every_factory_spawns_every_role(self):
+        """Test que verifica que las tres factories generan todos sus roles en el mundo"""
+        world = EnemyWorld()
+        for factory in (GhostFactory(), ZombieFactory(), RobotFactory()):
+            for role in ("wheel_chair", "flier", "boss"):
+                factory.spawn_into(world, role, 2)
+
+        assert len(world) == 18
+        assert {ENEMY_TYPES[code] for code in world.type_code[:world.size]} == set(ENEMY_TYPES)
+
+    def test_unknown_role(self):
+        """Test que verifica que un rol desconocido lanza ValueError"""
+        with pytest.raises(ValueError):
+            GhostFactory().spawn_into(EnemyWorld(), "tank")
+
+
+class TestEnemyView:
+    """Tests para la vista compatible con Enemy"""
+
+    def test_view_matches_enemy(self):
+        """Test que verifica que la vista se comporta como el enemigo original"""
+        world = EnemyWorld()
+        view = world[ZombieFactory().spawn_into(world, "boss")[0]]
+        zombie = BossZombie()
+
+        assert isinstance(view, Enemy)
+        assert view.name == "BossZombie"
+        assert view.get_stats() == zombie.get_stats()
+        assert view.attack() == zombie.attack()
+        assert view.move() == zombie.move()
+        assert view.special_ability() == zombie.special_ability()
+
+    def test_view_writes_through(self):
+        """Test que verifica que modificar la vista actualiza las columnas"""
+        world = EnemyWorld()
+        view = world[world.spawn(FlierGhost)]
+        view.health -= 20
+
+        assert world.health[view.id] == 30
+        assert isinstance(view.to_enemy(), FlierGhost)
+        assert view.to_enemy().health == 30
+
+    def test_iteration_skips_dead(self):
+        """Test que verifica que iterar el mundo solo devuelve enemigos vivos"""
+        world = EnemyWorld()
+        ids = world.spawn_many(WheelChairGhost, 3)
+        world.despawn(ids[0])
+
+        assert [view.id for view in world] == list(ids[1:])
@@ -0,0 +1,98 @@
+import pytest
+from .enemy_world import EnemyWorld
+from .scheduler import PHASES, FixedStepScheduler
+from .spatial import SpatialGrid
+from .videogame import BossRobot, FlierGhost, WheelChairZombie
+
+
+def _world_and_enemies():
+    specs = [(FlierGhost, 30.0, 0.0), (WheelChairZombie, 0.0, -12.0), (BossRobot, 0.5, 0.5)]
+    world = EnemyWorld()
+    for enemy_type, x, y in specs:
+        world.spawn(enemy_type, x=x, y=y)
+    enemies = [enemy_type(x=x, y=y) for enemy_type, x, y in specs]
+    return world, enemies
+
+
+class TestFixedStepScheduler:
+    """Tests para el planificador de paso fijo"""
+
+    def test_advance_runs_whole_ticks(self):
+        """Test que verifica que advance ejecuta solo ticks completos y guarda el resto"""
+        scheduler = FixedStepScheduler([], timestep=0.1)
+
+        assert scheduler.advance(0.25) == 2
+        assert scheduler.advance(0.06) == 1
+        assert scheduler.tick == 3
+
+    def test_advance_limits_steps(self):
+        """Test que verifica que un fotograma lento no ejecuta más de max_steps ticks"""
+        scheduler = FixedStepScheduler([], timestep=0.1, max_steps=3)
+
+        assert scheduler.advance(1.0) == 3
+        assert scheduler.stats.dropped_ticks == 7
+
+    def test_enemies_move_towards_target(self):
+        """Test que verifica que los enemigos avanzan según su velocidad y paran al alcance"""
+        ghost = FlierGhost(x=10.0, y=0.0)
+        scheduler = FixedStepScheduler([ghost], timestep=1.0, attack_range=2.0)
+        scheduler.step()
+        assert (ghost.x, ghost.y) == (7.0, 0.0)
+
+        scheduler.run(5)
+        assert ghost.x == pytest.approx(2.0)
+
+    def test_attack_frequency_follows_ai_level(self):
+        """Test que verifica que los enemigos con más IA atacan más a menudo"""
+        attacks = []
+        boss = BossRobot(x=0.5)
+        zombie = WheelChairZombie(x=-0.5)
+        scheduler = FixedStepScheduler([boss, zombie], on_attack=lambda ids, damages: attacks.extend(zip(ids, damages)))
+        scheduler.run(9)
+
+        assert attacks.count((0, 7.0)) == 3
+        assert attacks.count((1, 1.0)) == 1
+        assert scheduler.damage_dealt == 22.0
+
+    def test_world_matches_objects(self):
+        """Test que verifica que el mundo columnar y los objetos dan el mismo resultado"""
+        world, enemies = _world_and_enemies()
+        world_attacks, object_attacks = [], []
+        world_scheduler = FixedStepScheduler(world, timestep=0.5, on_attack=lambda ids, damages: world_attacks.extend(zip(list(ids), list(damages))))
+        object_scheduler = FixedStepScheduler(enemies, timestep=0.5, on_attack=lambda ids, damages: object_attacks.extend(zip(ids, damages)))
+        world_scheduler.run(30)
+        object_scheduler.run(30)
+
+        for enemy_id, enemy in enumerate(enemies):
+            assert world[enemy_id].x == pytest.approx(enemy.x)
+            assert world[enemy_id].y == pytest.approx(enemy.y)
+        assert world_attacks == object_attacks
+        assert world_scheduler.damage_dealt == object_scheduler.damage_dealt
+
+    def test_dead_enemies_are_skipped(self):
+        """Test que verifica que los enemigos eliminados no se mueven"""
+        world, _ = _world_and_enemies()
+        world.despawn(0)
+        FixedStepScheduler(world, timestep=1.0).run(3)
+
+        assert world.x[0] == 30.0
+        assert world[1].y > -12.0
+
+    def test_spatial_index_follows_moves(self):
+        """Test que verifica que el índice espacial del mundo sigue los movimientos"""
+        world, _ = _world_and_enemies()
+        grid = SpatialGrid.from_world(world, cell_size=4.0)
+        FixedStepScheduler(world, timestep=1.0).run(30)
+
+        assert grid.position(0) == (world.x[0], world.y[0])
+        assert sorted(grid.query_radius(0.0, 0.0, 1.5)) == [0, 1, 2]
+
+    def test_phase_timings(self):
+        """Test que verifica que se informan los tiempos de cada fase"""
+        world, _ = _world_and_enemies()
+        scheduler = FixedStepScheduler(world)
+        scheduler.run(4)
+
+        assert set(scheduler.stats.phases) == set(PHASES)
+        assert all(phase.ticks == 4 for phase in scheduler.stats.phases.values())
+        assert scheduler.stats.mean_tick_ms >= 0.0
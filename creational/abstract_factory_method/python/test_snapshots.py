@@ -0,0 +1,124 @@
+import pytest
+from . import snapshots
+from .enemy_world import EnemyWorld, type_code
+from .snapshots import load, load_region, save
+from .videogame import BossZombie, FlierRobot, GhostFactory, WheelChairGhost
+
+
+def _world(count=1000):
+    world = EnemyWorld()
+    for index in range(count):
+        enemy_type = (WheelChairGhost, FlierRobot, BossZombie)[index % 3]
+        world.spawn(enemy_type, health=index, x=float(index % 40), y=float(index // 40))
+    return world
+
+
+def _enemies(world):
+    return sorted((view.name, view.health, view.speed, view.ai_level, view.x, view.y) for view in world)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(snapshots, "np", None)
+    return request.param
+
+
+class TestSnapshots:
+    """Tests para las instantáneas binarias del estado del juego"""
+
+    def test_save_and_load_world(self, backend, tmp_path):
+        """Test que verifica que un mundo se guarda y se restaura con los mismos enemigos"""
+        world = _world()
+        path = tmp_path / "world.snap"
+
+        assert save(path, world, block_size=64) == 1000
+        restored = load(path)
+        assert len(restored) == 1000
+        assert _enemies(restored) == _enemies(world)
+        assert restored.ids() == list(range(1000))
+
+    def test_only_live_enemies_are_saved(self, backend, tmp_path):
+        """Test que verifica que los enemigos eliminados no se guardan"""
+        world = _world(10)
+        world.despawn(3)
+        world.despawn(7)
+        save(tmp_path / "world.snap", world)
+
+        assert _enemies(load(tmp_path / "world.snap")) == _enemies(world)
+
+    def test_save_enemy_objects(self, backend, tmp_path):
+        """Test que verifica que se pueden guardar listas de enemigos de las factories"""
+        enemies = GhostFactory().create_wave({"boss": 2, "flier": 3})
+        enemies[0].move(5.0, -2.0)
+        save(tmp_path / "wave.snap", enemies)
+        restored = load(tmp_path / "wave.snap")
+
+        assert _enemies(restored) == sorted(
+            (enemy.name, enemy.health, enemy.speed, enemy.ai_level, enemy.x, enemy.y) for enemy in enemies
+        )
+        assert isinstance(restored[0].to_enemy(), type(enemies[0]))
+
+    def test_load_region(self, backend, tmp_path):
+        """Test que verifica que una carga parcial devuelve solo los enemigos de la región"""
+        world = _world()
+        path = tmp_path / "world.snap"
+        save(path, world, block_size=16)
+        region = load_region(path, 10.0, 5.0, 19.0, 9.0)
+
+        assert _enemies(region) == [enemy for enemy in _enemies(world) if 10 <= enemy[4] <= 19 and 5 <= enemy[5] <= 9]
+        assert len(region) == 50
+
+    def test_load_region_reads_only_overlapping_blocks(self, backend, tmp_path, monkeypatch):
+        """Test que verifica que la carga parcial no lee los bloques fuera de la región"""
+        path = tmp_path / "world.snap"
+        save(path, _world(), block_size=16)
+        read = []
+        original = snapshots._Snapshot.read
+        monkeypatch.setattr(snapshots._Snapshot, "read",
+                            lambda self, name, runs: read.extend(runs) or original(self, name, runs))
+        load_region(path, 0.0, 0.0, 3.0, 3.0)
+
+        assert 0 < sum(stop - start for start, stop in read) < 1000
+
+    def test_empty_world(self, backend, tmp_path):
+        """Test que verifica que un mundo vacío se guarda y restaura"""
+        save(tmp_path / "empty.snap", EnemyWorld())
+
+        restored = load(tmp_path / "empty.snap")
+        assert len(restored) == 0
+        assert restored.spawn(WheelChairGhost) == 0
+        assert restored.type_code[0] == type_code(WheelChairGhost)
+
+    def test_not_a_snapshot(self, tmp_path):
+        """Test que verifica que un archivo ajeno lanza ValueError"""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"not a snapshot at all, just some bytes")
+        with pytest.raises(ValueError):
+            load(path)
+
+    def test_unknown_type_code(self, backend, tmp_path):
+        """Test que verifica que un código de tipo sin registrar lanza ValueError al cargar"""
+        path = tmp_path / "world.snap"
+        save(path, _world(10))
+        data = bytearray(path.read_bytes())
+        with snapshots._Snapshot(path) as snapshot:
+            data[snapshot.offsets["type_code"]] = 255
+        path.write_bytes(bytes(data))
+        with pytest.raises(ValueError, match="Invalid enemy type code: 255"):
+            load(path)
+        with pytest.raises(ValueError, match="Invalid enemy type code: 255"):
+            load_region(path, -100.0, -100.0, 100.0, 100.0)
+
+    @pytest.mark.parametrize("cut", [1, 80, 900])
+    def test_truncated_snapshot(self, tmp_path, cut):
+        """Test que verifica que una instantánea cortada lanza ValueError al cargarla"""
+        path = tmp_path / "world.snap"
+        save(path, _world(100))
+        path.write_bytes(path.read_bytes()[:-cut])
+        with pytest.raises(ValueError, match="not an enemy snapshot"):
+            load(path)
+        with pytest.raises(ValueError, match="not an enemy snapshot"):
+            load_region(path, 0.0, 0.0, 10.0, 10.0)
@@ -0,0 +1,142 @@
+import random
+import pytest
+from .enemy_pool import EnemyPool
+from .enemy_world import EnemyWorld
+from .spatial import SpatialGrid
+from .videogame import BossRobot, FlierGhost, GhostFactory, RobotFactory, WheelChairZombie, ZombieFactory
+
+
+def _random_grid(count=500, seed=1):
+    rng = random.Random(seed)
+    grid = SpatialGrid(cell_size=10.0)
+    for key in range(count):
+        grid.insert(key, rng.uniform(-200, 200), rng.uniform(-200, 200))
+    return grid, rng
+
+
+class TestSpatialGrid:
+    """Tests para el índice espacial de rejilla uniforme"""
+
+    def test_radius_query_matches_scan(self):
+        """Test que verifica que la búsqueda por radio coincide con un recorrido completo"""
+        grid, rng = _random_grid()
+        for _ in range(20):
+            x, y = rng.uniform(-200, 200), rng.uniform(-200, 200)
+            expected = {key for key in range(500) if (grid.position(key)[0] - x) ** 2 + (grid.position(key)[1] - y) ** 2 <= 900}
+            assert set(grid.query_radius(x, y, 30.0)) == expected
+
+    def test_huge_radius_query(self):
+        """Test que verifica que un radio enorme recorre solo las celdas ocupadas"""
+        grid = SpatialGrid(cell_size=1.0)
+        grid.insert("a", 0.5, 0.5)
+        grid.insert("b", 40.0, -3.0)
+        assert sorted(grid.query_radius(0.0, 0.0, 1500.0)) == ["a", "b"]
+        assert grid.query_radius(0.0, 0.0, 1.0) == ["a"]
+        assert grid.query_radius(5000.0, 5000.0, 10.0) == []
+
+    def test_nearest_matches_scan(self):
+        """Test que verifica que los k vecinos más cercanos coinciden con un recorrido completo"""
+        grid, rng = _random_grid()
+        for _ in range(20):
+            x, y = rng.uniform(-300, 300), rng.uniform(-300, 300)
+            assert grid.nearest(x, y, 5) == grid.nearest_linear(x, y, 5)
+
+    def test_nearest_far_away_and_large_k(self):
+        """Test que verifica los vecinos desde lejos y con k mayor que el número de claves"""
+        grid = SpatialGrid(cell_size=1.0)
+        grid.insert("a", 0.0, 0.0)
+        grid.insert("b", 3.0, 0.0)
+
+        assert grid.nearest(1000.0, 1000.0, 1) == ["b"]
+        assert grid.nearest(0.0, 0.0, 10) == ["a", "b"]
+        assert SpatialGrid().nearest(0.0, 0.0) == []
+
+    def test_update_moves_between_cells(self):
+        """Test que verifica que actualizar una posición cambia el resultado de las búsquedas"""
+        grid = SpatialGrid(cell_size=10.0)
+        grid.insert("enemy", 0.0, 0.0)
+        grid.update("enemy", 95.0, 95.0)
+
+        assert grid.query_radius(0.0, 0.0, 5.0) == []
+        assert grid.query_radius(100.0, 100.0, 10.0) == ["enemy"]
+
+    def test_duplicate_insert_and_invalid_cell_size(self):
+        """Test que verifica los errores de inserción duplicada y tamaño de celda inválido"""
+        grid = SpatialGrid()
+        grid.insert(1, 0.0, 0.0)
+        with pytest.raises(KeyError):
+            grid.insert(1, 5.0, 5.0)
+        with pytest.raises(ValueError):
+            SpatialGrid(cell_size=0)
+
+
+class TestEnemyPositions:
+    """Tests para la posición de los enemigos y su índice"""
+
+    def test_every_factory_enemy_has_position(self):
+        """Test que verifica que todos los enemigos de las factories tienen posición"""
+        for factory in (GhostFactory(), ZombieFactory(), RobotFactory()):
+            for enemy in (factory.create_wheel_chair_enemy(), factory.create_flier_enemy(), factory.create_boss_enemy()):
+                assert (enemy.x, enemy.y) == (0.0, 0.0)
+
+    def test_move_updates_index(self):
+        """Test que verifica que move() actualiza la posición y el índice"""
+        grid = SpatialGrid(cell_size=10.0)
+        ghost = FlierGhost(x=5.0, y=5.0)
+        robot = BossRobot(x=50.0, y=50.0)
+        grid.add_all([ghost, robot])
+
+        assert ghost.move(40.0, 40.0) == "aire"
+        assert (ghost.x, ghost.y) == (45.0, 45.0)
+        assert grid.nearest(50.0, 50.0, 2) == [robot, ghost]
+        assert grid.query_radius(5.0, 5.0, 10.0) == []
+
+    def test_move_without_arguments(self):
+        """Test que verifica que move() sin desplazamiento mantiene la posición"""
+        zombie = WheelChairZombie(x=1.0, y=2.0)
+
+        assert zombie.move() == "silla"
+        assert (zombie.x, zombie.y) == (1.0, 2.0)
+
+    def test_pooled_enemy_leaves_index(self):
+        """Test que verifica que un enemigo reutilizado del pool sale del índice"""
+        factory = GhostFactory()
+        grid = SpatialGrid()
+        ghost = factory.acquire_boss_enemy()
+        grid.add(ghost)
+        factory.release(ghost)
+
+        assert factory.acquire_boss_enemy() is ghost
+        assert ghost not in grid and ghost.spatial_index is None
+
+    def test_released_enemy_leaves_index(self):
+        """Test que verifica que un enemigo liberado deja de aparecer en las consultas"""
+        pool = EnemyPool(max_size=1)
+        grid = SpatialGrid()
+        kept, dropped = pool.acquire(FlierGhost), pool.acquire(FlierGhost)
+        grid.add_all([kept, dropped])
+
+        assert pool.release(kept) is True
+        assert pool.release(dropped) is False
+
+        assert grid.nearest(0.0, 0.0) == []
+        assert grid.query_radius(0.0, 0.0, 10.0) == []
+
+
+class TestWorldSpatialIndex:
+    """Tests para el índice espacial de EnemyWorld"""
+
+    def test_world_index_follows_spawn_move_despawn(self):
+        """Test que verifica que el índice del mundo sigue generaciones, movimientos y eliminaciones"""
+        world = EnemyWorld()
+        first = world.spawn(FlierGhost, x=10.0, y=10.0)
+        grid = SpatialGrid.from_world(world, cell_size=8.0)
+        second = world.spawn(BossRobot, x=100.0, y=100.0)
+
+        assert grid.nearest(95.0, 95.0) == [second]
+        world[first].move(85.0, 85.0)
+        assert (world[first].x, world[first].y) == (95.0, 95.0)
+        assert grid.nearest(95.0, 95.0) == [first]
+        world.despawn(first)
+        assert first not in grid
+        assert grid.nearest(95.0, 95.0) == [second]
@@ -1,5 +1,5 @@
 import pytest
-from .videogame import (Enemy, EnemyFactory, WheelChairGhost,
+from .videogame import (Enemy, EnemyFactory, EnemyType, FlyweightEnemy, WheelChairGhost,
     WheelChairZombie, WheelChairRobot,BossGhost,BossZombie,
     BossRobot, FlierGhost,FlierZombie, FlierRobot, 
     GhostFactory, ZombieFactory, RobotFactory)
@@ -407,6 +407,89 @@ class TestFactoryMethodNames:
         assert callable(factory.create_boss_enemy)
 
 
+class TestFlyweightEnemies:
+    """Tests para los datos compartidos por tipo de enemigo (flyweight)"""
+
+    def test_instances_share_type_record(self):
+        """Test que verifica que todas las instancias de un tipo comparten su registro"""
+        first = FlierRobot()
+        second = FlierRobot()
+
+        assert isinstance(first.flyweight, EnemyType)
+        assert first.flyweight is second.flyweight
+        assert first.attack() is second.attack()
+
+    def test_instances_have_no_dict(self):
+        """Test que verifica que las instancias solo guardan su estado en __slots__"""
+        ghost = WheelChairGhost()
+
+        assert not hasattr(ghost, "__dict__")
+        with pytest.raises(AttributeError):
+            ghost.color = "blanco"
+
+    def test_custom_stats_are_per_instance(self):
+        """Test que verifica que las estadísticas propias no modifican el tipo compartido"""
+        boss = BossRobot(health=500)
+        boss.speed = 3.0
+
+        assert (boss.health, boss.speed, boss.ai_level) == (500, 3.0, 7)
+        assert BossRobot().health == 300
+        assert BossRobot.flyweight.speed == 1.8
+
+    def test_every_enemy_has_stats(self):
+        """Test que verifica que get_stats está disponible en todos los enemigos"""
+        for factory in (GhostFactory(), ZombieFactory(), RobotFactory()):
+            enemy = factory.create_flier_enemy()
+            assert isinstance(enemy, FlyweightEnemy)
+            assert enemy.get_stats()["name"] == enemy.name == type(enemy).__name__
+
+
+class TestCreateWave:
+    """Tests para la generación de oleadas completas"""
+
+    def test_wave_as_list(self):
+        """Test que verifica que create_wave genera todos los enemigos pedidos"""
+        wave = ZombieFactory().create_wave({"flier": 5, "boss": 1, "wheel_chair": 3})
+
+        assert len(wave) == 9
+        assert sum(isinstance(enemy, FlierZombie) for enemy in wave) == 5
+        assert sum(isinstance(enemy, BossZombie) for enemy in wave) == 1
+        assert sum(isinstance(enemy, WheelChairZombie) for enemy in wave) == 3
+
+    def test_wave_multipliers(self):
+        """Test que verifica que los multiplicadores de dificultad escalan las estadísticas"""
+        boss = RobotFactory().create_wave({"boss": 1}, {"health": 1.5, "speed": 2, "ai_level": 1.3})[0]
+
+        assert (boss.health, boss.speed, boss.ai_level) == (450, 3.6, 9)
+        assert BossRobot().health == 300
+
+    def test_columnar_wave(self):
+        """Test que verifica que la oleada columnar tiene los mismos enemigos y estadísticas"""
+        world = GhostFactory().create_wave({"flier": 4, "boss": 2}, {"health": 2}, columnar=True)
+
+        assert len(world) == 6
+        assert sorted(view.name for view in world) == ["BossGhost"] * 2 + ["FlierGhost"] * 4
+        assert all(view.health == 2 * type(view.to_enemy())().health for view in world)
+
+    def test_wave_into_existing_world(self):
+        """Test que verifica que se puede generar una oleada en un mundo existente"""
+        factory = GhostFactory()
+        world = factory.create_wave({"flier": 2}, columnar=True)
+
+        assert factory.create_wave({"boss": 3}, world=world) is world
+        assert len(world) == 5
+
+    def test_invalid_spec(self):
+        """Test que verifica que se rechazan roles, cantidades y multiplicadores inválidos"""
+        factory = GhostFactory()
+        with pytest.raises(ValueError):
+            factory.create_wave({"tank": 1})
+        with pytest.raises(ValueError):
+            factory.create_wave({"boss": -1})
+        with pytest.raises(ValueError):
+            factory.create_wave({"boss": 1}, {"armor": 2})
+
+
 if __name__ == "__main__":
     # Ejecutar los tests con pytest
     pytest.main([__file__, "-v"])
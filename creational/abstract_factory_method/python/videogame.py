@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
+from itertools import repeat
+from typing import ClassVar, NamedTuple
+from .enemy_pool import EnemyPool, PoolStats
 
 
 class Enemy(ABC):
+    __slots__ = ()
     @abstractmethod
     def attack(self):
         pass
@@ -23,157 +27,169 @@ class EnemyFactory(ABC):
     def create_boss_enemy(self)->Enemy:
         pass
 
+    # Enemy class per role ("wheel_chair", "flier", "boss"), set by each factory
+    enemy_types: dict[str, type[Enemy]] = {}
 
-class BossGhost(Enemy):
-    def __init__(self, health=120, speed=2.0, ai_level=6):
-        self.health = health
-        self.speed = speed
-        self.ai_level = ai_level
-        self.name = self.__class__.__name__
-    def attack(self):
-        return "devastador fantasmal "
-    def move(self):
-        return "silla"
-    def special_ability(self):
-        return "silla"
-
-class FlierGhost(Enemy):
-    def __init__(self, health=50, speed=3.0, ai_level=4):
-        self.health = health
-        self.speed = speed
-        self.ai_level = ai_level
-        self.name = self.__class__.__name__
-    def attack(self):
-        return "aire fantasmal "
-    def move(self):
-        return "aire"
-    def special_ability(self):
-        return "aire"
+    def _enemy_type(self, role: str) -> type[Enemy]:
+        try:
+            return self.enemy_types[role]
+        except KeyError:
+            raise ValueError(f"Unknown enemy role: {role}")
 
+    def spawn_into(self, world, role: str, count: int = 1):
+        # Spawns straight into an EnemyWorld without creating Enemy objects
+        return world.spawn_many(self._enemy_type(role), count)
 
-    
-class WheelChairGhost(Enemy):
-    def __init__(self, health=60, speed=1.5, ai_level=3):
-        self.health = health
-        self.speed = speed
-        self.ai_level = ai_level
-        self.name = self.__class__.__name__
-    def attack(self):
-        return "silla fantasmal "
-    def move(self):
-        return "silla"
-    def special_ability(self):
-        return "silla"
-    
-class GhostFactory(EnemyFactory):
-    def create_wheel_chair_enemy(self)->WheelChairGhost:
-        return WheelChairGhost()
-    def create_flier_enemy(self)->FlierGhost:
-        return FlierGhost()
-    def create_boss_enemy(self)->BossGhost:
-        return BossGhost()
+    def create_wave(self, spec: dict[str, int], multipliers: dict[str, float] | None = None,
+                    columnar: bool = False, world=None):
+        # Builds a whole wave in one call. `spec` maps roles to counts, e.g.
+        # {"flier": 5000, "boss": 3, "wheel_chair": 20000}, and `multipliers`
+        # scale the default "health", "speed" and "ai_level" of every enemy.
+        # Returns a list of enemies, or an EnemyWorld when `columnar` is set or
+        # a `world` to spawn into is given.
+        multipliers = multipliers or {}
+        unknown = set(multipliers) - {"health", "speed", "ai_level"}
+        if unknown:
+            raise ValueError(f"Unknown multipliers: {', '.join(sorted(unknown))}")
+        groups = []
+        for role, count in spec.items():
+            if count < 0:
+                raise ValueError(f"Negative count for role: {role}")
+            enemy_type = self._enemy_type(role)
+            flyweight = enemy_type.flyweight
+            groups.append((
+                enemy_type,
+                count,
+                flyweight.health * multipliers.get("health", 1),
+                flyweight.speed * multipliers.get("speed", 1),
+                round(flyweight.ai_level * multipliers.get("ai_level", 1)),
+            ))
+        if columnar or world is not None:
+            from .enemy_world import EnemyWorld
+            if world is None:
+                world = EnemyWorld(capacity=sum(group[1] for group in groups))
+            for enemy_type, count, health, speed, ai_level in groups:
+                world.spawn_many(enemy_type, count, health, speed, ai_level)
+            return world
+        wave = []
+        for enemy_type, count, health, speed, ai_level in groups:
+            wave.extend(map(enemy_type, repeat(health, count), repeat(speed, count), repeat(ai_level, count)))
+        return wave
 
-    
+    # Maximum number of released enemies kept per type by acquire/release
+    pool_size = 1024
 
-class WheelChairZombie(Enemy):
-    def __init__(self, health=120, speed=0.5, ai_level=1):
-        self.health = health
-        self.speed = speed
-        self.ai_level = ai_level
-        self.name = self.__class__.__name__
-    def attack(self):
-        return "silla mordiscos "
-    def move(self):
-        return "silla"
-    def special_ability(self):
-        return "silla"
-    
-class BossZombie(Enemy):
-    def __init__(self, health=200, speed=1.2, ai_level=5):
-        self.health = health
-        self.speed = speed
-        self.ai_level = ai_level
-        self.name = self.__class__.__name__
+    @property
+    def pool(self) -> EnemyPool:
+        # One pool per factory, created on first use
+        pool = self.__dict__.get("_pool")
+        if pool is None:
+            pool = self._pool = EnemyPool(self.pool_size)
+        return pool
+
+    def acquire(self, role: str) -> "FlyweightEnemy":
+        # Like create_*, but reuses a released enemy reset to its defaults when there is one
+        return self.pool.acquire(self._enemy_type(role))
+    def acquire_wheel_chair_enemy(self) -> "FlyweightEnemy":
+        return self.acquire("wheel_chair")
+    def acquire_flier_enemy(self) -> "FlyweightEnemy":
+        return self.acquire("flier")
+    def acquire_boss_enemy(self) -> "FlyweightEnemy":
+        return self.acquire("boss")
+    def release(self, enemy: "FlyweightEnemy") -> bool:
+        return self.pool.release(enemy)
+    def pool_stats(self) -> PoolStats:
+        return self.pool.stats()
+
+
+class EnemyType(NamedTuple):
+    # Intrinsic data shared by every enemy of a type (flyweight)
+    name: str
+    health: float
+    speed: float
+    ai_level: int
+    attack: str
+    move: str
+    special_ability: str
+
+
+class FlyweightEnemy(Enemy):
+    # Instances only hold their mutable state; everything else lives in `flyweight`
+    __slots__ = ("health", "speed", "ai_level", "x", "y", "spatial_index")
+    flyweight: ClassVar[EnemyType]
+
+    def __init__(self, health=None, speed=None, ai_level=None, x=0.0, y=0.0):
+        flyweight = self.flyweight
+        self.health = flyweight.health if health is None else health
+        self.speed = flyweight.speed if speed is None else speed
+        self.ai_level = flyweight.ai_level if ai_level is None else ai_level
+        self.x = x
+        self.y = y
+        # SpatialGrid this enemy was added to, kept up to date by move()
+        self.spatial_index = None
+    def reset(self):
+        # Back to the type's default stats, used when a pooled enemy is reused
+        flyweight = self.flyweight
+        self.health = flyweight.health
+        self.speed = flyweight.speed
+        self.ai_level = flyweight.ai_level
+        self.x = self.y = 0.0
+        if self.spatial_index is not None:
+            self.spatial_index.discard(self)
+    @property
+    def name(self):
+        return self.flyweight.name
     def attack(self):
-        return "autoridad mordiscos "
-    def move(self):
-        return "autoridad"
+        return self.flyweight.attack
+    def move(self, dx=0.0, dy=0.0):
+        if dx or dy:
+            self.x += dx
+            self.y += dy
+            if self.spatial_index is not None:
+                self.spatial_index.update(self, self.x, self.y)
+        return self.flyweight.move
     def special_ability(self):
-        return "autoridad"
+        return self.flyweight.special_ability
     def get_stats(self):
-        return({ 
-            "name": "BossZombie",
+        return({
+            "name": self.name,
             "health": self.health,
             "speed": self.speed,
             "ai_level": self.ai_level})
 
-class FlierZombie(Enemy):
-    def __init__(self, health=80, speed=1.8, ai_level=2):
-        self.health = health
-        self.speed = speed
-        self.ai_level = ai_level
-        self.name = self.__class__.__name__
-    def attack(self):
-        return "vuela mordiscos "
-    def move(self):
-        return "vuela"
-    def special_ability(self):
-        return "vuela"
-
-class ZombieFactory(EnemyFactory):
-    def create_wheel_chair_enemy(self)->WheelChairZombie:
-        return WheelChairZombie()      
-    def create_flier_enemy(self)->FlierZombie:
-        return FlierZombie()       
-    def create_boss_enemy(self)->BossZombie:
-        return BossZombie()     
-
-class WheelChairRobot(Enemy):
-    def __init__(self, health=180, speed=1.0, ai_level=4):
-        self.health = health
-        self.speed = speed
-        self.ai_level = ai_level
-        self.name = self.__class__.__name__
-    def attack(self):
-        return "silla láseres "
-    def move(self):
-        return "silla"
-    def special_ability(self):
-        return "silla"
-    
-class BossRobot(Enemy):
-    def __init__(self, health=300, speed=1.8, ai_level=7):
-        self.health = health
-        self.speed = speed
-        self.ai_level = ai_level
-        self.name = self.__class__.__name__
-    def attack(self):
-        return "convocar láseres "
-    def move(self):
-        return "convocar"
-    def special_ability(self):
-        return "convocar"
-    
-    
-class FlierRobot(Enemy):
-    def __init__(self, health=150, speed=2.5, ai_level=5):
-        self.health = health
-        self.speed = speed
-        self.ai_level = ai_level
-        self.name = self.__class__.__name__
-    def attack(self):
-        return "vuela láseres "
-    def move(self):
-        return "vuela"
-    def special_ability(self):
-        return "vuela"
-    
 
+class CatalogFactory(EnemyFactory):
+    # Factory whose create_* methods look their class up in enemy_types; the
+    # catalog (see catalog.py) generates one subclass per faction
+    faction: ClassVar[str] = ""
+
+    def create_wheel_chair_enemy(self) -> Enemy:
+        return self.enemy_types["wheel_chair"]()
+    def create_flier_enemy(self) -> Enemy:
+        return self.enemy_types["flier"]()
+    def create_boss_enemy(self) -> Enemy:
+        return self.enemy_types["boss"]()
+
+
+# The concrete enemies and factories are generated from enemies.csv, one row
+# per faction and role. The import is here because catalog.py builds on the
+# classes above; the built-in types already have fixed codes in
+# enemy_world.ENEMY_TYPES, so they are not registered there again.
+from .catalog import BUILTIN_CATALOG, load_catalog  # noqa: E402
+
+_builtin = load_catalog(BUILTIN_CATALOG, module=__name__, register=False)
+
+WheelChairGhost = _builtin.enemy_types["WheelChairGhost"]
+FlierGhost = _builtin.enemy_types["FlierGhost"]
+BossGhost = _builtin.enemy_types["BossGhost"]
+GhostFactory = _builtin.factories["ghost"]
+
+WheelChairZombie = _builtin.enemy_types["WheelChairZombie"]
+FlierZombie = _builtin.enemy_types["FlierZombie"]
+BossZombie = _builtin.enemy_types["BossZombie"]
+ZombieFactory = _builtin.factories["zombie"]
 
-class RobotFactory(EnemyFactory):
-    def create_wheel_chair_enemy(self)->WheelChairRobot:
-        return WheelChairRobot()       
-    def create_flier_enemy(self)->FlierRobot:
-        return FlierRobot()      
-    def create_boss_enemy(self)->BossRobot:
-        return BossRobot()      
+WheelChairRobot = _builtin.enemy_types["WheelChairRobot"]
+FlierRobot = _builtin.enemy_types["FlierRobot"]
+BossRobot = _builtin.enemy_types["BossRobot"]
+RobotFactory = _builtin.factories["robot"]
@@ -0,0 +1,176 @@
+"""
+Asynchronous payment pipeline with bounded concurrency.
+
+AsyncPaymentRunner streams payments through validate -> process -> receipt
+while keeping at most `concurrency` gateway calls in flight. FakeGateway is an
+in-process stand-in for a payment provider with configurable latency and
+failure rate, used to test and measure the pipeline offline.
+"""
+import asyncio
+import random
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Protocol, Union
+from .commission_rules import MERCHANT_FIELD
+from .payment_factory import PAYMENT_METHOD_FIELD, PaymentFactory
+from .payment_processors import PaymentProcessor
+
+Payment = dict[str, str | float]
+Result = dict[str, str | bool | float]
+
+
+class GatewayError(Exception):
+    """Raised by a gateway when a charge fails and may be retried."""
+
+
+class Gateway(Protocol):
+    async def charge(self, processor: PaymentProcessor, data: Payment) -> None:
+        ...
+
+
+class FakeGateway:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Union[int, None] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+
+    async def charge(self, processor: PaymentProcessor, data: Payment) -> None:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = self.latency + self._random.random() * self.jitter
+            await asyncio.sleep(delay)
+            if self._random.random() < self.failure_rate:
+                self.failures += 1
+                raise GatewayError(f"{type(processor).__name__} gateway rejected the charge")
+        finally:
+            self.in_flight -= 1
+
+
+class AsyncPaymentRunner:
+    def __init__(
+        self,
+        gateway: Union[Gateway, None] = None,
+        concurrency: int = 1000,
+        timeout: Union[float, None] = None,
+        retries: int = 0,
+        retry_backoff: float = 0.0,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.gateway = gateway
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+
+    async def process(self, data: Payment) -> Result:
+        """
+        Run a single payment through validate -> process -> receipt.
+        Gateway failures and timeouts are retried up to `retries` times,
+        except timeouts of processors with a transport, whose charge may
+        still be running.
+        """
+        try:
+            processor = PaymentFactory.create_payment_method(data.get(PAYMENT_METHOD_FIELD))  # type: ignore
+        except ValueError as exc:
+            return {"success": False, "error": str(exc)}
+
+        try:
+            reason = processor.validation_check()(data)
+            if reason is not None:
+                return {"success": False, "error": reason}
+            amount = float(data.get("amount", 0.0))
+        except (TypeError, ValueError) as exc:
+            return {"success": False, "error": f"Invalid payment data: {exc}"}
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = await asyncio.wait_for(
+                    processor.process_payment_async(data, self.gateway), self.timeout
+                )
+                break
+            except asyncio.TimeoutError:
+                # wait_for cannot stop a transport charge running in a worker thread:
+                # it may still go through, so retrying could charge the payment twice
+                if processor.transport is not None:
+                    return {"success": False, "error": "Gateway timed out, the charge may still complete",
+                            "attempts": attempt}
+                if attempt > self.retries:
+                    return {"success": False, "error": "Gateway timed out", "attempts": attempt}
+                if self.retry_backoff:
+                    await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            except GatewayError as exc:
+                if attempt > self.retries:
+                    return {"success": False, "error": str(exc), "attempts": attempt}
+                if self.retry_backoff:
+                    await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            except Exception as exc:
+                # Like process_batch: one failing payment must not abort the run
+                return {"success": False, "error": str(exc), "attempts": attempt}
+
+        result["attempts"] = attempt
+        if not result.get("success"):
+            return result
+        try:
+            result["commission"] = processor.calculate_commission(amount, data.get(MERCHANT_FIELD))  # type: ignore
+            result["receipt"] = processor.generate_receipt({**data, **result, "amount": amount})
+        except Exception as exc:
+            return {"success": False, "error": str(exc), "attempts": attempt}
+        return result
+
+    async def stream(
+        self, payments: Union[Iterable[Payment], AsyncIterable[Payment]]
+    ) -> AsyncIterator[tuple[int, Result]]:
+        """
+        Yield (input position, result) pairs as payments complete. Input is
+        consumed lazily, so no more than `concurrency` payments are pending.
+        """
+        pending: set[asyncio.Task[tuple[int, Result]]] = set()
+
+        async def indexed(index: int, data: Payment) -> tuple[int, Result]:
+            return index, await self.process(data)
+
+        index = 0
+        async for data in _aiter(payments):
+            if len(pending) >= self.concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            pending.add(asyncio.ensure_future(indexed(index, data)))
+            index += 1
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+
+    async def run(self, payments: Union[Iterable[Payment], AsyncIterable[Payment]]) -> list[Result]:
+        """
+        Process every payment and return the results in input order.
+        """
+        results: Dict[int, Result] = {}
+        async for index, result in self.stream(payments):
+            results[index] = result
+        return [results[index] for index in range(len(results))]
+
+
+async def _aiter(payments: Union[Iterable[Payment], AsyncIterable[Payment]]) -> AsyncIterator[Payment]:
+    if isinstance(payments, AsyncIterable):
+        async for data in payments:
+            yield data
+    else:
+        for data in payments:
+            yield data
@@ -0,0 +1,172 @@
+"""
+Benchmark suite for the payment subsystem, using only the standard library.
+
+Usage (from the repository root):
+    python -m creational.factory_method.python.benchmarks run --output current.json
+    python -m creational.factory_method.python.benchmarks compare baseline.json current.json --threshold 0.15
+
+`run` times factory creation, validation, processing, receipts and the batch
+paths for every processor and payload size, and transaction ID generation, and
+writes nanoseconds per payment as JSON. `compare` exits with status 1 when a metric tracked in the
+baseline got slower by more than the threshold.
+"""
+from typing import Any, Callable, Iterable, Union
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+from .payment_factory import PAYMENT_METHOD_FIELD, PaymentFactory, PaymentMethod
+from .transaction_ids import ContentHashIdGenerator, SnowflakeIdGenerator
+
+Benchmark = tuple[str, Callable[[], Any], int]
+
+BASE_PAYLOADS: dict[PaymentMethod, dict[str, str | float]] = {
+    PaymentMethod.CREDIT_CARD: {"card_number": "4111111111111111", "expiry_date": "12/25", "cvv": "123"},
+    PaymentMethod.PAYPAL: {"email": "test@example.com", "password": "validpassword"},
+    PaymentMethod.BANK_TRANSFER: {"account_number": "1234567890", "routing_number": "987654321",
+                                  "account_holder": "John Doe"},
+    PaymentMethod.DIGITAL_WALLET: {"wallet_id": "WALLET123", "phone_number": "+1-234-567-8900"},
+}
+
+# Number of extra metadata fields added to each payload
+PAYLOAD_SIZES = {"small": 0, "medium": 20, "large": 200}
+
+BATCH_SIZE = 1000
+
+
+def make_payload(method: PaymentMethod, size: str, amount: float = 100.0) -> dict[str, str | float]:
+    payload: dict[str, str | float] = {**BASE_PAYLOADS[method], "amount": amount}
+    for index in range(PAYLOAD_SIZES[size]):
+        payload[f"meta_{index}"] = f"value-{index:04d}"
+    return payload
+
+
+def benchmarks() -> Iterable[Benchmark]:
+    """Yield (name, callable, payments per call) for every tracked metric."""
+    for method in PaymentMethod:
+        yield f"create_payment_method/{method.value}", lambda method=method: PaymentFactory.create_payment_method(method), 1
+
+    for method in PaymentMethod:
+        processor = PaymentFactory.create_payment_method(method)
+        for size in PAYLOAD_SIZES:
+            payload = make_payload(method, size)
+            processed = {**payload, **processor.process_payment(payload)}
+            batch = [make_payload(method, size, float(amount)) for amount in range(BATCH_SIZE)]
+            prefix = f"{method.value}/{size}"
+            yield f"validate_data/{prefix}", lambda p=processor, d=payload: p.validate_data(d), 1  # type: ignore
+            yield f"process_payment/{prefix}", lambda p=processor, d=payload: p.process_payment(d), 1
+            yield f"generate_receipt/{prefix}", lambda p=processor, d=processed: p.generate_receipt(d), 1
+            yield f"single_path/{prefix}", lambda p=processor, b=batch: _single_path(p, b), BATCH_SIZE
+            yield f"process_batch/{prefix}", lambda p=processor, b=batch: p.process_batch(b), BATCH_SIZE
+
+    methods = list(PaymentMethod)
+    mixed = [
+        {**make_payload(methods[index % len(methods)], "small", float(index)), PAYMENT_METHOD_FIELD: methods[index % len(methods)].value}
+        for index in range(BATCH_SIZE)
+    ]
+    yield "factory_process_batch/mixed", lambda: PaymentFactory.process_batch(mixed), BATCH_SIZE
+
+    payload = make_payload(PaymentMethod.CREDIT_CARD, "small")
+    content_hash, snowflake = ContentHashIdGenerator(), SnowflakeIdGenerator(worker_id=0)
+    yield "transaction_id/content_hash", lambda: content_hash.next_int(payload), 1
+    yield "transaction_id/snowflake", lambda: snowflake.next_int(), 1
+
+
+def _single_path(processor: Any, payments: list[dict[str, str | float]]) -> None:
+    # The one-dict-at-a-time flow that process_batch replaces
+    for data in payments:
+        if processor.validate_data(data):
+            processor.calculate_commission(float(data["amount"]))
+            result = processor.process_payment(data)
+            processor.generate_receipt({**data, **result})
+
+
+def measure(function: Callable[[], Any], per_call: int, min_time: float = 0.2, repeat: int = 5) -> float:
+    """Best nanoseconds per payment over `repeat` runs of at least `min_time` seconds."""
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number / per_call * 1e9
+
+
+def run(selected: Union[str, None] = None, min_time: float = 0.2, repeat: int = 5) -> dict[str, Any]:
+    results: dict[str, dict[str, float]] = {}
+    for name, function, per_call in benchmarks():
+        if selected is not None and selected not in name:
+            continue
+        results[name] = {"ns_per_op": measure(function, per_call, min_time, repeat)}
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float = 0.1) -> list[tuple[str, float, float, float]]:
+    """
+    Return (name, baseline ns, current ns, relative change) for every metric
+    that regressed by more than `threshold` (0.1 = 10% slower).
+    Metrics missing from the current run are ignored.
+    """
+    regressions: list[tuple[str, float, float, float]] = []
+    for name, metric in baseline["results"].items():
+        if name not in current["results"]:
+            continue
+        before = metric["ns_per_op"]
+        after = current["results"][name]["ns_per_op"]
+        change = after / before - 1.0
+        if change > threshold:
+            regressions.append((name, before, after, change))
+    return regressions
+
+
+def main(argv: Union[list[str], None] = None) -> int:
+    parser = argparse.ArgumentParser(description="Payment subsystem benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and print or save JSON")
+    run_parser.add_argument("--output", help="write results to this file instead of stdout")
+    run_parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    run_parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--baseline", help="compare against this baseline after running")
+    run_parser.add_argument("--threshold", type=float, default=0.1)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        current = run(args.filter, args.min_time, args.repeat)
+        text = json.dumps(current, indent=2, sort_keys=True)
+        if args.output:
+            with open(args.output, "w") as output:
+                output.write(text + "\n")
+        else:
+            print(text)
+        if not args.baseline:
+            return 0
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    else:
+        with open(args.baseline) as baseline_file, open(args.current) as current_file:
+            baseline = json.load(baseline_file)
+            current = json.load(current_file)
+
+    regressions = compare(baseline, current, args.threshold)
+    for name, before, after, change in regressions:
+        print(f"REGRESSION {name}: {before:.1f} ns -> {after:.1f} ns ({change:+.1%})", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
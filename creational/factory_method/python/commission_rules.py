@@ -0,0 +1,230 @@
+"""
+Tiered, per-merchant commission rules compiled into lookup tables.
+
+Rules are loaded from a JSON config such as:
+
+    {
+      "methods": {
+        "credit_card": {"tiers": [{"from": 0, "rate": 0.029, "fixed": 0.30},
+                                  {"from": 1000, "rate": 0.02}],
+                        "min": 0.50, "cap": 25.00}
+      },
+      "merchants": {
+        "acme": {"paypal": {"tiers": [{"from": 0, "rate": 0.01}]}}
+      }
+    }
+
+The tier whose "from" amount is the largest one not above the payment amount
+applies its rate (and fixed fee) to the whole amount; the fee is then
+clamped to "min" and "cap". Merchant rules override the method rules, and
+methods without rules keep their processor's commission_rate.
+
+Every rule is compiled once into sorted integer-cent breakpoint arrays, so a
+commission is one bisect per payment, or one numpy.searchsorted per batch.
+CommissionRuleEngine reloads the config when the file changes and swaps the
+compiled RuleSet in a single assignment, so payments never wait for a reload.
+"""
+from array import array
+from bisect import bisect_right
+from typing import Any, Callable, Mapping, Sequence, Union
+import json
+import os
+import threading
+import time
+from .payment_batch import RATE_SCALE, commission_cents, default_rates, rate_to_ppm, to_cents
+from .payment_factory import MERCHANT_FIELD, PaymentMethod
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+# Below this size the NumPy round-trip costs more than bisecting each amount.
+_VECTORIZE_MIN_SIZE = 64
+_HALF_RATE = RATE_SCALE // 2
+
+
+class CommissionTable:
+    __slots__ = ("breakpoints", "rates", "fixed", "minimum", "cap")
+
+    def __init__(
+        self,
+        breakpoints: Sequence[int],
+        rates: Sequence[int],
+        fixed: Sequence[int],
+        minimum: int = 0,
+        cap: Union[int, None] = None,
+    ):
+        """Breakpoints are ascending tier starts in cents; rates are in ppm and fixed fees in cents."""
+        if not breakpoints or breakpoints[0] > 0 or list(breakpoints) != sorted(set(breakpoints)):
+            raise ValueError("Tier breakpoints must be unique, ascending and start at or below 0")
+        if not len(breakpoints) == len(rates) == len(fixed):
+            raise ValueError("Every tier needs a rate and a fixed fee")
+        if cap is not None and minimum > cap:
+            raise ValueError("Commission min must not exceed cap")
+        self.breakpoints = array("q", breakpoints)
+        self.rates = array("q", rates)
+        self.fixed = array("q", fixed)
+        self.minimum = minimum
+        self.cap = cap
+
+    @classmethod
+    def flat(cls, rate_ppm: int) -> "CommissionTable":
+        return cls([0], [rate_ppm], [0])
+
+    @classmethod
+    def from_rule(cls, rule: Mapping[str, Any]) -> "CommissionTable":
+        tiers = sorted(rule["tiers"], key=lambda tier: to_cents(tier.get("from", 0)))
+        cap = rule.get("cap")
+        return cls(
+            [to_cents(tier.get("from", 0)) for tier in tiers],
+            [rate_to_ppm(tier.get("rate", 0.0)) for tier in tiers],
+            [to_cents(tier.get("fixed", 0)) for tier in tiers],
+            to_cents(rule.get("min", 0)),
+            None if cap is None else to_cents(cap),
+        )
+
+    def commission_cents(self, amount_cents: int) -> int:
+        # Amounts below the first breakpoint (negative ones, e.g. refunds) use the first tier
+        tier = max(0, bisect_right(self.breakpoints, amount_cents) - 1)
+        fee = commission_cents(amount_cents, self.rates[tier]) + self.fixed[tier]
+        if fee < self.minimum:
+            return self.minimum
+        if self.cap is not None and fee > self.cap:
+            return self.cap
+        return fee
+
+    def commissions_cents(self, amounts_cents: Sequence[int]) -> list[int]:
+        if np is None or len(amounts_cents) < _VECTORIZE_MIN_SIZE:
+            lookup = self.commission_cents
+            return [lookup(amount) for amount in amounts_cents]
+        amounts = np.asarray(amounts_cents, dtype=np.int64)
+        tiers = np.searchsorted(np.frombuffer(self.breakpoints, dtype=np.int64), amounts, side="right") - 1
+        np.maximum(tiers, 0, out=tiers)
+        rates = np.frombuffer(self.rates, dtype=np.int64)[tiers]
+        fees = (amounts * rates + _HALF_RATE) // RATE_SCALE + np.frombuffer(self.fixed, dtype=np.int64)[tiers]
+        return np.clip(fees, self.minimum, self.cap).tolist()
+
+
+class RuleSet:
+    """Immutable compiled rules: one CommissionTable per (merchant, method)."""
+
+    def __init__(
+        self,
+        methods: Mapping[PaymentMethod, CommissionTable],
+        merchants: Union[Mapping[str, Mapping[PaymentMethod, CommissionTable]], None] = None,
+    ):
+        self.methods = dict(methods)
+        self.merchants = {merchant: dict(tables) for merchant, tables in (merchants or {}).items()}
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "RuleSet":
+        methods = {method: CommissionTable.flat(rate) for method, rate in default_rates().items()}
+        methods.update(_compile_methods(config.get("methods", {})))
+        merchants = {merchant: _compile_methods(rules) for merchant, rules in config.get("merchants", {}).items()}
+        return cls(methods, merchants)
+
+    def table(self, payment_method: Union[PaymentMethod, str], merchant: Union[str, None] = None) -> CommissionTable:
+        method = PaymentMethod(payment_method)
+        if merchant is not None:
+            table = self.merchants.get(merchant, {}).get(method)
+            if table is not None:
+                return table
+        try:
+            return self.methods[method]
+        except KeyError:
+            raise ValueError(f"No commission rule for method: {method.value}")
+
+    def commission_cents(self, payment_method: Union[PaymentMethod, str], amount_cents: int,
+                         merchant: Union[str, None] = None) -> int:
+        return self.table(payment_method, merchant).commission_cents(amount_cents)
+
+    def commissions_cents(
+        self,
+        payment_method: Union[PaymentMethod, str],
+        amounts_cents: Sequence[int],
+        merchants: Union[Sequence[Union[str, None]], None] = None,
+    ) -> list[int]:
+        """Commissions of many amounts, with one vectorized lookup per merchant."""
+        if merchants is None:
+            return self.table(payment_method).commissions_cents(amounts_cents)
+        groups: dict[Union[str, None], list[int]] = {}
+        for index, merchant in enumerate(merchants):
+            groups.setdefault(merchant, []).append(index)
+        fees = [0] * len(amounts_cents)
+        for merchant, indexes in groups.items():
+            group_fees = self.table(payment_method, merchant).commissions_cents([amounts_cents[index] for index in indexes])
+            for index, fee in zip(indexes, group_fees):
+                fees[index] = fee
+        return fees
+
+
+def _compile_methods(rules: Mapping[str, Mapping[str, Any]]) -> dict[PaymentMethod, CommissionTable]:
+    return {PaymentMethod(method): CommissionTable.from_rule(rule) for method, rule in rules.items()}
+
+
+class CommissionRuleEngine:
+    def __init__(
+        self,
+        path: Union[str, os.PathLike[str]],
+        check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Load and compile the rules in `path`. The file's modification time is
+        checked at most once per `check_interval` seconds; a config that fails
+        to load leaves the previous rules in place and is kept in last_error.
+        """
+        self.path = os.fspath(path)
+        self.check_interval = check_interval
+        self._clock = clock
+        self._reload_lock = threading.Lock()
+        self.last_error: Union[Exception, None] = None
+        self._mtime = os.stat(self.path).st_mtime_ns
+        self._rules = self._load()
+        self._next_check = clock() + check_interval
+
+    def _load(self) -> RuleSet:
+        with open(self.path) as config:
+            return RuleSet.from_config(json.load(config))
+
+    @property
+    def rules(self) -> RuleSet:
+        if self._clock() >= self._next_check:
+            self.maybe_reload()
+        return self._rules
+
+    def maybe_reload(self) -> bool:
+        """Recompile the rules if the file changed. Returns whether they were swapped."""
+        # Only one thread reloads; the others keep using the current snapshot
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_check = self._clock() + self.check_interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime:
+                    return False
+                rules = self._load()
+            except (OSError, ValueError, KeyError, TypeError) as exc:
+                self.last_error = exc
+                return False
+            self._mtime = mtime
+            self._rules = rules
+            self.last_error = None
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def commission(self, payment_method: Union[PaymentMethod, str], amount: float,
+                   merchant: Union[str, None] = None) -> float:
+        return self.rules.commission_cents(payment_method, to_cents(amount), merchant) / 100
+
+    def commissions(
+        self,
+        payment_method: Union[PaymentMethod, str],
+        amounts: Sequence[float],
+        merchants: Union[Sequence[Union[str, None]], None] = None,
+    ) -> list[float]:
+        fees = self.rules.commissions_cents(payment_method, [to_cents(amount) for amount in amounts], merchants)
+        return [fee / 100 for fee in fees]
@@ -0,0 +1,16 @@
+import pytest
+
+
+class FakeClock:
+    """Monotonic clock stand-in whose time only moves when a test sets `now`."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
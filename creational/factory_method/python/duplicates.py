@@ -0,0 +1,267 @@
+"""
+Duplicate payment detection with time-bucketed Bloom filters.
+
+A payment is a likely duplicate when the same account (card, bank account,
+wallet or PayPal email) pays the same amount again inside `window` seconds.
+Fingerprints go into one Bloom filter per time bucket, so memory is bounded
+by the filter size instead of growing with every payment, and expired
+buckets are dropped as time moves on. Only a Bloom filter hit, which may be a
+false positive, is confirmed with an exact check before a payment is rejected.
+"""
+from collections import deque
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import Any, Callable, Iterable, Mapping, Union
+import math
+import threading
+import time
+from .payment_batch import to_cents
+from .payment_processors import ACCOUNT_FIELDS, PaymentProcessor
+
+Result = dict[str, str | bool | float]
+
+
+def payment_key(data: Mapping[str, object]) -> bytes:
+    """Fingerprint of the paying account and the amount in cents."""
+    for name in ACCOUNT_FIELDS:
+        account = data.get(name)
+        if account is not None:
+            amount = data.get("amount", 0)
+            try:
+                cents = to_cents(amount)  # type: ignore
+            except (ArithmeticError, TypeError, ValueError):
+                raise ValueError(f"Invalid amount: {amount!r}")
+            return f"{name}\x1f{account}\x1f{cents}".encode()
+    raise ValueError("Payment has no account field")
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001, max_bytes: Union[int, None] = None):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate between 0 and 1")
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        if max_bytes is not None:
+            bits = min(bits, max_bytes * 8)
+        self.size = max(8, bits)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+    def _positions(self, key: bytes) -> list[int]:
+        # Kirsch-Mitzenmacher: k positions from two independent 64-bit hashes
+        digest = blake2b(key, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(first + index * second) % size for index in range(self.hashes)]
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def add(self, key: bytes) -> bool:
+        """Add a key and return whether it may have been present already."""
+        bits = self.bits
+        present = True
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                present = False
+                bits[position >> 3] |= mask
+        self.count += 1
+        return present
+
+
+@dataclass
+class DuplicateStats:
+    checked: int = 0
+    bloom_hits: int = 0
+    duplicates: int = 0
+    # Payments rejected because the same payment was still being processed
+    in_flight: int = 0
+
+    @property
+    def false_positives(self) -> int:
+        """Bloom filter hits that the exact check rejected."""
+        return self.bloom_hits - self.duplicates
+
+
+class DuplicatePaymentDetector:
+    def __init__(
+        self,
+        window: float = 300.0,
+        buckets: int = 10,
+        capacity: int = 1_000_000,
+        error_rate: float = 0.001,
+        max_bytes: Union[int, None] = None,
+        exact_check: Union[Callable[[bytes], bool], None] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        `capacity` is the number of payments expected per window and
+        `max_bytes` caps the memory of all Bloom filters together.
+        `exact_check` receives the fingerprint of a Bloom filter hit and
+        confirms whether it really is a duplicate, e.g. against a database.
+        Without it the detector keeps the exact fingerprints of the window
+        next to the filters and confirms hits against those, so a false
+        positive never rejects a payment; that set grows with the payments in
+        the window and is not counted in `max_bytes`.
+        """
+        self.window = window
+        self.bucket_span = window / buckets
+        self.buckets = buckets
+        self._bucket_capacity = max(1, math.ceil(capacity / buckets))
+        # _current() keeps one bucket beyond the window, so the budget is split `buckets + 1` ways
+        self._bucket_bytes = None if max_bytes is None else max(1, max_bytes // (buckets + 1))
+        self.error_rate = error_rate
+        self.exact_check = exact_check
+        self.clock = clock
+        self.stats = DuplicateStats()
+        # (bucket number, Bloom filter, exact fingerprints or None with an exact_check)
+        self._ring: deque[tuple[int, BloomFilter, Union[set[bytes], None]]] = deque()
+        # Fingerprints of payments reserved but not yet released
+        self._pending: set[bytes] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(bloom.nbytes for _, bloom, _ in self._ring)
+
+    def _current(self) -> tuple[int, BloomFilter, Union[set[bytes], None]]:
+        bucket = int(self.clock() // self.bucket_span)
+        ring = self._ring
+        # A payment seen `buckets` buckets ago may still be inside the window, so keep one extra
+        while ring and ring[0][0] < bucket - self.buckets:
+            ring.popleft()
+        if not ring or ring[-1][0] != bucket:
+            keys = set() if self.exact_check is None else None
+            ring.append((bucket, BloomFilter(self._bucket_capacity, self.error_rate, self._bucket_bytes), keys))
+        return ring[-1]
+
+    def _add(self, key: bytes) -> None:
+        # Called with the lock held
+        _, bloom, keys = self._current()
+        bloom.add(key)
+        if keys is not None:
+            keys.add(key)
+
+    def _seen(self, key: bytes) -> bool:
+        with self._lock:
+            self._current()
+            self.stats.checked += 1
+            if not any(key in bloom for _, bloom, _ in self._ring):
+                return False
+            self.stats.bloom_hits += 1
+            if self.exact_check is None:
+                duplicate = any(key in keys for _, _, keys in self._ring)  # type: ignore
+        if self.exact_check is not None:
+            duplicate = self.exact_check(key)
+        if duplicate:
+            with self._lock:
+                self.stats.duplicates += 1
+        return duplicate
+
+    def seen(self, data: Mapping[str, object]) -> bool:
+        """Return True if the payment is a duplicate, without recording it."""
+        return self._seen(payment_key(data))
+
+    def record(self, data: Mapping[str, object]) -> None:
+        """Record a processed payment."""
+        key = payment_key(data)
+        with self._lock:
+            self._add(key)
+
+    def check(self, data: Mapping[str, object]) -> bool:
+        """Record the payment and return True if it is a duplicate."""
+        key = payment_key(data)
+        duplicate = self._seen(key)
+        with self._lock:
+            self._add(key)
+        return duplicate
+
+    def reserve(self, data: Mapping[str, object]) -> Union[bytes, None]:
+        """
+        Claim a payment that is about to be processed: return its fingerprint,
+        or None if it is a duplicate or the same payment is still in flight.
+        The fingerprint goes back to release() once the payment is processed.
+        """
+        key = payment_key(data)
+        with self._lock:
+            if key in self._pending:
+                self.stats.in_flight += 1
+                return None
+            self._pending.add(key)
+        if self._seen(key):
+            with self._lock:
+                self._pending.discard(key)
+            return None
+        return key
+
+    def release(self, key: bytes, processed: bool) -> None:
+        """Finish a reservation, recording the payment only if it was processed."""
+        with self._lock:
+            self._pending.discard(key)
+            if processed:
+                self._add(key)
+
+
+class DuplicateGuard:
+    """
+    Rejects likely duplicates before they reach the wrapped processor, in
+    process_payment and process_batch. A payment is recorded only once it
+    succeeded, so a retry after a failed attempt goes through. Every other
+    attribute is delegated to the processor.
+    """
+
+    def __init__(self, processor: PaymentProcessor, detector: DuplicatePaymentDetector):
+        self.processor = processor
+        self.detector = detector
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.processor, name)
+
+    def _reserve(self, data: dict[str, str | float]) -> Union[bytes, Result]:
+        # The reserved fingerprint, or the result rejecting the payment
+        try:
+            key = self.detector.reserve(data)
+        except ValueError as exc:
+            return {"success": False, "error": f"Invalid payment data: {exc}", "amount": data.get("amount", 0.0)}
+        if key is None:
+            return {"success": False, "error": "Duplicate payment", "amount": data.get("amount", 0.0)}
+        return key
+
+    def process_payment(self, data: dict[str, str | float], authorization: Union[str, None] = None) -> Result:
+        key = self._reserve(data)
+        if not isinstance(key, bytes):
+            return key
+        result: Result = {}
+        try:
+            result = self.processor.process_payment(data, authorization)
+        finally:
+            self.detector.release(key, bool(result.get("success")))
+        return result
+
+    def process_batch(self, payments: Iterable[dict[str, str | float]]) -> list[Result]:
+        payments = list(payments)
+        results: list[Union[Result, None]] = [None] * len(payments)
+        reserved: dict[int, bytes] = {}
+        for index, data in enumerate(payments):
+            key = self._reserve(data)
+            if isinstance(key, bytes):
+                reserved[index] = key
+            else:
+                results[index] = key
+        try:
+            processed = self.processor.process_batch([payments[index] for index in reserved])
+        except BaseException:
+            for key in reserved.values():
+                self.detector.release(key, False)
+            raise
+        for (index, key), result in zip(reserved.items(), processed):
+            self.detector.release(key, bool(result.get("success")))
+            results[index] = result
+        return results  # type: ignore
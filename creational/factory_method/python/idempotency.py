@@ -0,0 +1,218 @@
+"""
+Idempotency layer for payment processors.
+
+IdempotentProcessor wraps a PaymentProcessor so that retries of the same
+payment return the stored result instead of being processed again. Payments
+are keyed by a client idempotency key or, failing that, by a fingerprint of
+the canonical payload.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Iterable, Union
+import threading
+import time
+from .payment_processors import PaymentProcessor
+from .transaction_ids import fingerprint
+
+if TYPE_CHECKING:
+    from .async_payments import Gateway
+
+Result = dict[str, str | bool | float]
+
+IDEMPOTENCY_KEY_FIELD = "idempotency_key"
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class IdempotencyCache:
+    """
+    Thread-safe LRU cache whose entries also expire `ttl` seconds after being stored.
+    Concurrent requests for the same missing key are computed only once.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 24 * 3600.0, clock: Callable[[], float] = time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._pending: dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self._expirations += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self._misses += 1
+                return default
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Any], cacheable: Union[Callable[[Any], bool], None] = None
+    ) -> Any:
+        """
+        The stored value of `key`, or compute and store it. A value rejected by
+        `cacheable` is returned but not stored, so the next request computes again.
+        """
+        while True:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not _MISSING:
+                    self._hits += 1
+                    return value
+                pending = self._pending.get(key)
+                owner = pending is None
+                if owner:
+                    pending = self._pending[key] = threading.Event()
+                    self._misses += 1
+            if not owner:
+                # Another thread is computing this key: wait, then read its result
+                pending.wait()  # type: ignore
+                continue
+            try:
+                value = compute()
+                if cacheable is None or cacheable(value):
+                    with self._lock:
+                        self._store(key, value)
+                return value
+            finally:
+                with self._lock:
+                    del self._pending[key]
+                pending.set()  # type: ignore
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, self._expirations, len(self._entries))
+
+
+def is_final(result: Result) -> bool:
+    """Whether a result may be replayed: anything but a failure to reach the provider."""
+    return not result.get("retryable")
+
+
+class IdempotentProcessor:
+    """
+    Wraps a processor so process_payment, process_payment_async and
+    process_batch are idempotent. Results that failed only because the
+    provider was unreachable are not stored, so a retry is processed again.
+    Every other attribute is delegated to the wrapped processor.
+    """
+
+    def __init__(
+        self,
+        processor: PaymentProcessor,
+        cache: Union[IdempotencyCache, None] = None,
+        key_field: str = IDEMPOTENCY_KEY_FIELD,
+        fingerprint_fields: Union[Iterable[str], None] = None,
+    ):
+        self.processor = processor
+        self.cache = cache if cache is not None else IdempotencyCache()
+        self.key_field = key_field
+        self.fingerprint_fields = None if fingerprint_fields is None else tuple(fingerprint_fields)
+        self._namespace = type(processor).__name__
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.processor, name)
+
+    def idempotency_key(self, data: dict[str, str | float], idempotency_key: Union[str, None] = None) -> Hashable:
+        key = idempotency_key if idempotency_key is not None else data.get(self.key_field)
+        if key is not None:
+            return (self._namespace, "key", key)
+        fields = self.fingerprint_fields
+        if fields is None:
+            fields = sorted(name for name in data if name != self.key_field)
+        return (self._namespace, "payload", fingerprint(data, fields))
+
+    def process_payment(
+        self,
+        data: dict[str, str | float],
+        idempotency_key: Union[str, None] = None,
+        authorization: Union[str, None] = None,
+    ) -> Result:
+        key = self.idempotency_key(data, idempotency_key)
+        result = self.cache.get_or_compute(key, lambda: self.processor.process_payment(data, authorization), is_final)
+        # Hand out copies so callers cannot alter the stored result
+        return dict(result)
+
+    async def process_payment_async(
+        self, data: dict[str, str | float], gateway: Union["Gateway", None] = None, idempotency_key: Union[str, None] = None
+    ) -> Result:
+        key = self.idempotency_key(data, idempotency_key)
+        result = self.cache.get(key)
+        if result is None:
+            result = await self.processor.process_payment_async(data, gateway)
+            if is_final(result):
+                self.cache.put(key, result)
+        return dict(result)
+
+    def process_batch(self, payments: Iterable[dict[str, str | float]]) -> list[Result]:
+        """
+        Batch counterpart of process_payment: stored results are replayed and
+        only the remaining payments, once per key, go to the processor's batch.
+        """
+        payments = list(payments)
+        keys = [self.idempotency_key(data) for data in payments]
+        results: list[Union[Result, None]] = [self.cache.get(key) for key in keys]
+        pending: dict[Hashable, list[int]] = {}
+        for index, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                pending.setdefault(key, []).append(index)
+        if pending:
+            first = [indexes[0] for indexes in pending.values()]
+            for key, indexes, result in zip(pending, pending.values(),
+                                            self.processor.process_batch([payments[index] for index in first])):
+                if is_final(result):
+                    self.cache.put(key, result)
+                for index in indexes:
+                    results[index] = result
+        return [dict(result) for result in results]  # type: ignore
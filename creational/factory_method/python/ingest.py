@@ -0,0 +1,262 @@
+"""
+Streaming payment ingestion from JSONL or CSV files.
+
+Usage (from the repository root):
+    python -m creational.factory_method.python.ingest payments.jsonl --receipts receipts.txt --rejects rejects.jsonl
+
+Records are read lazily and handed over in chunks through a bounded queue:
+the reader thread blocks when `max_pending_chunks` chunks are waiting, so
+memory stays flat however large the input is. Each chunk is routed to a
+processor by its "payment_method" field, then validated and processed in one
+batch per method, and receipted. Records rejected at any stage are written to the
+rejects file as JSONL together with their line number and reason, and the
+time spent in every stage is reported as records per second.
+"""
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Iterable, Iterator, TextIO, Union
+import argparse
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from .payment_factory import PAYMENT_METHOD_FIELD, PaymentFactory, PaymentMethod
+from .payment_processors import PaymentProcessor
+
+Record = dict[str, Any]
+# (line number, record) pairs, the line number pointing into the input file
+Numbered = tuple[int, Record]
+
+INPUT_FORMATS = ("jsonl", "csv")
+STAGES = ("read", "route", "process", "receipts")
+
+
+def detect_format(path: Union[str, os.PathLike[str]]) -> str:
+    return "csv" if os.fspath(path).lower().endswith(".csv") else "jsonl"
+
+
+def read_records(fileobj: TextIO, format: str = "jsonl") -> Iterator[Numbered]:
+    """
+    Yield (line number, record) for every record of a JSONL or CSV stream.
+    Lines that do not parse are yielded as {"_error": reason, "_raw": line}.
+    """
+    if format not in INPUT_FORMATS:
+        raise ValueError(f"Invalid input format: {format}")
+    if format == "csv":
+        reader = csv.DictReader(fileobj)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(fileobj, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, {"_error": f"Invalid JSON: {exc}", "_raw": line.rstrip("\r\n")}
+            continue
+        if not isinstance(record, dict):
+            record = {"_error": "Record is not a JSON object", "_raw": line.rstrip("\r\n")}
+        yield line_number, record
+
+
+def chunked(records: Iterable[Numbered], size: int) -> Iterator[list[Numbered]]:
+    iterator = iter(records)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+@dataclass
+class StageStats:
+    records: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Records per second."""
+        return self.records / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class IngestReport:
+    read: int = 0
+    processed: int = 0
+    rejected: int = 0
+    stages: dict[str, StageStats] = field(default_factory=lambda: {name: StageStats() for name in STAGES})
+
+    def format(self) -> str:
+        lines = [f"read {self.read}, processed {self.processed}, rejected {self.rejected}"]
+        for name, stats in self.stages.items():
+            lines.append(f"{name:>9}: {stats.records:>10} records {stats.seconds:>9.3f} s {stats.throughput:>12.0f} rec/s")
+        return "\n".join(lines)
+
+
+class PaymentIngestor:
+    def __init__(
+        self,
+        receipts: Union[TextIO, None] = None,
+        rejects: Union[TextIO, None] = None,
+        receipt_format: str = "text",
+        chunk_size: int = 1000,
+        max_pending_chunks: int = 4,
+        default_method: Union[PaymentMethod, str, None] = None,
+    ):
+        """
+        `receipts` and `rejects` are text file objects (either may be None to
+        discard). `receipt_format` is "text" or "jsonl"; records without a
+        payment_method field use `default_method` when given.
+        """
+        if receipt_format not in ("text", "jsonl"):
+            raise ValueError(f"Invalid receipt format: {receipt_format}")
+        self.receipts = receipts
+        self.rejects = rejects
+        self.receipt_format = receipt_format
+        self.chunk_size = chunk_size
+        self.max_pending_chunks = max_pending_chunks
+        self.default_method = None if default_method is None else PaymentMethod(default_method).value
+
+    def ingest(self, records: Iterable[Numbered]) -> IngestReport:
+        report = IngestReport()
+        pending: "queue.Queue[Union[list[Numbered], BaseException, None]]" = queue.Queue(self.max_pending_chunks)
+        stop = threading.Event()
+        reader = threading.Thread(target=self._read, args=(records, pending, report.stages["read"], stop), daemon=True)
+        reader.start()
+        try:
+            while (chunk := pending.get()) is not None:
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                report.read += len(chunk)
+                self._ingest_chunk(chunk, report)
+        finally:
+            stop.set()
+            # Unblock the reader if it is waiting on a full queue
+            while reader.is_alive():
+                try:
+                    pending.get(timeout=0.01)
+                except queue.Empty:
+                    pass
+        return report
+
+    def ingest_file(self, path: Union[str, os.PathLike[str]], format: Union[str, None] = None) -> IngestReport:
+        with open(path, newline="") as fileobj:
+            return self.ingest(read_records(fileobj, format or detect_format(path)))
+
+    def _read(self, records: Iterable[Numbered], pending: queue.Queue, stats: StageStats, stop: threading.Event) -> None:
+        try:
+            iterator = chunked(records, self.chunk_size)
+            while not stop.is_set():
+                start = time.perf_counter()
+                chunk = next(iterator, None)
+                stats.seconds += time.perf_counter() - start
+                if chunk is None:
+                    break
+                stats.records += len(chunk)
+                # Blocks while max_pending_chunks are waiting: this is the backpressure
+                pending.put(chunk)
+        except BaseException as exc:
+            pending.put(exc)
+            return
+        pending.put(None)
+
+    def _reject(self, report: IngestReport, line_number: int, record: Record, error: str) -> None:
+        report.rejected += 1
+        if self.rejects is not None:
+            # Unparsable lines keep their original text so they can be fixed and replayed
+            entry = {"line": line_number, "error": error}
+            if "_raw" in record:
+                entry["raw"] = record["_raw"]
+            else:
+                entry["record"] = record
+            self.rejects.write(json.dumps(entry, default=str) + "\n")
+
+    def _timed(self, report: IngestReport, stage: str, records: int, start: float) -> None:
+        stats = report.stages[stage]
+        stats.records += records
+        stats.seconds += time.perf_counter() - start
+
+    def _route(self, chunk: list[Numbered], report: IngestReport) -> dict[PaymentMethod, list[Numbered]]:
+        groups: dict[PaymentMethod, list[Numbered]] = {}
+        for line_number, record in chunk:
+            if "_error" in record:
+                self._reject(report, line_number, record, record["_error"])
+                continue
+            value = record.get(PAYMENT_METHOD_FIELD) or self.default_method
+            try:
+                method = PaymentMethod(value)
+            except ValueError:
+                self._reject(report, line_number, record, f"Invalid payment method: {value}")
+                continue
+            try:
+                if "amount" in record:
+                    # A copy, so the caller's record keeps its original amount
+                    record = {**record, "amount": float(record["amount"])}
+            except (TypeError, ValueError):
+                self._reject(report, line_number, record, f"Invalid amount: {record['amount']}")
+                continue
+            groups.setdefault(method, []).append((line_number, record))
+        return groups
+
+    def _ingest_chunk(self, chunk: list[Numbered], report: IngestReport) -> None:
+        start = time.perf_counter()
+        groups = self._route(chunk, report)
+        self._timed(report, "route", len(chunk), start)
+
+        for method, numbered in groups.items():
+            processor: PaymentProcessor = PaymentFactory.create_payment_method(method)
+
+            start = time.perf_counter()
+            # process_batch validates, applies per-merchant commission rules, authorizes the
+            # batch in one round-trip and renders the text receipts
+            completed: list[Record] = []
+            receipts: list[str] = []
+            results = processor.process_batch([record for _, record in numbered])
+            for (line_number, record), result in zip(numbered, results):
+                if not result.get("success"):
+                    self._reject(report, line_number, record, str(result.get("error")))
+                    continue
+                receipts.append(str(result.pop("receipt")))
+                completed.append({**record, **result})
+            self._timed(report, "process", len(numbered), start)
+            report.processed += len(completed)
+
+            start = time.perf_counter()
+            if self.receipts is not None:
+                if self.receipt_format == "text":
+                    self.receipts.write("".join(receipt + "\n\n" for receipt in receipts))
+                else:
+                    processor.write_receipts(completed, self.receipts, self.receipt_format)
+            self._timed(report, "receipts", len(completed), start)
+
+
+def main(argv: Union[list[str], None] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ingest payments from a JSONL or CSV file")
+    parser.add_argument("input", help="JSONL or CSV file of payment records")
+    parser.add_argument("--format", choices=INPUT_FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument("--receipts", help="write receipts to this file")
+    parser.add_argument("--receipt-format", choices=("text", "jsonl"), default="text")
+    parser.add_argument("--rejects", help="write rejected records to this JSONL file")
+    parser.add_argument("--method", choices=[method.value for method in PaymentMethod],
+                        help="payment method of records without a payment_method field")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--max-pending-chunks", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    receipts = open(args.receipts, "w", newline="") if args.receipts else None
+    rejects = open(args.rejects, "w") if args.rejects else None
+    try:
+        ingestor = PaymentIngestor(receipts, rejects, args.receipt_format, args.chunk_size,
+                                   args.max_pending_chunks, args.method)
+        report = ingestor.ingest_file(args.input, args.format)
+    finally:
+        for output in (receipts, rejects):
+            if output is not None:
+                output.close()
+    print(report.format(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Memory-mapped, append-only transaction journal.
+
+Every processed payment is appended as a fixed 40-byte binary record:
+
+    transaction id   u64   numeric part of "<prefix>-<hex>"
+    amount           i64   cents
+    commission       i64   cents
+    timestamp        i64   nanoseconds since the epoch
+    method           u8    PaymentMethod code (see payment_batch.METHOD_CODES)
+    flags            u8    bit 0 set when the payment succeeded
+
+The header stores the number of committed records. Appends are group
+committed: the new records are flushed to disk, then the header is updated
+and flushed, once every `group_size` records or `group_interval` seconds (a
+timer commits a journal that stops receiving appends), so a crash loses at
+most the last uncommitted group. JournalReader maps the file read-only and scans
+records straight from the mapping without parsing or copying.
+"""
+from typing import Iterator, Mapping, NamedTuple, Union
+import mmap
+import os
+import struct
+import threading
+import time
+from .payment_batch import METHOD_CODES, method_code, parse_transaction_id, to_cents
+from .payment_factory import PaymentMethod
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+MAGIC = b"PAYJRNL1"
+HEADER = struct.Struct("<8sHHQ44x")
+RECORD = struct.Struct("<QqqqBB6x")
+FLAG_SUCCESS = 1
+
+# Same layout as RECORD, for zero-copy NumPy views
+NUMPY_DTYPE = (
+    [("transaction_id", "<u8"), ("amount_cents", "<i8"), ("commission_cents", "<i8"),
+     ("timestamp_ns", "<i8"), ("method", "u1"), ("flags", "u1"), ("padding", "V6")]
+)
+
+
+class JournalError(Exception):
+    """Raised when a journal file is missing, corrupt or of another format."""
+
+
+class JournalRecord(NamedTuple):
+    transaction_id: int
+    amount_cents: int
+    commission_cents: int
+    timestamp_ns: int
+    method: int
+    flags: int
+
+    @property
+    def payment_method(self) -> PaymentMethod:
+        return METHOD_CODES[self.method]
+
+    @property
+    def success(self) -> bool:
+        return bool(self.flags & FLAG_SUCCESS)
+
+
+def _read_header(buffer: Union[mmap.mmap, bytes]) -> int:
+    if len(buffer) < HEADER.size:
+        raise JournalError("Journal file is too short")
+    magic, _version, record_size, count = HEADER.unpack_from(buffer)
+    if magic != MAGIC or record_size != RECORD.size:
+        raise JournalError("Not a transaction journal")
+    return count
+
+
+class TransactionJournal:
+    def __init__(
+        self,
+        path: Union[str, os.PathLike[str]],
+        group_size: int = 1024,
+        group_interval: float = 0.05,
+        initial_capacity: int = 4096,
+    ):
+        if initial_capacity < 1:
+            raise ValueError("initial_capacity must be positive")
+        self.path = os.fspath(path)
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self._file = open(self.path, "a+b")
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, 1, RECORD.size, 0))
+            self._file.truncate(HEADER.size + initial_capacity * RECORD.size)
+            self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        try:
+            # Records past the committed count were never acknowledged: overwrite them
+            self.count = self._committed = _read_header(self._map)
+        except JournalError:
+            self._map.close()
+            self._file.close()
+            raise
+        self._capacity = (len(self._map) - HEADER.size) // RECORD.size
+        self._last_commit = time.monotonic()
+        self.commits = 0
+        # Appends may come from several threads, and the idle timer commits from its own
+        self._lock = threading.Lock()
+        self._timer: Union[threading.Timer, None] = None
+
+    def __enter__(self) -> "TransactionJournal":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _grow(self) -> None:
+        self._map.close()
+        # A journal file holding only its header has no room to double
+        self._capacity = max(1, self._capacity * 2)
+        self._file.truncate(HEADER.size + self._capacity * RECORD.size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def append_record(
+        self,
+        transaction_id: int,
+        amount_cents: int,
+        commission_cents: int = 0,
+        payment_method: Union[PaymentMethod, str] = PaymentMethod.CREDIT_CARD,
+        success: bool = True,
+        timestamp_ns: Union[int, None] = None,
+    ) -> None:
+        record = RECORD.pack(
+            transaction_id,
+            amount_cents,
+            commission_cents,
+            time.time_ns() if timestamp_ns is None else timestamp_ns,
+            method_code(payment_method),
+            FLAG_SUCCESS if success else 0,
+        )
+        with self._lock:
+            if self.count >= self._capacity:
+                self._grow()
+            offset = HEADER.size + self.count * RECORD.size
+            self._map[offset:offset + RECORD.size] = record
+            self.count += 1
+            if (
+                self.count - self._committed >= self.group_size
+                or time.monotonic() - self._last_commit >= self.group_interval
+            ):
+                self._commit()
+            elif self._timer is None:
+                # Without further appends nothing would commit these records: commit when idle
+                self._timer = threading.Timer(self.group_interval, self._commit_idle)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def append(self, payment_method: Union[PaymentMethod, str], result: Mapping[str, object]) -> None:
+        """Append a process_payment (or process_batch) result."""
+        transaction_id = result.get("transaction_id")
+        commission = result.get("commission")
+        self.append_record(
+            parse_transaction_id(transaction_id) if isinstance(transaction_id, str) else 0,
+            to_cents(result.get("amount", 0)),  # type: ignore
+            to_cents(commission) if commission is not None else 0,  # type: ignore
+            payment_method,
+            bool(result.get("success")),
+        )
+
+    def commit(self) -> None:
+        """Make every appended record durable, then publish them in the header."""
+        with self._lock:
+            self._commit()
+
+    def _commit(self) -> None:
+        if self.count == self._committed:
+            return
+        # The records must be on disk before a header that covers them, or a
+        # crash in between leaves the header pointing at garbage
+        start = (HEADER.size + self._committed * RECORD.size) // mmap.PAGESIZE * mmap.PAGESIZE
+        self._map.flush(start, HEADER.size + self.count * RECORD.size - start)
+        HEADER.pack_into(self._map, 0, MAGIC, 1, RECORD.size, self.count)
+        self._map.flush(0, HEADER.size)
+        self._committed = self.count
+        self._last_commit = time.monotonic()
+        self.commits += 1
+
+    def _commit_idle(self) -> None:
+        with self._lock:
+            self._timer = None
+            if not self._map.closed:
+                self._commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map.closed:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._commit()
+            self._map.close()
+            self._file.close()
+
+
+class JournalReader:
+    def __init__(self, path: Union[str, os.PathLike[str]]):
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.count = _read_header(self._map)
+            end = HEADER.size + self.count * RECORD.size
+            if end > len(self._map):
+                raise JournalError("Journal header points past the end of the file")
+        except JournalError:
+            self._map.close()
+            raise
+        self._records = memoryview(self._map)[HEADER.size:end]
+
+    def __enter__(self) -> "JournalReader":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> JournalRecord:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("journal record index out of range")
+        return JournalRecord(*RECORD.unpack_from(self._records, index * RECORD.size))
+
+    def __iter__(self) -> Iterator[JournalRecord]:
+        return self.scan()
+
+    def scan(self, start: int = 0, stop: Union[int, None] = None) -> Iterator[JournalRecord]:
+        stop = self.count if stop is None else min(stop, self.count)
+        for values in RECORD.iter_unpack(self._records[start * RECORD.size:stop * RECORD.size]):
+            yield JournalRecord(*values)
+
+    def transaction_ids(self) -> set[int]:
+        """IDs of every journaled payment, e.g. to skip them when resuming a batch."""
+        if np is not None:
+            return set(self.to_numpy()["transaction_id"].tolist())
+        return {values[0] for values in RECORD.iter_unpack(self._records)}
+
+    def to_numpy(self) -> "np.ndarray":
+        """
+        Structured array viewing the mapped records, without copying. The
+        array keeps the mapping exported: drop it before close(), which
+        raises BufferError while such views are alive.
+        """
+        if np is None:
+            raise RuntimeError("NumPy is required for to_numpy()")
+        return np.frombuffer(self._records, dtype=np.dtype(NUMPY_DTYPE))
+
+    def close(self) -> None:
+        """Unmap the file; raises BufferError while arrays from to_numpy() are alive."""
+        self._records.release()
+        self._map.close()
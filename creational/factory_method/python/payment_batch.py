@@ -0,0 +1,235 @@
+"""
+Columnar payment batches with integer-cents arithmetic.
+
+A PaymentBatch keeps one array per column instead of one dict per payment:
+amounts in integer cents, a one-byte PaymentMethod code, the numeric part of
+the transaction id and the commission in cents. The commission is the one a
+result was charged, or what the method's processor would charge (through its
+commission rules when it has them). Commissions are kept in fixed point, so
+totals are exact, and slicing a batch shares the underlying buffers.
+"""
+from array import array
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, Mapping, NamedTuple, Sequence, Union, overload
+from .payment_factory import MERCHANT_FIELD, PAYMENT_METHOD_FIELD, PaymentFactory, PaymentMethod
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+# Method codes stored in the method column: the position in PaymentMethod
+METHOD_CODES: tuple[PaymentMethod, ...] = tuple(PaymentMethod)
+_CODE_BY_METHOD = {method: code for code, method in enumerate(METHOD_CODES)}
+
+# Commission rates are fixed-point parts per million
+RATE_SCALE = 1_000_000
+_HALF_RATE = RATE_SCALE // 2
+_CENT = Decimal("0.01")
+
+
+class MethodTotals(NamedTuple):
+    count: int
+    amount_cents: int
+    commission_cents: int
+
+
+def to_cents(amount: Union[str, float, int, Decimal]) -> int:
+    """Convert an amount to integer cents, rounding half up on its decimal form."""
+    if isinstance(amount, int):
+        return amount * 100
+    return int(Decimal(str(amount)).quantize(_CENT, ROUND_HALF_UP) * 100)
+
+
+def rate_to_ppm(rate: float) -> int:
+    return round(rate * RATE_SCALE)
+
+
+def commission_cents(amount_cents: int, rate_ppm: int) -> int:
+    return (amount_cents * rate_ppm + _HALF_RATE) // RATE_SCALE
+
+
+def method_code(payment_method: Union[PaymentMethod, str]) -> int:
+    return _CODE_BY_METHOD[PaymentMethod(payment_method)]
+
+
+def default_rates() -> dict[PaymentMethod, int]:
+    """
+    Flat commission_rate of every registered built-in processor, in ppm.
+    Processors with commission_rules do not charge it; see
+    processor_commissions.
+    """
+    rates: dict[PaymentMethod, int] = {}
+    for method in METHOD_CODES:
+        try:
+            rates[method] = rate_to_ppm(PaymentFactory.create_payment_method(method).commission_rate)
+        except ValueError:
+            continue
+    return rates
+
+
+def processor_commissions(
+    payment_method: Union[PaymentMethod, str],
+    amounts_cents: Sequence[int],
+    merchants: Union[Sequence[Union[str, None]], None] = None,
+) -> list[int]:
+    """
+    Commissions in cents as the method's processor charges them: through its
+    commission_rules when set, else at its flat commission_rate.
+    """
+    try:
+        processor = PaymentFactory.create_payment_method(payment_method)
+    except ValueError:
+        return [0] * len(amounts_cents)
+    if processor.commission_rules is not None:
+        return processor.commission_rules.rules.commissions_cents(processor.provider, amounts_cents, merchants)
+    rate = rate_to_ppm(processor.commission_rate)
+    return [commission_cents(amount, rate) for amount in amounts_cents]
+
+
+def parse_transaction_id(transaction_id: str) -> int:
+    """Numeric part of a "<prefix>-<hex>" transaction id."""
+    return int(transaction_id.rpartition("-")[2], 16)
+
+
+class PaymentBatch:
+    __slots__ = ("amount_cents", "method_codes", "transaction_ids", "commission_cents")
+
+    def __init__(
+        self,
+        amount_cents: Union[array, memoryview],
+        method_codes: Union[array, memoryview],
+        transaction_ids: Union[array, memoryview],
+        commission_cents: Union[array, memoryview, None] = None,
+    ):
+        """Without `commission_cents` each payment gets its processor's commission."""
+        if commission_cents is None:
+            commission_cents = array("q", bytes(8 * len(amount_cents)))
+            _processor_commissions(amount_cents, method_codes, dict.fromkeys(range(len(amount_cents))), commission_cents)
+        if not len(amount_cents) == len(method_codes) == len(transaction_ids) == len(commission_cents):
+            raise ValueError("All columns of a PaymentBatch must have the same length")
+        self.amount_cents = memoryview(amount_cents)
+        self.method_codes = memoryview(method_codes)
+        self.transaction_ids = memoryview(transaction_ids)
+        self.commission_cents = memoryview(commission_cents)
+
+    @classmethod
+    def from_payments(cls, payments: Iterable[Mapping[str, object]]) -> "PaymentBatch":
+        """
+        Build a batch from payment or result dicts. The method is read from
+        PAYMENT_METHOD_FIELD and the transaction id, when present, from
+        "transaction_id". A result's "commission" is kept as charged; other
+        payments get their processor's commission for MERCHANT_FIELD.
+        """
+        amounts = array("q")
+        codes = array("B")
+        ids = array("Q")
+        fees = array("q")
+        merchants: dict[int, Union[str, None]] = {}
+        for data in payments:
+            amounts.append(to_cents(data.get("amount", 0)))  # type: ignore
+            codes.append(method_code(data[PAYMENT_METHOD_FIELD]))  # type: ignore
+            transaction_id = data.get("transaction_id")
+            ids.append(parse_transaction_id(transaction_id) if isinstance(transaction_id, str) else 0)
+            charged = data.get("commission")
+            if charged is None:
+                merchants[len(fees)] = data.get(MERCHANT_FIELD)  # type: ignore
+                fees.append(0)
+            else:
+                fees.append(to_cents(charged))  # type: ignore
+        if merchants:
+            _processor_commissions(amounts, codes, merchants, fees)
+        return cls(amounts, codes, ids, fees)
+
+    def __len__(self) -> int:
+        return len(self.amount_cents)
+
+    @overload
+    def __getitem__(self, index: int) -> dict[str, object]: ...
+    @overload
+    def __getitem__(self, index: slice) -> "PaymentBatch": ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[dict[str, object], "PaymentBatch"]:
+        if isinstance(index, slice):
+            if index.step not in (None, 1):
+                raise ValueError("PaymentBatch slices must be contiguous")
+            return PaymentBatch(
+                self.amount_cents[index], self.method_codes[index], self.transaction_ids[index], self.commission_cents[index]
+            )
+        return {
+            "amount_cents": self.amount_cents[index],
+            PAYMENT_METHOD_FIELD: METHOD_CODES[self.method_codes[index]],
+            "transaction_id": self.transaction_ids[index],
+        }
+
+    def commissions(self, rates: Union[Mapping[PaymentMethod, int], None] = None) -> array:
+        """
+        Commission of every payment in cents. Without `rates` this is the
+        commission_cents column; `rates` maps methods to flat ppm rates that
+        replace it, rounded half up.
+        """
+        if rates is None:
+            return array("q", self.commission_cents)
+        table = [rates.get(method, 0) for method in METHOD_CODES]
+        if np is not None and len(self):
+            amounts = np.frombuffer(self.amount_cents, dtype=np.int64)
+            codes = np.frombuffer(self.method_codes, dtype=np.uint8)
+            values = (amounts * np.asarray(table, dtype=np.int64)[codes] + _HALF_RATE) // RATE_SCALE
+            return array("q", values.tobytes())
+        return array(
+            "q",
+            [(amount * table[code] + _HALF_RATE) // RATE_SCALE for amount, code in zip(self.amount_cents, self.method_codes)],
+        )
+
+    def total_cents(self) -> int:
+        if np is not None and len(self):
+            return int(np.frombuffer(self.amount_cents, dtype=np.int64).sum())
+        return sum(self.amount_cents)
+
+    def totals(self, rates: Union[Mapping[PaymentMethod, int], None] = None) -> dict[PaymentMethod, MethodTotals]:
+        """Count, gross amount and commission per method, all exact integers."""
+        commissions = self.commissions(rates)
+        if np is not None and len(self):
+            codes = np.frombuffer(self.method_codes, dtype=np.uint8)
+            size = len(METHOD_CODES)
+            counts = np.bincount(codes, minlength=size)
+            amounts = _sum_by_code(np.frombuffer(self.amount_cents, dtype=np.int64), codes, size)
+            fees = _sum_by_code(np.frombuffer(commissions, dtype=np.int64), codes, size)
+            return {
+                METHOD_CODES[code]: MethodTotals(int(counts[code]), int(amounts[code]), int(fees[code]))
+                for code in range(size)
+                if counts[code]
+            }
+
+        counts = [0] * len(METHOD_CODES)
+        amounts = [0] * len(METHOD_CODES)
+        fees = [0] * len(METHOD_CODES)
+        for amount, code, fee in zip(self.amount_cents, self.method_codes, commissions):
+            counts[code] += 1
+            amounts[code] += amount
+            fees[code] += fee
+        return {
+            METHOD_CODES[code]: MethodTotals(counts[code], amounts[code], fees[code])
+            for code in range(len(METHOD_CODES))
+            if counts[code]
+        }
+
+
+def _processor_commissions(
+    amounts: Sequence[int], codes: Sequence[int], merchants: Mapping[int, Union[str, None]], fees: array
+) -> None:
+    # Fill fees at the indexes in `merchants` (index -> merchant) with one lookup per method
+    groups: dict[int, list[int]] = {}
+    for index in merchants:
+        groups.setdefault(codes[index], []).append(index)
+    for code, indexes in groups.items():
+        computed = processor_commissions(
+            METHOD_CODES[code], [amounts[index] for index in indexes], [merchants[index] for index in indexes]
+        )
+        for index, fee in zip(indexes, computed):
+            fees[index] = fee
+
+
+def _sum_by_code(values: "np.ndarray", codes: "np.ndarray", size: int) -> list[int]:
+    # np.bincount sums in float64, which is not exact for large cent amounts
+    return [int(values[codes == code].sum()) for code in range(size)]
@@ -1,12 +1,9 @@
 from enum import Enum
-from typing import Dict, Union
-from .payment_processors import (
-    CreditCardProcessor,
-    PayPalProcessor,
-    BankTransferProcessor,
-    DigitalWalletProcessor,
-    PaymentProcessor
-)
+from importlib import import_module, metadata
+from typing import TYPE_CHECKING, Dict, Iterable, Union
+
+if TYPE_CHECKING:
+    from .payment_processors import PaymentProcessor
 
 class PaymentMethod(Enum):
     CREDIT_CARD = "credit_card"
@@ -14,24 +11,135 @@ class PaymentMethod(Enum):
     BANK_TRANSFER = "bank_transfer"
     DIGITAL_WALLET = "digital_wallet"
 
+PAYMENT_METHOD_FIELD = "payment_method"
+
+# Payment field naming the merchant whose commission rules apply
+MERCHANT_FIELD = "merchant_id"
+
+# Third-party packages expose processors as "<method> = package.module:Class"
+ENTRY_POINT_GROUP = "design_patterns.payment_processors"
+
+MethodKey = Union[PaymentMethod, str]
+ProcessorSpec = Union["type[PaymentProcessor]", str]
+
 class PaymentFactory:
-    _platforms: Dict[PaymentMethod, type[PaymentProcessor]] = {
-        PaymentMethod.CREDIT_CARD: CreditCardProcessor,
-        PaymentMethod.PAYPAL: PayPalProcessor,
-        PaymentMethod.BANK_TRANSFER: BankTransferProcessor,
-        PaymentMethod.DIGITAL_WALLET: DigitalWalletProcessor
+    # Processor classes, or "module:Class" paths imported on first request
+    _platforms: Dict[MethodKey, ProcessorSpec] = {
+        PaymentMethod.CREDIT_CARD: ".payment_processors:CreditCardProcessor",
+        PaymentMethod.PAYPAL: ".payment_processors:PayPalProcessor",
+        PaymentMethod.BANK_TRANSFER: ".payment_processors:BankTransferProcessor",
+        PaymentMethod.DIGITAL_WALLET: ".payment_processors:DigitalWalletProcessor"
     }
+    _shared: Dict[MethodKey, bool] = {}
+    _instances: Dict[MethodKey, "PaymentProcessor"] = {}
+    _entry_points_loaded = False
+
+    @staticmethod
+    def _key(payment_method: MethodKey) -> MethodKey:
+        # Built-in methods are keyed by the enum, whether given as a member or its value
+        try:
+            return PaymentMethod(payment_method)
+        except ValueError:
+            return payment_method
+
+    @classmethod
+    def register(cls, payment_method: MethodKey, processor: ProcessorSpec, shared: Union[bool, None] = None) -> None:
+        """
+        Register a processor class (or a lazy "module:Class" path) for a method.
+        `shared` overrides the processor's own `shared` flag, which controls
+        whether one instance is reused across create_payment_method calls.
+        """
+        payment_method = cls._key(payment_method)
+        cls._platforms[payment_method] = processor
+        cls._instances.pop(payment_method, None)
+        if shared is None:
+            cls._shared.pop(payment_method, None)
+        else:
+            cls._shared[payment_method] = shared
+
+    @classmethod
+    def unregister(cls, payment_method: MethodKey) -> None:
+        payment_method = cls._key(payment_method)
+        cls._platforms.pop(payment_method, None)
+        cls._shared.pop(payment_method, None)
+        cls._instances.pop(payment_method, None)
+
+    @classmethod
+    def _load_entry_points(cls) -> None:
+        cls._entry_points_loaded = True
+        for entry_point in metadata.entry_points(group=ENTRY_POINT_GROUP):
+            cls._platforms.setdefault(cls._key(entry_point.name), entry_point.value)
 
     @classmethod
-    def create_payment_method(cls, payment_method: Union[PaymentMethod, str]) -> PaymentProcessor:
+    def _resolve_method(cls, payment_method: object) -> MethodKey:
+        if isinstance(payment_method, PaymentMethod):
+            return payment_method
+        try:
+            return PaymentMethod(payment_method)
+        except ValueError:
+            pass
         if isinstance(payment_method, str):
-            try:
-                payment_method = PaymentMethod(payment_method)
-            except ValueError:
-                raise ValueError(f"Invalid payment method: {payment_method}")
+            if payment_method not in cls._platforms and not cls._entry_points_loaded:
+                cls._load_entry_points()
+            if payment_method in cls._platforms:
+                return payment_method
+        raise ValueError(f"Invalid payment method: {payment_method}")
 
+    @classmethod
+    def _processor_class(cls, payment_method: MethodKey) -> "type[PaymentProcessor]":
         try:
-            return cls._platforms[payment_method]()
+            spec = cls._platforms[payment_method]
         except KeyError:
             raise ValueError(f"Payment processor not implemented for method: {payment_method}")
-        
\ No newline at end of file
+        if isinstance(spec, str):
+            module_name, _, class_name = spec.partition(":")
+            spec = getattr(import_module(module_name, __package__), class_name)
+            cls._platforms[payment_method] = spec
+        return spec
+
+    @classmethod
+    def create_payment_method(cls, payment_method: Union[PaymentMethod, str]) -> "PaymentProcessor":
+        payment_method = cls._resolve_method(payment_method)
+        instance = cls._instances.get(payment_method)
+        if instance is not None:
+            return instance
+
+        processor_class = cls._processor_class(payment_method)
+        instance = processor_class()
+        if cls._shared.get(payment_method, processor_class.shared):
+            instance = cls._instances.setdefault(payment_method, instance)
+        return instance
+
+    @classmethod
+    def process_batch(
+        cls, payments: Iterable[dict[str, str | float]]
+    ) -> list[dict[str, str | bool | float]]:
+        """
+        Process a stream of payments, each carrying its method under
+        PAYMENT_METHOD_FIELD. Records are grouped by method so every processor
+        runs a single batch, and results come back in input order.
+        """
+        results: list[dict[str, str | bool | float]] = []
+        groups: Dict[MethodKey, tuple[list[int], list[dict[str, str | float]]]] = {}
+        for data in payments:
+            index = len(results)
+            results.append({})
+            try:
+                method = cls._resolve_method(data.get(PAYMENT_METHOD_FIELD))
+            except ValueError as exc:
+                results[index] = {"success": False, "error": str(exc)}
+                continue
+            indexes, records = groups.setdefault(method, ([], []))
+            indexes.append(index)
+            records.append(data)
+
+        for method, (indexes, records) in groups.items():
+            try:
+                processor = cls.create_payment_method(method)
+            except ValueError as exc:
+                for index in indexes:
+                    results[index] = {"success": False, "error": str(exc)}
+                continue
+            for index, result in zip(indexes, processor.process_batch(records)):
+                results[index] = result
+        return results
@@ -1,83 +1,309 @@
-from abc import ABC, abstractmethod
+from abc import ABC
+from typing import TYPE_CHECKING, Callable, ClassVar, Iterable, Sequence, TextIO
+import asyncio
+import inspect
 import re
+from .commission_rules import MERCHANT_FIELD
+from .receipts import ReceiptTemplate, write_receipts
+from .transaction_ids import ContentHashIdGenerator, TransactionIdGenerator
+from .transport import GatewayTransport, PaymentDeclinedError, Response, TransportError
+from .validation import Check, ValidationReport, ValidationSchema, validate_batch
 
-class PaymentProcessor(ABC):
-    @abstractmethod
-    def validate_data(self, data: dict[str, str]) -> bool:
-        pass
+if TYPE_CHECKING:
+    from .async_payments import Gateway
+    from .commission_rules import CommissionRuleEngine
 
-    @abstractmethod
-    def calculate_commission(self, amount: float) -> float:
-        pass
-    
-    @abstractmethod
-    def process_payment(self, data: dict[str, str | float]) -> dict[str, str | bool | float]:
-        pass
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
 
-    @abstractmethod
-    def generate_receipt(self, data: dict[str, str | float]) -> str:
-        pass
+# Below this size the NumPy round-trip costs more than a plain list comprehension.
+_VECTORIZE_MIN_SIZE = 64
 
+# Phone number separators and accepted formats, see DigitalWalletProcessor
+_PHONE_SEPARATORS = re.compile(r'[\s\-\.\(\)]')
+_PHONE_NUMBER = re.compile(r'\+\d{10,15}|\d{10}')
 
+# Fields identifying the paying account, in lookup order
+ACCOUNT_FIELDS = ("card_number", "account_number", "wallet_id", "email")
+
+class PaymentProcessor(ABC):
+    commission_rate: ClassVar[float]
+    # Tiered or per-merchant fees; when set it replaces commission_rate
+    commission_rules: "CommissionRuleEngine | None" = None
+    # Stateless processors are reused by PaymentFactory; stateful ones set this to False
+    shared: ClassVar[bool] = True
+    transaction_prefix: ClassVar[str]
+    # Replace with a SnowflakeIdGenerator for unique, time-ordered IDs
+    id_generator: TransactionIdGenerator = ContentHashIdGenerator()
+    # Subclasses declare a schema, or override validate_data themselves
+    schema: ClassVar[ValidationSchema | None] = None
+    _check: ClassVar[Check | None] = None
+    # str.format template with {amount:.2f} and {transaction_id}, compiled per class
+    receipt_template: ClassVar[str]
+    _receipt: ClassVar[ReceiptTemplate]
+    # Provider name used by the transport; without a transport nothing is sent
+    provider: ClassVar[str]
+    transport: GatewayTransport | None = None
+
+    def __init_subclass__(cls, **kwargs: object) -> None:
+        super().__init_subclass__(**kwargs)
+        if "schema" in cls.__dict__ and cls.schema is not None:
+            cls._check = staticmethod(cls.schema.compile())  # type: ignore
+        if "receipt_template" in cls.__dict__:
+            cls._receipt = ReceiptTemplate(cls.receipt_template)
 
-class CreditCardProcessor(PaymentProcessor):
     def validate_data(self, data: dict[str, str]) -> bool:
-        required_fields = ["card_number", "expiry_date", "cvv"]
-        is_valid = all(field in data for field in required_fields)
-        cvv_is_valid = len(data.get("cvv")) >= 3 # type: ignore
-        return is_valid and cvv_is_valid
+        if self._check is None:
+            raise NotImplementedError(f"{type(self).__name__} must define a schema or override validate_data")
+        return self._check(data) is None
 
-    def calculate_commission(self, amount: float) -> float:
-        return amount * 0.03  # 3% commission
-    
-    def process_payment(self, data: dict[str, str | float]) -> dict[str, str | bool | float]:
-        return {
-            "success": True,
-            "transaction_id": "CC-" + str(hash(str(data))),
-            "amount": data.get("amount", 0.0)
-        }
+    def validation_check(self) -> Check:
+        """
+        Return a function giving the failure reason of a payment, or None if it is valid.
+        """
+        if self._check is not None and type(self).validate_data is PaymentProcessor.validate_data:
+            return self._check
+        validate = self.validate_data
+        return lambda data: None if validate(data) else "Invalid payment data"  # type: ignore
 
-    def generate_receipt(self, data: dict[str, str | float]) -> str:
-        return f"Credit Card Payment Receipt\nAmount: {"%.2f" % round(float(data.get('amount', 0.00)), 2)} \nTransaction ID: {data.get('transaction_id', 'N/A')}"
+    def validate_batch(self, payments: Iterable[dict[str, str]]) -> ValidationReport:
+        return validate_batch(self.validation_check(), payments)
 
-class PayPalProcessor(PaymentProcessor):
-    def validate_data(self, data: dict[str, str]) -> bool:
-        required_fields = ["email", "password"]
-        return all(field in data for field in required_fields)
+    def calculate_commission(self, amount: float, merchant: str | None = None) -> float:
+        if self.commission_rules is not None:
+            return self.commission_rules.commission(self.provider, amount, merchant)
+        return amount * self.commission_rate
 
-    def calculate_commission(self, amount: float) -> float:
-        return amount * 0.02  # 2% commission
+    def calculate_commissions(
+        self, amounts: Sequence[float], merchants: Sequence[str | None] | None = None
+    ) -> list[float]:
+        """
+        Compute the commission of many amounts in a single pass.
+        Uses NumPy when it is installed and the batch is large enough.
+        """
+        if self.commission_rules is not None:
+            return self.commission_rules.commissions(self.provider, amounts, merchants)
+        if np is not None and len(amounts) >= _VECTORIZE_MIN_SIZE:
+            return (np.asarray(amounts, dtype=np.float64) * self.commission_rate).tolist()
+        rate = self.commission_rate
+        return [amount * rate for amount in amounts]
     
-    def process_payment(self, data: dict[str, str | float]) -> dict[str, str | bool | float]:
-        return {
-            "success": True,
-            "transaction_id": "PP-" + str(hash(str(data))),
-            "amount": data.get("amount", 0.0)
-        }
+    def new_transaction_id(self, data: dict[str, str | float]) -> str:
+        return self.id_generator.next_id(self.transaction_prefix, data)
 
-    def generate_receipt(self, data: dict[str, str | float]) -> str:
-        return f"PayPal Payment Receipt\nAmount: {"%.2f" % round(float(data.get('amount', 0.00)), 2)}\nTransaction ID: {data.get('transaction_id', 'N/A')}"
+    def authorize(self, data: dict[str, str | float]) -> str | None:
+        """
+        Authorize the payment with the provider and return the authorization
+        code, or None without a transport. Raises PaymentDeclinedError or
+        TransportError.
+        """
+        if self.transport is None:
+            return None
+        return _authorization(self.transport.send(self.provider, _charge_request(data)))
 
-class BankTransferProcessor(PaymentProcessor):
-    def validate_data(self, data: dict[str, str]) -> bool:
-        required_fields = ["account_number", "routing_number", "account_holder"]
-        present_data = all(field in data for field in required_fields)
-        account_number_is_valid = len(data.get("account_number", "")) > 9
-        return present_data and account_number_is_valid
-    def calculate_commission(self, amount: float) -> float:
-        return amount * 0.01  # 1% commission
-    
-    def process_payment(self, data: dict[str, str | float]) -> dict[str, str | bool | float]:
-        return {
+    def _authorize_result(
+        self, data: dict[str, str | float], authorization: str | None
+    ) -> tuple[str | None, dict[str, str | bool | float] | None]:
+        # (authorization code, None), or (None, failed result) when the provider declines or is unreachable.
+        # A code passed in was obtained by process_batch and is not sent again.
+        if authorization is not None:
+            return authorization, None
+        try:
+            return self.authorize(data), None
+        except PaymentDeclinedError as exc:
+            return None, {"success": False, "error": str(exc), "amount": data.get("amount", 0.0)}
+        except TransportError as exc:
+            return None, {"success": False, "error": str(exc), "amount": data.get("amount", 0.0), "retryable": True}
+
+    def process_payment(
+        self, data: dict[str, str | float], authorization: str | None = None
+    ) -> dict[str, str | bool | float]:
+        """
+        `authorization` is a code the caller already obtained for this payment
+        (process_batch authorizes whole batches at once); without it the
+        payment is authorized here when a transport is set. A failed result
+        has "retryable": True when the provider could not be reached, as
+        opposed to a decline.
+        """
+        authorization, failed = self._authorize_result(data, authorization)
+        if failed is not None:
+            return failed
+        result: dict[str, str | bool | float] = {
             "success": True,
-            "transaction_id": "BT-" + str(hash(str(data))),
+            "transaction_id": self.new_transaction_id(data),
             "amount": data.get("amount", 0.0)
         }
+        if authorization is not None:
+            result["authorization"] = authorization
+        return result
+
+    async def process_payment_async(
+        self, data: dict[str, str | float], gateway: "Gateway | None" = None
+    ) -> dict[str, str | bool | float]:
+        """
+        Async counterpart of process_payment: awaits the gateway round-trip
+        (if any) without blocking the event loop, then builds the result.
+        With a transport, the blocking authorization runs in a worker thread.
+        """
+        if gateway is not None:
+            await gateway.charge(self, data)
+        if self.transport is not None:
+            return await asyncio.to_thread(self.process_payment, data)
+        return self.process_payment(data)
 
     def generate_receipt(self, data: dict[str, str | float]) -> str:
-        return f"Bank Transfer Receipt\nAmount: {"%.2f" % round(float(data.get('amount', 0.00)), 2)}\nTransaction ID: {data.get('transaction_id', 'N/A')}"
+        return self._receipt.render(data)
+
+    def write_receipts(
+        self,
+        payments: Iterable[dict[str, str | float]],
+        fileobj: TextIO,
+        format: str = "text",
+        chunk_size: int = 1024,
+    ) -> int:
+        """
+        Stream receipts for many payments into a text file object, as plain
+        text, CSV or JSONL. Returns the number of receipts written.
+        """
+        return write_receipts(self._receipt, payments, fileobj, format, chunk_size)
+
+    def process_batch(self, payments: Iterable[dict[str, str | float]]) -> list[dict[str, str | bool | float]]:
+        """
+        Validate, process and generate receipts for many payments of this method.
+        Results keep the input order; a failing record yields
+        {"success": False, "error": ...} instead of aborting the batch, with
+        "retryable": True when the provider could not be reached.
+        """
+        check = self.validation_check()
+        process = self.process_payment
+        receipt = self.generate_receipt
+        # An override keeping the one-argument process_payment(data) authorizes
+        # (if at all) by itself, so the batch must not charge ahead of it
+        batch_authorize = _takes_authorization(process)
+
+        results: list[dict[str, str | bool | float]] = []
+        accepted: list[tuple[int, dict[str, str | float]]] = []
+        amounts: list[float] = []
+        for data in payments:
+            try:
+                reason = check(data)
+                if reason is not None:
+                    results.append({"success": False, "error": reason})
+                    continue
+                amounts.append(float(data.get("amount", 0.0)))
+            except (TypeError, ValueError) as exc:
+                results.append({"success": False, "error": f"Invalid payment data: {exc}"})
+                continue
+            accepted.append((len(results), data))
+            results.append({})
+
+        merchants = None
+        if self.commission_rules is not None:
+            merchants = [data.get(MERCHANT_FIELD) for _, data in accepted]
+        commissions = self.calculate_commissions(amounts, merchants)  # type: ignore
+        if batch_authorize:
+            authorized = self._authorize_many([data for _, data in accepted])
+        else:
+            authorized = [None] * len(accepted)
+        for (index, data), amount, commission, authorization in zip(accepted, amounts, commissions, authorized):
+            try:
+                if isinstance(authorization, Exception):
+                    raise authorization
+                result = process(data, authorization) if batch_authorize else process(data)
+                if not result.get("success"):
+                    results[index] = result
+                    continue
+                result["commission"] = commission
+                result["receipt"] = receipt({**data, **result, "amount": amount})
+            except TransportError as exc:
+                result = {"success": False, "error": str(exc), "retryable": True}
+            except Exception as exc:
+                result = {"success": False, "error": str(exc)}
+            results[index] = result
+        return results
+
+    def _authorize_many(self, payments: list[dict[str, str | float]]) -> list[str | Exception | None]:
+        # One pipelined (or batched) round-trip for the whole batch instead of one per payment
+        if self.transport is None or not payments:
+            return [None] * len(payments)
+        try:
+            responses = self.transport.send_many(self.provider, [_charge_request(data) for data in payments])
+        except Exception as exc:
+            return [exc] * len(payments)
+        authorizations: list[str | Exception | None] = []
+        for response in responses:
+            # Payments answered before a transport failure keep their authorization
+            if isinstance(response, TransportError):
+                authorizations.append(response)
+                continue
+            try:
+                authorizations.append(_authorization(response))
+            except PaymentDeclinedError as exc:
+                authorizations.append(exc)
+        return authorizations
+
+
+def _takes_authorization(process_payment: Callable[..., object]) -> bool:
+    if getattr(process_payment, "__func__", None) is PaymentProcessor.process_payment:
+        return True
+    try:
+        parameters = inspect.signature(process_payment).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.name == "authorization" or p.kind is p.VAR_POSITIONAL for p in parameters)
+
+
+def _charge_request(data: dict[str, str | float]) -> dict[str, str | float]:
+    return {"op": "charge", "amount": float(data.get("amount", 0.0))}
+
+
+def _authorization(response: Response) -> str:
+    if not response.get("approved"):
+        raise PaymentDeclinedError(f"Payment declined: {response.get('reason', 'no reason given')}")
+    return str(response.get("authorization", ""))
+
+
+
+class CreditCardProcessor(PaymentProcessor):
+    commission_rate = 0.03  # 3% commission
+    transaction_prefix = "CC"
+    provider = "credit_card"
+    receipt_template = "Credit Card Payment Receipt\nAmount: {amount:.2f} \nTransaction ID: {transaction_id}"
+    schema = ValidationSchema(
+        required=("card_number", "expiry_date", "cvv"),
+        min_length={"cvv": 3},
+    )
+
+class PayPalProcessor(PaymentProcessor):
+    commission_rate = 0.02  # 2% commission
+    transaction_prefix = "PP"
+    provider = "paypal"
+    receipt_template = "PayPal Payment Receipt\nAmount: {amount:.2f}\nTransaction ID: {transaction_id}"
+    schema = ValidationSchema(required=("email", "password"))
+
+class BankTransferProcessor(PaymentProcessor):
+    commission_rate = 0.01  # 1% commission
+    transaction_prefix = "BT"
+    provider = "bank_transfer"
+    receipt_template = "Bank Transfer Receipt\nAmount: {amount:.2f}\nTransaction ID: {transaction_id}"
+    schema = ValidationSchema(
+        required=("account_number", "routing_number", "account_holder"),
+        min_length={"account_number": 10},
+    )
 
 class DigitalWalletProcessor(PaymentProcessor):
+    commission_rate = 0.015  # 1.5% commission
+    transaction_prefix = "DW"
+    provider = "digital_wallet"
+    receipt_template = "Digital Wallet Payment Receipt\nAmount: {amount:.2f}\nTransaction ID: {transaction_id}"
+    schema = ValidationSchema(
+        required=("wallet_id", "phone_number"),
+        patterns={"phone_number": _PHONE_NUMBER},
+        strip={"phone_number": _PHONE_SEPARATORS},
+    )
+
     def _validate_phone_number(self, phone: str) -> bool:
         """
         Validate phone number format.
@@ -86,36 +312,6 @@ class DigitalWalletProcessor(PaymentProcessor):
         - National: (234) 567-8900, 234-567-8900, 234.567.8900
         - Simple: 2345678900
         """
-        # Remove any spaces, dashes, dots, or parentheses
-        phone = re.sub(r'[\s\-\.\(\)]', '', phone)
-        
-        # Check if it's an international number (starts with +)
-        if phone.startswith('+'):
-            # International format: +1-234-567-8900 (10-15 digits after +)
-            pattern = r'^\+\d{10,15}$'
-        else:
-            # National format: (234) 567-8900 (10 digits)
-            pattern = r'^\d{10}$'
-        
-        return bool(re.match(pattern, phone))
-
-    def validate_data(self, data: dict[str, str]) -> bool:
-        required_fields = ["wallet_id", "phone_number"]
-        if not all(field in data for field in required_fields):
-            return False
-        
-        # Validate phone number format
-        return self._validate_phone_number(data["phone_number"])
-
-    def calculate_commission(self, amount: float) -> float:
-        return amount * 0.015  # 1.5% commission
-    
-    def process_payment(self, data: dict[str, str | float]) -> dict[str, str | bool | float]:
-        return {
-            "success": True,
-            "transaction_id": "DW-" + str(hash(str(data))),
-            "amount": data.get("amount", 0.0)
-        }
-
-    def generate_receipt(self, data: dict[str, str | float]) -> str:
-        return f"Digital Wallet Payment Receipt\nAmount: {"%.2f" % round(float(data.get('amount', 0.00)), 2)}\nTransaction ID: {data.get('transaction_id', 'N/A')}"
\ No newline at end of file
+        # Remove any spaces, dashes, dots, or parentheses, then accept either
+        # +<10-15 digits> (international) or exactly 10 digits (national)
+        return _PHONE_NUMBER.fullmatch(_PHONE_SEPARATORS.sub('', phone)) is not None
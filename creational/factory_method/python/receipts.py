@@ -0,0 +1,113 @@
+"""
+Precompiled receipt templates and streaming bulk receipt writers.
+
+Templates use str.format syntax, e.g. "Amount: {amount:.2f}", and are
+compiled once into a %-style pattern so rendering is a single interpolation.
+"""
+from string import Formatter
+from typing import Any, Callable, Iterable, Mapping, TextIO
+import csv
+import json
+import re
+
+RECEIPT_FORMATS = ("text", "csv", "jsonl")
+
+# Missing fields render as "N/A", except the ones listed here
+_FIELD_DEFAULTS: dict[str, Any] = {"amount": 0.0}
+
+# Format specs that have an equivalent %-style conversion
+_PERCENT_SPEC = re.compile(r"[-+ 0#]*\d*(?:\.\d+)?[eEfFgG]")
+
+
+class ReceiptTemplate:
+    def __init__(self, template: str):
+        self.template = template
+        self.title = template.split("\n", 1)[0]
+        pattern: list[str] = []
+        field_patterns: list[str] = []
+        fields: list[tuple[str, Any, Callable[[Any], Any]]] = []
+        for literal, name, spec, _ in Formatter().parse(template):
+            pattern.append(literal.replace("%", "%%"))
+            if name is None:
+                continue
+            default = _FIELD_DEFAULTS.get(name, "N/A")
+            if spec and _PERCENT_SPEC.fullmatch(spec):
+                field_patterns.append(f"%{spec}")
+                fields.append((name, default, float))
+            elif spec:
+                field_patterns.append("%s")
+                fields.append((name, default, lambda value, spec=spec: format(value, spec)))
+            else:
+                field_patterns.append("%s")
+                fields.append((name, default, str))
+            pattern.append(field_patterns[-1])
+        self.fields = tuple(name for name, _, _ in fields)
+        self._pattern = "".join(pattern)
+        self._fields = tuple(fields)
+        self._field_patterns = tuple(field_patterns)
+
+    def values(self, data: Mapping[str, Any]) -> tuple[Any, ...]:
+        get = data.get
+        return tuple([convert(get(name, default)) for name, default, convert in self._fields])
+
+    def formatted_values(self, data: Mapping[str, Any]) -> tuple[str, ...]:
+        return tuple(pattern % value for pattern, value in zip(self._field_patterns, self.values(data)))
+
+    def render(self, data: Mapping[str, Any]) -> str:
+        return self._pattern % self.values(data)
+
+
+def write_receipts(
+    template: ReceiptTemplate,
+    payments: Iterable[Mapping[str, Any]],
+    fileobj: TextIO,
+    format: str = "text",
+    chunk_size: int = 1024,
+) -> int:
+    """
+    Render receipts for `payments` into `fileobj` and return how many were written.
+
+    - text: rendered receipts separated by a blank line
+    - csv: a header row, then one row per receipt with the formatted template fields
+    - jsonl: one JSON object per line with the template fields
+
+    Output is written in chunks of `chunk_size` receipts, so memory use does
+    not depend on the number of payments.
+    """
+    if format not in RECEIPT_FORMATS:
+        raise ValueError(f"Invalid receipt format: {format}")
+
+    count = 0
+    if format == "csv":
+        writer = csv.writer(fileobj)
+        writer.writerow(("receipt", *template.fields))
+        values = template.formatted_values
+        rows: list[tuple[Any, ...]] = []
+        for data in payments:
+            rows.append((template.title, *values(data)))
+            if len(rows) >= chunk_size:
+                writer.writerows(rows)
+                count += len(rows)
+                rows.clear()
+        writer.writerows(rows)
+        return count + len(rows)
+
+    if format == "text":
+        render = template.render
+        encode: Callable[[Mapping[str, Any]], str] = lambda data: render(data) + "\n\n"
+    else:
+        names = ("receipt", *template.fields)
+        values = template.values
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        title = template.title
+        encode = lambda data: dumps(dict(zip(names, (title, *values(data))))) + "\n"
+
+    chunk: list[str] = []
+    for data in payments:
+        chunk.append(encode(data))
+        if len(chunk) >= chunk_size:
+            fileobj.write("".join(chunk))
+            count += len(chunk)
+            chunk.clear()
+    fileobj.write("".join(chunk))
+    return count + len(chunk)
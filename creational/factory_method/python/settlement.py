@@ -0,0 +1,98 @@
+"""
+Incremental settlement totals per payment method.
+
+SettlementAggregator keeps exact integer-cent totals (count, gross amount,
+commission) that are updated as each payment completes, so end-of-day
+reconciliation reads O(methods) values instead of re-scanning every result.
+
+Each writer thread accumulates into its own partial table, replacing whole
+MethodTotals tuples, so recording never takes a lock and a snapshot can copy
+the partials while writers keep going. Snapshots are plain dicts that can be
+merged across shards or processes.
+"""
+from typing import Iterable, Mapping, Union
+import threading
+from .payment_batch import MethodTotals, PaymentBatch, commission_cents, processor_commissions, to_cents
+from .payment_factory import MERCHANT_FIELD, PaymentMethod
+
+Totals = dict[PaymentMethod, MethodTotals]
+
+_EMPTY = MethodTotals(0, 0, 0)
+
+
+def merge_totals(*snapshots: Mapping[PaymentMethod, MethodTotals]) -> Totals:
+    merged: Totals = {}
+    for snapshot in snapshots:
+        for method, totals in snapshot.items():
+            count, amount, commission = merged.get(method, _EMPTY)
+            merged[method] = MethodTotals(
+                count + totals.count, amount + totals.amount_cents, commission + totals.commission_cents
+            )
+    return merged
+
+
+class SettlementAggregator:
+    def __init__(self, rates: Union[Mapping[PaymentMethod, int], None] = None):
+        # Flat commission rates in ppm for results without a charged commission;
+        # by default those get what their processor charges (commission rules included)
+        self.rates = None if rates is None else dict(rates)
+        self._local = threading.local()
+        self._partials: list[Totals] = []
+        self._register_lock = threading.Lock()
+
+    def _partial(self) -> Totals:
+        partial: Union[Totals, None] = getattr(self._local, "totals", None)
+        if partial is None:
+            partial = self._local.totals = {}
+            with self._register_lock:
+                self._partials.append(partial)
+        return partial
+
+    def add(self, payment_method: Union[PaymentMethod, str], count: int, amount_cents: int, commission: int) -> None:
+        """Add pre-computed totals for one method."""
+        method = PaymentMethod(payment_method)
+        partial = self._partial()
+        previous = partial.get(method, _EMPTY)
+        partial[method] = MethodTotals(
+            previous.count + count, previous.amount_cents + amount_cents, previous.commission_cents + commission
+        )
+
+    def record(self, payment_method: Union[PaymentMethod, str], result: Mapping[str, object]) -> None:
+        """
+        Record one result of process_payment; unsuccessful results are ignored.
+        The commission the processor charged is used, so tiered and
+        per-merchant fees settle as charged; results without one get the
+        processor's commission, or the flat rate when `rates` were given.
+        """
+        if not result.get("success"):
+            return
+        method = PaymentMethod(payment_method)
+        amount = to_cents(result.get("amount", 0))  # type: ignore
+        charged = result.get("commission")
+        if charged is None and self.rates is None:
+            commission = processor_commissions(method, [amount], [result.get(MERCHANT_FIELD)])[0]  # type: ignore
+        elif charged is None:
+            commission = commission_cents(amount, self.rates.get(method, 0))
+        else:
+            commission = to_cents(charged)  # type: ignore
+        self.add(method, 1, amount, commission)
+
+    def record_many(self, completed: Iterable[tuple[Union[PaymentMethod, str], Mapping[str, object]]]) -> None:
+        for payment_method, result in completed:
+            self.record(payment_method, result)
+
+    def record_batch(self, batch: PaymentBatch) -> None:
+        """Add a batch's totals; its commission column already holds what was charged."""
+        for method, totals in batch.totals().items():
+            self.add(method, *totals)
+
+    def merge(self, snapshot: Mapping[PaymentMethod, MethodTotals]) -> None:
+        """Fold in totals from another aggregator, shard or process."""
+        for method, totals in snapshot.items():
+            self.add(method, *totals)
+
+    def snapshot(self) -> Totals:
+        with self._register_lock:
+            partials = list(self._partials)
+        # dict.copy is atomic, so each partial is copied in a consistent state
+        return merge_totals(*(partial.copy() for partial in partials))
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from .async_payments import AsyncPaymentRunner, FakeGateway, GatewayError
+from .payment_processors import PayPalProcessor
+from .transport import GatewayTransport
+
+
+def paypal_payment(amount: float) -> dict[str, str | float]:
+    return {"payment_method": "paypal", "email": "test@example.com", "password": "secret", "amount": amount}
+
+
+class TestProcessPaymentAsync:
+    def test_without_gateway_matches_sync_result(self):
+        """Test that the async counterpart returns the same result as process_payment"""
+        processor = PayPalProcessor()
+        data = paypal_payment(10.0)
+        assert asyncio.run(processor.process_payment_async(data)) == processor.process_payment(data)
+
+    def test_gateway_failure_is_raised(self):
+        """Test that a failing gateway raises GatewayError"""
+        processor = PayPalProcessor()
+        gateway = FakeGateway(failure_rate=1.0)
+        try:
+            asyncio.run(processor.process_payment_async(paypal_payment(10.0), gateway))
+        except GatewayError:
+            pass
+        else:
+            raise AssertionError("GatewayError not raised")
+
+
+class TestAsyncPaymentRunner:
+    def test_results_in_input_order_with_errors(self):
+        """Test that run returns results in input order, including invalid records"""
+        payments = [paypal_payment(1.0), {"payment_method": "bitcoin"}, {"payment_method": "paypal"}, paypal_payment(3.0)]
+        results = asyncio.run(AsyncPaymentRunner(FakeGateway()).run(payments))
+        assert [result["success"] for result in results] == [True, False, False, True]
+        assert results[3]["amount"] == 3.0
+        assert "3.00" in results[3]["receipt"]  # type: ignore
+        assert results[1]["error"] == "Invalid payment method: bitcoin"
+
+    def test_concurrency_limit_is_respected(self):
+        """Test that no more than `concurrency` gateway calls are in flight"""
+        gateway = FakeGateway(latency=0.001)
+        runner = AsyncPaymentRunner(gateway, concurrency=50)
+        results = asyncio.run(runner.run(paypal_payment(float(i)) for i in range(500)))
+        assert all(result["success"] for result in results)
+        assert gateway.max_in_flight == 50
+
+    def test_payments_run_concurrently(self):
+        """Test that thousands of slow payments overlap instead of running one at a time"""
+        gateway = FakeGateway(latency=0.05)
+        runner = AsyncPaymentRunner(gateway, concurrency=2000)
+        loop = asyncio.new_event_loop()
+        try:
+            start = loop.time()
+            results = loop.run_until_complete(runner.run([paypal_payment(1.0)] * 2000))
+            elapsed = loop.time() - start
+        finally:
+            loop.close()
+        assert len(results) == 2000
+        assert elapsed < 2.0
+
+    def test_retries_and_timeouts(self):
+        """Test that failures are retried and timeouts are reported"""
+        flaky = FakeGateway(failure_rate=0.5, seed=7)
+        results = asyncio.run(AsyncPaymentRunner(flaky, retries=10).run([paypal_payment(1.0)] * 100))
+        assert all(result["success"] for result in results)
+        assert flaky.failures > 0
+        assert max(result["attempts"] for result in results) > 1  # type: ignore
+
+        slow = FakeGateway(latency=0.5)
+        runner = AsyncPaymentRunner(slow, timeout=0.01, retries=1)
+        result = asyncio.run(runner.run([paypal_payment(1.0)]))[0]
+        assert result == {"success": False, "error": "Gateway timed out", "attempts": 2}
+
+    def test_failing_record_does_not_abort_run(self):
+        """Test that an unexpected error in one payment becomes a failed result"""
+        payments = [paypal_payment(1.0), {**paypal_payment(1.0), "amount": "abc"}, paypal_payment(2.0)]
+        results = asyncio.run(AsyncPaymentRunner(FakeGateway()).run(payments))
+        assert [result["success"] for result in results] == [True, False, True]
+        assert results[1]["error"].startswith("Invalid payment data")  # type: ignore
+
+    def test_processor_error_does_not_abort_run(self, monkeypatch):
+        """Test that an exception raised while processing is reported per record"""
+        def broken(self, data, authorization=None):
+            raise RuntimeError("processor crashed")
+
+        monkeypatch.setattr(PayPalProcessor, "process_payment", broken)
+        results = asyncio.run(AsyncPaymentRunner().run([paypal_payment(1.0), paypal_payment(2.0)]))
+        assert results == [{"success": False, "error": "processor crashed", "attempts": 1}] * 2
+
+    def test_timed_out_transport_charge_is_not_retried(self, monkeypatch):
+        """Test that a charge still running in its worker thread is not sent again"""
+        class SlowTransport(GatewayTransport):
+            sends = 0
+
+            def send(self, provider, request):
+                self.sends += 1
+                time.sleep(0.2)
+                return {"approved": True, "authorization": "AUTH-1"}
+
+        transport = SlowTransport()
+        monkeypatch.setattr(PayPalProcessor, "transport", transport)
+        result = asyncio.run(AsyncPaymentRunner(timeout=0.02, retries=3).run([paypal_payment(1.0)]))[0]
+        assert result["success"] is False and result["attempts"] == 1
+        assert transport.sends == 1
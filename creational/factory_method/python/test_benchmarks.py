@@ -0,0 +1,50 @@
+import json
+from .benchmarks import benchmarks, compare, main, make_payload, run
+from .payment_factory import PaymentMethod
+
+
+def report(**metrics: float) -> dict[str, object]:
+    return {"meta": {}, "results": {name: {"ns_per_op": value} for name, value in metrics.items()}}
+
+
+class TestBenchmarkSuite:
+    def test_payload_sizes(self):
+        """Test that payloads grow with the requested size and stay valid"""
+        small = make_payload(PaymentMethod.PAYPAL, "small")
+        large = make_payload(PaymentMethod.PAYPAL, "large")
+        assert len(large) - len(small) == 200
+
+    def test_every_benchmark_runs(self):
+        """Test that every benchmark callable runs without errors"""
+        names = set()
+        for name, function, per_call in benchmarks():
+            function()
+            assert per_call >= 1
+            names.add(name)
+        assert "process_batch/paypal/large" in names
+        assert "factory_process_batch/mixed" in names
+
+    def test_run_output_is_json(self):
+        """Test that a filtered run produces machine-readable results"""
+        results = run("validate_data/paypal/small", min_time=0.001, repeat=1)
+        assert list(results["results"]) == ["validate_data/paypal/small"]
+        assert results["results"]["validate_data/paypal/small"]["ns_per_op"] > 0
+        json.dumps(results)
+
+
+class TestCompare:
+    def test_regressions_past_threshold(self):
+        """Test that only metrics slower than the threshold are reported"""
+        baseline = report(a=100.0, b=100.0, c=100.0, gone=1.0)
+        current = report(a=105.0, b=130.0, c=50.0)
+        regressions = compare(baseline, current, threshold=0.1)
+        assert [(name, round(change, 2)) for name, _, _, change in regressions] == [("b", 0.3)]
+
+    def test_compare_command_exit_status(self, tmp_path):
+        """Test that the compare command fails on regressions"""
+        baseline = tmp_path / "baseline.json"
+        current = tmp_path / "current.json"
+        baseline.write_text(json.dumps(report(a=100.0)))
+        current.write_text(json.dumps(report(a=150.0)))
+        assert main(["compare", str(baseline), str(current), "--threshold", "0.2"]) == 1
+        assert main(["compare", str(baseline), str(current), "--threshold", "0.6"]) == 0
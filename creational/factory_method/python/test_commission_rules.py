@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import pytest
+from .async_payments import AsyncPaymentRunner
+from .commission_rules import CommissionRuleEngine, CommissionTable, RuleSet
+from .payment_factory import PaymentMethod
+from .payment_processors import CreditCardProcessor, PayPalProcessor
+
+CARD = {"card_number": "4111111111111111", "expiry_date": "12/25", "cvv": "123", "amount": 100.00}
+
+CONFIG = {
+    "methods": {
+        "credit_card": {
+            "tiers": [{"from": 0, "rate": 0.029, "fixed": 0.30}, {"from": 1000, "rate": 0.02}],
+            "min": 0.50,
+            "cap": 25.00,
+        }
+    },
+    "merchants": {"acme": {"credit_card": {"tiers": [{"from": 0, "rate": 0.01}]}}},
+}
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "commission_rules.json"
+    path.write_text(json.dumps(CONFIG))
+    return path
+
+
+def _rewrite(path, config):
+    path.write_text(json.dumps(config))
+    stat = os.stat(path)
+    # Make sure the change is visible even on filesystems with coarse mtimes
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestCommissionTable:
+    def test_tiers_min_and_cap(self):
+        """Test that the tier, fixed fee, minimum and cap are applied in cents"""
+        table = CommissionTable.from_rule(CONFIG["methods"]["credit_card"])
+        assert table.commission_cents(500) == 50  # 0.145 + 0.30 raised to the minimum
+        assert table.commission_cents(10_000) == 320  # 2.90 + 0.30
+        assert table.commission_cents(100_000) == 2000  # second tier
+        assert table.commission_cents(5_000_000) == 2500  # capped
+
+    def test_vectorized_matches_scalar(self):
+        """Test that batch lookups give the same fees as single lookups"""
+        table = CommissionTable.from_rule(CONFIG["methods"]["credit_card"])
+        amounts = list(range(0, 2_000_000, 997))
+        assert table.commissions_cents(amounts) == [table.commission_cents(amount) for amount in amounts]
+
+    def test_negative_amounts_use_first_tier(self):
+        """Test that amounts below every breakpoint use the first tier, not the last"""
+        table = CommissionTable([0, 100_000], [29_000, 20_000], [30, 0])
+        first_tier = CommissionTable([0], [29_000], [30])
+        amounts = list(range(-200_000, 0, 997))
+        expected = [first_tier.commission_cents(amount) for amount in amounts]
+        assert [table.commission_cents(amount) for amount in amounts] == expected
+        assert table.commissions_cents(amounts) == expected
+
+    def test_invalid_breakpoints(self):
+        """Test that unsorted or duplicate tiers are rejected"""
+        with pytest.raises(ValueError):
+            CommissionTable([0, 0], [1, 2], [0, 0])
+
+
+class TestRuleSet:
+    def test_merchant_overrides_method(self):
+        """Test that merchant rules take precedence and other methods keep their rate"""
+        rules = RuleSet.from_config(CONFIG)
+        assert rules.commission_cents(PaymentMethod.CREDIT_CARD, 10_000, "acme") == 100
+        assert rules.commission_cents("credit_card", 10_000, "other") == 320
+        assert rules.commission_cents(PaymentMethod.PAYPAL, 10_000) == 200
+
+    def test_mixed_merchants_batch(self):
+        """Test that batch lookups keep input order across merchants"""
+        rules = RuleSet.from_config(CONFIG)
+        fees = rules.commissions_cents("credit_card", [10_000, 10_000, 10_000], ["acme", None, "acme"])
+        assert fees == [100, 320, 100]
+
+
+class TestCommissionRuleEngine:
+    def test_hot_reload(self, config_path, clock):
+        """Test that a changed file is recompiled after the check interval"""
+        engine = CommissionRuleEngine(config_path, check_interval=1.0, clock=clock)
+        assert engine.commission("credit_card", 100.0) == 3.2
+        _rewrite(config_path, {"methods": {"credit_card": {"tiers": [{"from": 0, "rate": 0.05}]}}})
+        assert engine.commission("credit_card", 100.0) == 3.2
+        clock.now = 1.0
+        assert engine.commission("credit_card", 100.0) == 5.0
+
+    def test_bad_config_keeps_rules(self, config_path):
+        """Test that an invalid config leaves the previous rules in place"""
+        engine = CommissionRuleEngine(config_path, check_interval=0.0)
+        config_path.write_text("{not json")
+        os.utime(config_path, ns=(0, 1))
+        assert engine.commission("credit_card", 100.0) == 3.2
+        assert engine.last_error is not None
+
+
+class TestInvalidRules:
+    def test_min_above_cap(self):
+        """Test that a rule whose min exceeds its cap is rejected"""
+        with pytest.raises(ValueError):
+            CommissionTable.from_rule({"tiers": [{"from": 0, "rate": 0.01}], "min": 5.00, "cap": 2.00})
+
+
+class TestProcessorCommissionRules:
+    def test_processor_uses_rules(self, config_path):
+        """Test that processors with rules use them for single and batch commissions"""
+        processor = CreditCardProcessor()
+        processor.commission_rules = CommissionRuleEngine(config_path)
+        assert processor.calculate_commission(100.0) == 3.2
+        assert processor.calculate_commission(100.0, "acme") == 1.0
+        results = processor.process_batch([CARD, {**CARD, "merchant_id": "acme"}])
+        assert [result["commission"] for result in results] == [3.2, 1.0]
+
+    def test_async_runner_uses_merchant_rules(self, config_path, monkeypatch):
+        """Test that the async runner passes the merchant to the commission rules"""
+        monkeypatch.setattr(CreditCardProcessor, "commission_rules", CommissionRuleEngine(config_path))
+        card = {**CARD, "payment_method": "credit_card"}
+        results = asyncio.run(AsyncPaymentRunner().run([card, {**card, "merchant_id": "acme"}]))
+        assert [result["commission"] for result in results] == [3.2, 1.0]
+
+    def test_processor_without_rules(self):
+        """Test that processors without rules keep their flat commission_rate"""
+        assert PayPalProcessor().calculate_commission(100.0) == 2.0
@@ -0,0 +1,112 @@
+import pytest
+from .duplicates import BloomFilter, DuplicateGuard, DuplicatePaymentDetector, payment_key
+from .payment_processors import CreditCardProcessor
+from .transport import GatewayTransport, TransportError
+
+CARD = {"card_number": "4111111111111111", "expiry_date": "12/25", "cvv": "123", "amount": 100.00}
+
+
+class TestBloomFilter:
+    def test_no_false_negatives(self):
+        """Test that every added key is reported as present"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f"key-{index}".encode() for index in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        assert all(key in bloom for key in keys)
+
+    def test_false_positive_rate(self):
+        """Test that the false positive rate stays near the configured rate"""
+        bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+        for index in range(10_000):
+            bloom.add(f"in-{index}".encode())
+        false_positives = sum(f"out-{index}".encode() in bloom for index in range(10_000))
+        assert false_positives < 200
+
+    def test_memory_cap(self):
+        """Test that max_bytes caps the filter size"""
+        assert BloomFilter(capacity=1_000_000, error_rate=0.001, max_bytes=4096).nbytes == 4096
+
+
+class TestDuplicatePaymentDetector:
+    def test_payment_key(self):
+        """Test that the key depends on the account and the amount in cents"""
+        assert payment_key(CARD) == payment_key({**CARD, "cvv": "999", "amount": 100})
+        assert payment_key(CARD) != payment_key({**CARD, "amount": 100.01})
+        with pytest.raises(ValueError):
+            payment_key({"amount": 1.0})
+        with pytest.raises(ValueError):
+            payment_key({**CARD, "amount": "abc"})
+
+    def test_duplicates_inside_window(self, clock):
+        """Test that repeats are rejected inside the window and accepted after it"""
+        detector = DuplicatePaymentDetector(window=60, buckets=6, capacity=1000, clock=clock)
+        assert detector.check(CARD) is False
+        clock.now = 30
+        assert detector.check(CARD) is True
+        assert detector.check({**CARD, "amount": 5.0}) is False
+        clock.now = 200
+        assert detector.check(CARD) is False
+        assert len(detector._ring) <= 7
+
+    def test_exact_check_only_on_bloom_hits(self):
+        """Test that the exact check is consulted only for Bloom filter hits"""
+        seen: list[bytes] = []
+        detector = DuplicatePaymentDetector(capacity=1000, exact_check=lambda key: seen.append(key) or False)
+        detector.check(CARD)
+        assert seen == []
+        assert detector.check(CARD) is False
+        assert seen == [payment_key(CARD)]
+        assert detector.stats.false_positives == 1
+
+    def test_false_positives_do_not_reject(self):
+        """Test that Bloom filter false positives are confirmed against the exact fingerprints"""
+        detector = DuplicatePaymentDetector(capacity=1000, max_bytes=16)
+        assert not any(detector.check({**CARD, "amount": float(amount)}) for amount in range(500))
+        assert detector.stats.false_positives > 0
+        assert detector.check({**CARD, "amount": 7.0}) is True
+
+    def test_memory_cap_across_buckets(self, clock):
+        """Test that max_bytes bounds the memory of all live buckets"""
+        detector = DuplicatePaymentDetector(window=10, buckets=10, max_bytes=10_000, clock=clock)
+        for second in range(100):
+            clock.now = second
+            detector.check({**CARD, "amount": float(second)})
+        assert len(detector._ring) == 11
+        assert detector.nbytes <= 10_000
+
+
+class TestDuplicateGuard:
+    def test_guard_rejects_duplicate_before_processing(self):
+        """Test that the guard returns an error result for duplicates"""
+        guard = DuplicateGuard(CreditCardProcessor(), DuplicatePaymentDetector(capacity=1000))
+        assert guard.process_payment(CARD)["success"] is True
+        assert guard.process_payment(CARD) == {"success": False, "error": "Duplicate payment", "amount": 100.00}
+        assert guard.validate_data(CARD) is True
+
+    def test_retry_after_failure_is_accepted(self):
+        """Test that a payment is only recorded once it succeeded"""
+        class DownOnceTransport(GatewayTransport):
+            sends = 0
+
+            def send(self, provider, request):
+                self.sends += 1
+                if self.sends == 1:
+                    raise TransportError(f"{provider} gateway unavailable")
+                return {"approved": True, "authorization": "AUTH-1"}
+
+        processor = CreditCardProcessor()
+        processor.transport = DownOnceTransport()
+        guard = DuplicateGuard(processor, DuplicatePaymentDetector(capacity=1000))
+        assert guard.process_payment(CARD)["success"] is False
+        assert guard.process_payment(CARD)["success"] is True
+        assert guard.process_payment(CARD)["error"] == "Duplicate payment"
+
+    def test_guard_batch(self):
+        """Test that the batch path rejects duplicates, within the batch too, and invalid amounts"""
+        guard = DuplicateGuard(CreditCardProcessor(), DuplicatePaymentDetector(capacity=1000))
+        guard.process_payment(CARD)
+        results = guard.process_batch([CARD, {**CARD, "amount": 5.0}, {**CARD, "amount": 5.0}, {**CARD, "amount": "abc"}])
+        assert [result["success"] for result in results] == [False, True, False, False]
+        assert results[0]["error"] == results[2]["error"] == "Duplicate payment"
+        assert results[3]["error"].startswith("Invalid payment data")
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+import pytest
+from .idempotency import IdempotencyCache, IdempotentProcessor
+from .payment_processors import PayPalProcessor
+from .transaction_ids import SnowflakeIdGenerator
+from .transport import GatewayTransport, TransportError
+
+
+class CountingProcessor(PayPalProcessor):
+    id_generator = SnowflakeIdGenerator(worker_id=1)
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    def process_payment(
+        self, data: dict[str, str | float], authorization: str | None = None
+    ) -> dict[str, str | bool | float]:
+        self.calls += 1
+        time.sleep(self.delay)
+        return super().process_payment(data, authorization)
+
+
+class FlakyTransport(GatewayTransport):
+    """Fails the first `failures` sends as if the provider were down, then approves."""
+
+    def __init__(self, failures: int = 1):
+        self.failures = failures
+        self.sends = 0
+
+    def send(self, provider, request):
+        self.sends += 1
+        if self.sends <= self.failures:
+            raise TransportError(f"{provider} gateway unavailable")
+        return {"approved": True, "authorization": f"AUTH-{self.sends}"}
+
+
+class TestIdempotencyCache:
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = IdempotencyCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.evictions, stats.size) == (2, 1, 1, 2)
+
+    def test_ttl_expiration(self, clock):
+        """Test that entries expire after ttl seconds"""
+        cache = IdempotencyCache(ttl=10, clock=clock)
+        cache.put("a", 1)
+        clock.now = 9.9
+        assert cache.get("a") == 1
+        clock.now = 10.0
+        assert cache.get("a") is None
+        assert cache.stats().expirations == 1
+
+    def test_get_or_compute_runs_once_under_concurrency(self):
+        """Test that concurrent requests for the same key compute it only once"""
+        cache = IdempotencyCache()
+        calls: list[int] = []
+
+        def compute() -> int:
+            calls.append(1)
+            time.sleep(0.05)
+            return 42
+
+        results: list[int] = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [42] * 8
+        assert len(calls) == 1
+        assert cache.stats().misses == 1
+
+    def test_failed_compute_is_not_cached(self):
+        """Test that an exception is propagated and the key can be retried"""
+        cache = IdempotencyCache()
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("k", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+        assert cache.get_or_compute("k", lambda: 1) == 1
+
+
+class TestIdempotentProcessor:
+    def test_retry_with_same_key_returns_stored_result(self):
+        """Test that a retried idempotency key is not processed again"""
+        processor = CountingProcessor()
+        idempotent = IdempotentProcessor(processor)
+        first = idempotent.process_payment({"email": "a@example.com", "amount": 10.0, "idempotency_key": "k1"})
+        second = idempotent.process_payment({"email": "a@example.com", "amount": 10.0, "idempotency_key": "k1"})
+        third = idempotent.process_payment({"email": "a@example.com", "amount": 10.0}, idempotency_key="k2")
+        assert first == second
+        assert first["transaction_id"] != third["transaction_id"]
+        assert processor.calls == 2
+
+    def test_payload_fingerprint_without_key(self):
+        """Test that identical payloads without a key are deduplicated by fingerprint"""
+        processor = CountingProcessor()
+        idempotent = IdempotentProcessor(processor)
+        idempotent.process_payment({"email": "a@example.com", "amount": 10})
+        idempotent.process_payment({"amount": 10.0, "email": "a@example.com"})
+        idempotent.process_payment({"email": "a@example.com", "amount": 11.0})
+        assert processor.calls == 2
+        assert idempotent.cache.stats().hits == 1
+
+    def test_stored_result_cannot_be_mutated(self):
+        """Test that callers receive copies of the stored result"""
+        idempotent = IdempotentProcessor(CountingProcessor())
+        idempotent.process_payment({"email": "a@example.com"}, idempotency_key="k")["success"] = False
+        assert idempotent.process_payment({"email": "a@example.com"}, idempotency_key="k")["success"] is True
+
+    def test_delegates_other_methods(self):
+        """Test that the wrapper exposes the processor's other methods"""
+        idempotent = IdempotentProcessor(PayPalProcessor())
+        assert idempotent.calculate_commission(100.0) == 2.0
+        assert idempotent.validate_data({"email": "a@example.com", "password": "x"}) is True
+
+    def test_transient_failure_is_not_replayed(self):
+        """Test that a retry after the provider was unreachable is processed again"""
+        processor = CountingProcessor()
+        processor.transport = FlakyTransport()
+        idempotent = IdempotentProcessor(processor)
+        first = idempotent.process_payment({"email": "a@example.com", "amount": 10.0}, idempotency_key="k")
+        second = idempotent.process_payment({"email": "a@example.com", "amount": 10.0}, idempotency_key="k")
+        third = idempotent.process_payment({"email": "a@example.com", "amount": 10.0}, idempotency_key="k")
+        assert first["success"] is False and first["retryable"] is True
+        assert second["success"] is True and third == second
+        assert processor.calls == 2
+
+    def test_batch_and_async_use_the_cache(self):
+        """Test that process_batch and process_payment_async replay stored results"""
+        processor = CountingProcessor()
+        idempotent = IdempotentProcessor(processor)
+        payment = {"email": "a@example.com", "password": "x", "amount": 10.0, "idempotency_key": "k"}
+        stored = idempotent.process_payment(payment)
+        batch = idempotent.process_batch([payment, {**payment, "idempotency_key": "k2"}, {**payment, "idempotency_key": "k2"}])
+        assert batch[0] == stored
+        assert batch[1] == batch[2] and batch[1]["transaction_id"] != stored["transaction_id"]
+        assert asyncio.run(idempotent.process_payment_async(payment)) == stored
+        assert processor.calls == 2
+
+    def test_forwards_authorization(self):
+        """Test that an authorization code reaches the wrapped processor"""
+        processor = CountingProcessor()
+        processor.transport = FlakyTransport(failures=10)
+        result = IdempotentProcessor(processor).process_payment({"email": "a@example.com"}, authorization="AUTH-1")
+        assert result["success"] is True and result["authorization"] == "AUTH-1"
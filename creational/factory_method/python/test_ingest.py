@@ -0,0 +1,143 @@
+import io
+import json
+import pytest
+from .ingest import PaymentIngestor, chunked, main, read_records
+from .payment_processors import CreditCardProcessor
+
+CARD = {"payment_method": "credit_card", "card_number": "4111111111111111", "expiry_date": "12/25",
+        "cvv": "123", "amount": 100.00}
+PAYPAL = {"payment_method": "paypal", "email": "test@example.com", "password": "validpassword", "amount": 50.00}
+
+
+def _jsonl(records):
+    return io.StringIO("".join(json.dumps(record) + "\n" for record in records))
+
+
+class TestReadRecords:
+    def test_jsonl_line_numbers(self):
+        """Test that JSONL records carry their line number and blank lines are skipped"""
+        records = list(read_records(io.StringIO('{"a": 1}\n\n{"a": 2}\nnot json\n')))
+        assert [line for line, _ in records] == [1, 3, 4]
+        assert "_error" in records[2][1]
+
+    def test_csv(self):
+        """Test that CSV rows become dicts keyed by the header"""
+        records = list(read_records(io.StringIO("payment_method,amount\npaypal,10.5\n"), "csv"))
+        assert records == [(2, {"payment_method": "paypal", "amount": "10.5"})]
+
+    def test_chunked(self):
+        """Test that chunked yields lists of at most the chunk size"""
+        assert [len(chunk) for chunk in chunked(((index, {}) for index in range(7)), 3)] == [3, 3, 1]
+
+
+class TestPaymentIngestor:
+    def test_mixed_methods(self):
+        """Test that records are routed, processed and receipted per method"""
+        receipts = io.StringIO()
+        ingestor = PaymentIngestor(receipts=receipts, receipt_format="jsonl", chunk_size=2)
+        report = ingestor.ingest(read_records(_jsonl([CARD, PAYPAL, CARD])))
+        assert (report.read, report.processed, report.rejected) == (3, 3, 0)
+        lines = [json.loads(line) for line in receipts.getvalue().splitlines()]
+        assert sorted(line["receipt"] for line in lines) == [
+            "Credit Card Payment Receipt", "Credit Card Payment Receipt", "PayPal Payment Receipt"
+        ]
+
+    def test_rejects_side_file(self):
+        """Test that invalid records go to the rejects file with their line and reason"""
+        rejects = io.StringIO()
+        records = [CARD, {**CARD, "cvv": "1"}, {**CARD, "payment_method": "bitcoin"}, {**CARD, "amount": "abc"}]
+        report = PaymentIngestor(rejects=rejects).ingest(read_records(_jsonl(records)))
+        assert (report.processed, report.rejected) == (1, 3)
+        rejected = [json.loads(line) for line in rejects.getvalue().splitlines()]
+        assert sorted(entry["line"] for entry in rejected) == [2, 3, 4]
+        assert any(entry["error"] == "Invalid payment method: bitcoin" for entry in rejected)
+
+    def test_unparsable_line_keeps_raw_text(self):
+        """Test that rejects of unparsable lines carry the original text for replay"""
+        rejects = io.StringIO()
+        PaymentIngestor(rejects=rejects).ingest(read_records(io.StringIO('{"amount": 1,\n[1, 2]\n')))
+        rejected = [json.loads(line) for line in rejects.getvalue().splitlines()]
+        assert [entry["raw"] for entry in rejected] == ['{"amount": 1,', "[1, 2]"]
+        assert all("record" not in entry for entry in rejected)
+
+    def test_merchants_reach_commission_rules(self, monkeypatch):
+        """Test that records are processed through process_batch with their merchant ids"""
+        seen = []
+
+        class MerchantRules:
+            def commissions(self, provider, amounts, merchants):
+                seen.append(list(merchants))
+                return [1.0] * len(amounts)
+
+        monkeypatch.setattr(CreditCardProcessor, "commission_rules", MerchantRules())
+        report = PaymentIngestor().ingest(read_records(_jsonl([CARD, {**CARD, "merchant_id": "acme"}])))
+        assert report.processed == 2
+        assert seen == [[None, "acme"]]
+
+    def test_default_method_and_csv_amounts(self):
+        """Test that CSV amounts are parsed and records without a method use the default"""
+        text = "email,password,amount\ntest@example.com,validpassword,12.50\n"
+        receipts = io.StringIO()
+        report = PaymentIngestor(receipts=receipts, default_method="paypal").ingest(read_records(io.StringIO(text), "csv"))
+        assert report.processed == 1
+        assert "Amount: 12.50" in receipts.getvalue()
+
+    def test_text_receipts_and_caller_records(self):
+        """Test that text receipts match generate_receipt and the caller's records are not modified"""
+        records = [(1, {**CARD, "amount": "100"}), (2, {**CARD, "amount": "20.5"})]
+        receipts = io.StringIO()
+        PaymentIngestor(receipts=receipts).ingest(iter(records))
+        processor = CreditCardProcessor()
+        results = processor.process_batch([{**CARD, "amount": 100.0}, {**CARD, "amount": 20.5}])
+        assert receipts.getvalue() == "".join(result["receipt"] + "\n\n" for result in results)
+        assert [record["amount"] for _, record in records] == ["100", "20.5"]
+
+    def test_stage_stats(self):
+        """Test that every stage reports how many records it handled"""
+        report = PaymentIngestor(chunk_size=10).ingest(read_records(_jsonl([CARD] * 25)))
+        assert report.stages["read"].records == 25
+        assert report.stages["process"].records == 25
+        assert report.stages["receipts"].records == 25
+
+    def test_backpressure_bounds_reading(self):
+        """Test that the reader stays at most max_pending_chunks ahead of processing"""
+        consumed = []
+
+        def records():
+            for index in range(1000):
+                consumed.append(index)
+                yield index + 1, dict(CARD)
+
+        ingestor = PaymentIngestor(chunk_size=10, max_pending_chunks=2)
+        seen = []
+        original = ingestor._ingest_chunk
+
+        def ingest_chunk(chunk, report):
+            # Reader may hold one chunk in hand plus two queued ones
+            seen.append(len(consumed) - report.read)
+            original(chunk, report)
+
+        ingestor._ingest_chunk = ingest_chunk
+        ingestor.ingest(records())
+        assert max(seen) <= 30
+
+    def test_reader_error_propagates(self):
+        """Test that an error while reading stops the ingestion"""
+        def records():
+            yield 1, dict(CARD)
+            raise OSError("disk failure")
+
+        with pytest.raises(OSError):
+            PaymentIngestor().ingest(records())
+
+
+class TestCli:
+    def test_main(self, tmp_path, capsys):
+        """Test that the CLI writes receipts and rejects and reports stage throughput"""
+        source = tmp_path / "payments.jsonl"
+        source.write_text(_jsonl([CARD, {**CARD, "cvv": ""}]).getvalue())
+        receipts, rejects = tmp_path / "receipts.txt", tmp_path / "rejects.jsonl"
+        assert main([str(source), "--receipts", str(receipts), "--rejects", str(rejects)]) == 0
+        assert receipts.read_text().startswith("Credit Card Payment Receipt")
+        assert len(rejects.read_text().splitlines()) == 1
+        assert "processed 1, rejected 1" in capsys.readouterr().err
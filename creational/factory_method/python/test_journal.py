@@ -0,0 +1,123 @@
+import time
+import pytest
+from . import journal as journal_module
+from .journal import RECORD, JournalError, JournalReader, TransactionJournal
+from .payment_factory import PaymentFactory, PaymentMethod
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def paypal_results(count: int) -> list[dict[str, str | bool | float]]:
+    payments = [
+        {"payment_method": "paypal", "email": "test@example.com", "password": "secret", "amount": float(index)}
+        for index in range(count)
+    ]
+    return PaymentFactory.process_batch(payments)
+
+
+class TestTransactionJournal:
+    def test_round_trip(self, tmp_path):
+        """Test that appended results can be read back as fixed-size records"""
+        path = tmp_path / "payments.journal"
+        results = paypal_results(3)
+        with TransactionJournal(path) as journal:
+            for result in results:
+                journal.append(PaymentMethod.PAYPAL, result)
+            journal.append(PaymentMethod.CREDIT_CARD, {"success": False, "amount": 1.5})
+        with JournalReader(path) as reader:
+            records = list(reader)
+            assert len(reader) == 4
+            assert reader[-1].amount_cents == 150
+        assert records[2].amount_cents == 200
+        assert records[2].commission_cents == 4
+        assert records[2].payment_method is PaymentMethod.PAYPAL
+        assert records[2].transaction_id == int(str(results[2]["transaction_id"])[3:], 16)
+        assert records[2].success is True
+        assert records[3].success is False
+
+    def test_group_commit(self, tmp_path):
+        """Test that records are committed in groups and survive growth"""
+        path = tmp_path / "payments.journal"
+        journal = TransactionJournal(path, group_size=100, group_interval=3600, initial_capacity=16)
+        for index in range(250):
+            journal.append_record(index, index * 100)
+        assert journal.commits == 2
+        with JournalReader(path) as reader:
+            assert len(reader) == 200
+        journal.close()
+        assert journal.commits == 3
+        with JournalReader(path) as reader:
+            assert [record.transaction_id for record in reader.scan(245)] == [245, 246, 247, 248, 249]
+            assert reader.transaction_ids() == set(range(250))
+
+    def test_reopen_appends_after_committed_records(self, tmp_path):
+        """Test that reopening a journal resumes after the last committed record"""
+        path = tmp_path / "payments.journal"
+        with TransactionJournal(path) as journal:
+            journal.append_record(1, 100)
+        with TransactionJournal(path) as journal:
+            assert len(journal) == 1
+            journal.append_record(2, 200)
+        with JournalReader(path) as reader:
+            assert [record.transaction_id for record in reader] == [1, 2]
+
+    def test_idle_journal_commits(self, tmp_path):
+        """Test that records appended before the journal goes idle are committed by the timer"""
+        path = tmp_path / "payments.journal"
+        with TransactionJournal(path, group_size=100, group_interval=0.05) as journal:
+            journal.append_record(1, 100)
+            deadline = time.monotonic() + 5
+            while journal.commits == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            with JournalReader(path) as reader:
+                assert len(reader) == 1
+
+    def test_rejected_reopen_closes_file(self, tmp_path, monkeypatch):
+        """Test that reopening a file that is not a journal releases the file"""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"x" * 128)
+        opened = []
+
+        def tracking_open(*args, **kwargs):
+            opened.append(open(*args, **kwargs))
+            return opened[-1]
+
+        monkeypatch.setattr(journal_module, "open", tracking_open, raising=False)
+        with pytest.raises(JournalError):
+            TransactionJournal(path)
+        assert opened and all(file.closed for file in opened)
+
+    def test_small_initial_capacity(self, tmp_path):
+        """Test that a journal grows from a single record and rejects an empty capacity"""
+        path = tmp_path / "payments.journal"
+        with pytest.raises(ValueError):
+            TransactionJournal(path, initial_capacity=0)
+        with TransactionJournal(path, initial_capacity=1) as journal:
+            for index in range(5):
+                journal.append_record(index, index * 100)
+        with JournalReader(path) as reader:
+            assert [record.amount_cents for record in reader] == [0, 100, 200, 300, 400]
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file with another format is rejected"""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"x" * 128)
+        with pytest.raises(JournalError):
+            JournalReader(path)
+
+    @pytest.mark.skipif(np is None, reason="NumPy is not installed")
+    def test_numpy_view(self, tmp_path):
+        """Test the zero-copy NumPy view of the records"""
+        path = tmp_path / "payments.journal"
+        with TransactionJournal(path) as journal:
+            for index in range(10):
+                journal.append_record(index, index * 100, payment_method="bank_transfer")
+        reader = JournalReader(path)
+        records = reader.to_numpy()
+        assert records.itemsize == RECORD.size
+        assert int(records["amount_cents"].sum()) == 4500
+        del records
+        reader.close()
@@ -0,0 +1,69 @@
+import sys
+from .payment_batch import PaymentBatch, MethodTotals, commission_cents, rate_to_ppm, to_cents
+from .payment_factory import PaymentMethod
+
+PAYMENTS = [
+    {"payment_method": "credit_card", "amount": 100.00, "transaction_id": "CC-00000000000000ff"},
+    {"payment_method": "paypal", "amount": "19.99"},
+    {"payment_method": PaymentMethod.CREDIT_CARD, "amount": 0.10},
+    {"payment_method": "digital_wallet", "amount": 1.005},
+]
+
+
+class TestFixedPoint:
+    def test_to_cents(self):
+        """Test conversion of floats, strings and ints to integer cents"""
+        assert to_cents(100.0) == 10000
+        assert to_cents("19.99") == 1999
+        assert to_cents(1.005) == 101
+        assert to_cents(3) == 300
+
+    def test_commission_cents_rounds_half_up(self):
+        """Test fixed-point commissions"""
+        assert commission_cents(10000, rate_to_ppm(0.03)) == 300
+        assert commission_cents(50, rate_to_ppm(0.01)) == 1  # 0.5 cents rounds up
+        assert commission_cents(49, rate_to_ppm(0.01)) == 0
+
+
+class TestPaymentBatch:
+    def test_columns(self):
+        """Test that payments are stored column-wise"""
+        batch = PaymentBatch.from_payments(PAYMENTS)
+        assert len(batch) == 4
+        assert list(batch.amount_cents) == [10000, 1999, 10, 101]
+        assert batch[0] == {"amount_cents": 10000, "payment_method": PaymentMethod.CREDIT_CARD, "transaction_id": 255}
+        assert batch[1]["transaction_id"] == 0
+
+    def test_commissions_and_totals_are_exact(self):
+        """Test batch commissions and per-method totals in cents"""
+        batch = PaymentBatch.from_payments(PAYMENTS)
+        assert list(batch.commissions()) == [300, 40, 0, 2]
+        assert batch.total_cents() == 12110
+        assert batch.totals() == {
+            PaymentMethod.CREDIT_CARD: MethodTotals(2, 10010, 300),
+            PaymentMethod.PAYPAL: MethodTotals(1, 1999, 40),
+            PaymentMethod.DIGITAL_WALLET: MethodTotals(1, 101, 2),
+        }
+        assert batch.commissions({PaymentMethod.CREDIT_CARD: 500_000})[0] == 5000
+
+    def test_charged_commission_is_kept(self):
+        """Test that a result's charged commission is stored instead of the flat rate"""
+        batch = PaymentBatch.from_payments([{**PAYMENTS[0], "commission": 3.2}, PAYMENTS[1]])
+        assert list(batch.commissions()) == [320, 40]
+        assert list(batch[:1].commission_cents) == [320]
+
+    def test_slicing_shares_buffers(self):
+        """Test that slicing a batch does not copy the columns"""
+        batch = PaymentBatch.from_payments(PAYMENTS * 1000)
+        part = batch[4:8]
+        assert len(part) == 4
+        assert list(part.amount_cents) == [10000, 1999, 10, 101]
+        assert part.amount_cents.obj is batch.amount_cents.obj
+        assert part.totals()[PaymentMethod.PAYPAL] == MethodTotals(1, 1999, 40)
+
+    def test_memory_per_payment(self):
+        """Test that a batch needs far less memory than one dict per payment"""
+        batch = PaymentBatch.from_payments(PAYMENTS * 2500)
+        column_bytes = sum(column.nbytes for column in (batch.amount_cents, batch.method_codes, batch.transaction_ids))
+        assert column_bytes / len(batch) == 17
+        assert column_bytes * 10 < sum(sys.getsizeof(data) for data in PAYMENTS * 2500)
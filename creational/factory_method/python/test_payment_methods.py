@@ -34,6 +34,59 @@ class TestPaymentFactory:
         with pytest.raises(ValueError):
             PaymentFactory.create_payment_method("INVALID_METHOD") # type: ignore
 
+class StatefulProcessor(PayPalProcessor):
+    shared = False
+
+
+class TestPaymentFactoryRegistry:
+    @pytest.fixture(autouse=True)
+    def restore_registry(self):
+        platforms = dict(PaymentFactory._platforms)
+        shared = dict(PaymentFactory._shared)
+        instances = dict(PaymentFactory._instances)
+        yield
+        PaymentFactory._platforms = platforms
+        PaymentFactory._shared = shared
+        PaymentFactory._instances = instances
+
+    def test_processors_are_reused(self):
+        """Test that stateless processors are created once and shared"""
+        first = PaymentFactory.create_payment_method(PaymentMethod.PAYPAL)
+        assert PaymentFactory.create_payment_method("paypal") is first
+
+    def test_register_third_party_processor(self):
+        """Test registering a processor class under a new method name"""
+        PaymentFactory.register("crypto", DigitalWalletProcessor)
+        assert isinstance(PaymentFactory.create_payment_method("crypto"), DigitalWalletProcessor)
+
+    def test_register_lazy_import_path(self):
+        """Test that "module:Class" paths are imported on first request"""
+        PaymentFactory.register("wire", ".payment_processors:BankTransferProcessor")
+        assert PaymentFactory._platforms["wire"] == ".payment_processors:BankTransferProcessor"
+        assert isinstance(PaymentFactory.create_payment_method("wire"), BankTransferProcessor)
+        assert PaymentFactory._platforms["wire"] is BankTransferProcessor
+
+    def test_stateful_processors_are_not_shared(self):
+        """Test the opt-out from instance reuse, on the class and on register"""
+        PaymentFactory.register("stateful", StatefulProcessor)
+        assert PaymentFactory.create_payment_method("stateful") is not PaymentFactory.create_payment_method("stateful")
+        PaymentFactory.register(PaymentMethod.PAYPAL, PayPalProcessor, shared=False)
+        assert PaymentFactory.create_payment_method("paypal") is not PaymentFactory.create_payment_method("paypal")
+
+    def test_override_builtin_by_string(self):
+        """Test that a built-in method given by its string value is overridden and removed"""
+        PaymentFactory.register("credit_card", StatefulProcessor)
+        assert isinstance(PaymentFactory.create_payment_method(PaymentMethod.CREDIT_CARD), StatefulProcessor)
+        PaymentFactory.unregister("credit_card")
+        with pytest.raises(ValueError):
+            PaymentFactory.create_payment_method("credit_card")
+
+    def test_unregistered_method(self):
+        """Test that a known method without a processor raises ValueError"""
+        PaymentFactory.unregister(PaymentMethod.PAYPAL)
+        with pytest.raises(ValueError):
+            PaymentFactory.create_payment_method(PaymentMethod.PAYPAL)
+
 class TestCreditCardProcessor:
     @pytest.fixture
     def processor(self):
@@ -221,3 +274,57 @@ class TestDigitalWalletProcessor:
         assert "Digital Wallet Payment" in receipt
         assert "100.00" in receipt
         assert "123456" in receipt
+
+class TestBatchProcessing:
+    def test_processor_batch_keeps_order_and_reports_errors(self):
+        """Test that a processor batch returns one result per record in input order"""
+        processor = CreditCardProcessor()
+        payments = [
+            {"card_number": "4111111111111111", "expiry_date": "12/25", "cvv": "123", "amount": 100.00},
+            {"card_number": "4111111111111111", "expiry_date": "12/25", "cvv": "12", "amount": 50.00},
+            {"card_number": "4111111111111111", "expiry_date": "12/25", "cvv": "456", "amount": 20.00},
+        ]
+        results = processor.process_batch(payments)
+        assert [result["success"] for result in results] == [True, False, True]
+        assert results[0]["commission"] == processor.calculate_commission(100.00)
+        assert results[2]["commission"] == processor.calculate_commission(20.00)
+        assert "20.00" in results[2]["receipt"]  # type: ignore
+        assert "error" in results[1]
+
+    def test_vectorized_commissions_match_single_calls(self):
+        """Test that batch commissions match calculate_commission for large batches"""
+        processor = DigitalWalletProcessor()
+        amounts = [float(amount) + 0.37 for amount in range(500)]
+        assert processor.calculate_commissions(amounts) == [
+            processor.calculate_commission(amount) for amount in amounts
+        ]
+
+    def test_factory_batch_groups_by_method(self):
+        """Test that the factory batch dispatches mixed methods and keeps input order"""
+        payments = [
+            {"payment_method": "paypal", "email": "test@example.com", "password": "secret", "amount": 10.00},
+            {"payment_method": "bitcoin", "amount": 5.00},
+            {"payment_method": PaymentMethod.BANK_TRANSFER, "account_number": "1234567890",
+             "routing_number": "987654321", "account_holder": "John Doe", "amount": 200.00},
+            {"payment_method": "paypal", "email": "test@example.com", "amount": 10.00},
+        ]
+        results = PaymentFactory.process_batch(payments)
+        assert len(results) == 4
+        assert results[0]["success"] is True
+        assert results[0]["commission"] == 10.00 * 0.02
+        assert results[1] == {"success": False, "error": "Invalid payment method: bitcoin"}
+        assert results[2]["success"] is True
+        assert "Bank Transfer" in results[2]["receipt"]  # type: ignore
+        assert results[3]["success"] is False
+
+    def test_batch_accepts_one_argument_override(self):
+        """Test that a subclass keeping process_payment(self, data) still processes batches"""
+        class TaggedPayPalProcessor(PayPalProcessor):
+            def process_payment(self, data):
+                return {**super().process_payment(data), "tagged": True}
+
+        results = TaggedPayPalProcessor().process_batch(
+            [{"email": "test@example.com", "password": "secret", "amount": 10.00}]
+        )
+        assert results[0]["success"] is True and results[0]["tagged"] is True
+        assert results[0]["commission"] == 10.00 * 0.02
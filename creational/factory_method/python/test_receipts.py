@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+import tracemalloc
+from .payment_processors import CreditCardProcessor, PayPalProcessor
+from .receipts import ReceiptTemplate
+
+
+def payments(count: int):
+    for index in range(count):
+        yield {"amount": index + 0.5, "transaction_id": f"PP-{index:016x}"}
+
+
+class TestReceiptTemplate:
+    def test_render_matches_format(self):
+        """Test that the compiled template renders like str.format"""
+        template = ReceiptTemplate("Receipt 100%\nAmount: {amount:.2f}\nID: {transaction_id} {amount:>8}")
+        data = {"amount": 12.345, "transaction_id": "X1"}
+        assert template.render(data) == template.template.format(**data)
+        assert template.fields == ("amount", "transaction_id", "amount")
+
+    def test_missing_fields_use_defaults(self):
+        """Test that missing amount and transaction id fall back to 0.00 and N/A"""
+        assert PayPalProcessor().generate_receipt({}) == "PayPal Payment Receipt\nAmount: 0.00\nTransaction ID: N/A"
+
+    def test_rounding_matches_previous_formatting(self):
+        """Test that amounts are rounded exactly like "%.2f" % round(amount, 2)"""
+        processor = CreditCardProcessor()
+        for amount in [0.005, 1.005, 2.675, 100.0, 1e9 + 0.125]:
+            receipt = processor.generate_receipt({"amount": amount, "transaction_id": "T"})
+            assert f"Amount: {'%.2f' % round(amount, 2)} \n" in receipt
+
+
+class TestWriteReceipts:
+    def test_text_output(self):
+        """Test streaming plain text receipts"""
+        out = io.StringIO()
+        assert PayPalProcessor().write_receipts(payments(3), out, chunk_size=2) == 3
+        receipts = out.getvalue().split("\n\n")
+        assert receipts[:3] == [PayPalProcessor().generate_receipt(data) for data in payments(3)]
+        assert receipts[3] == ""
+
+    def test_csv_output(self):
+        """Test streaming CSV receipts with a header row"""
+        out = io.StringIO()
+        PayPalProcessor().write_receipts(payments(2), out, format="csv")
+        rows = list(csv.reader(io.StringIO(out.getvalue())))
+        assert rows == [
+            ["receipt", "amount", "transaction_id"],
+            ["PayPal Payment Receipt", "0.50", f"PP-{0:016x}"],
+            ["PayPal Payment Receipt", "1.50", f"PP-{1:016x}"],
+        ]
+
+    def test_jsonl_output(self):
+        """Test streaming JSONL receipts"""
+        out = io.StringIO()
+        PayPalProcessor().write_receipts(payments(2), out, format="jsonl")
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert lines[1] == {"receipt": "PayPal Payment Receipt", "amount": 1.5, "transaction_id": f"PP-{1:016x}"}
+
+    def test_invalid_format(self):
+        """Test that unknown formats raise ValueError"""
+        try:
+            PayPalProcessor().write_receipts([], io.StringIO(), format="xml")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("ValueError not raised")
+
+    def test_memory_is_constant(self):
+        """Test that peak memory does not grow with the number of receipts"""
+        class NullFile(io.StringIO):
+            def write(self, text: str) -> int:
+                return len(text)
+
+        def peak(count: int) -> int:
+            tracemalloc.start()
+            PayPalProcessor().write_receipts(payments(count), NullFile())
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak_bytes
+
+        assert peak(50_000) < 2 * peak(5_000)
@@ -0,0 +1,98 @@
+import json
+import threading
+from .commission_rules import CommissionRuleEngine
+from .payment_batch import MethodTotals, PaymentBatch, to_cents
+from .payment_factory import PaymentMethod
+from .payment_processors import PayPalProcessor
+from .settlement import SettlementAggregator, merge_totals
+
+
+class TestSettlementAggregator:
+    def test_record_results(self):
+        """Test exact per-method totals from process_payment results"""
+        aggregator = SettlementAggregator()
+        processor = PayPalProcessor()
+        for amount in [19.99, 0.01, 100.0]:
+            aggregator.record("paypal", processor.process_payment({"email": "a@example.com", "amount": amount}))
+        aggregator.record(PaymentMethod.PAYPAL, {"success": False, "amount": 5.0})
+        aggregator.record(PaymentMethod.CREDIT_CARD, {"success": True, "amount": 10.0})
+        assert aggregator.snapshot() == {
+            PaymentMethod.PAYPAL: MethodTotals(3, 12000, 40 + 0 + 200),
+            PaymentMethod.CREDIT_CARD: MethodTotals(1, 1000, 30),
+        }
+
+    def test_record_uses_charged_commission(self):
+        """Test that a commission from tiered or merchant rules is settled as charged"""
+        aggregator = SettlementAggregator()
+        aggregator.record("paypal", {"success": True, "amount": 100.0, "commission": 0.5})
+        aggregator.record("paypal", {"success": True, "amount": 100.0})
+        assert aggregator.snapshot() == {PaymentMethod.PAYPAL: MethodTotals(2, 20000, 50 + 200)}
+
+    def test_record_batch_matches_individual_records(self):
+        """Test that a columnar batch adds the same totals as recording one by one"""
+        payments = [{"payment_method": "digital_wallet", "amount": amount / 7} for amount in range(100)]
+        individual = SettlementAggregator()
+        for data in payments:
+            individual.record(data["payment_method"], {**data, "success": True})
+        batched = SettlementAggregator()
+        batched.record_batch(PaymentBatch.from_payments(payments))
+        assert individual.snapshot() == batched.snapshot()
+
+    def test_record_batch_uses_commission_rules(self, tmp_path, monkeypatch):
+        """Test that batches and single results settle the commission the processor's rules charge"""
+        path = tmp_path / "commission_rules.json"
+        path.write_text(json.dumps({"methods": {"paypal": {"tiers": [{"from": 0, "rate": 0.01, "fixed": 0.30}]}}}))
+        monkeypatch.setattr(PayPalProcessor, "commission_rules", CommissionRuleEngine(path))
+        paypal = {"payment_method": "paypal", "email": "a@example.com", "password": "secret"}
+        payments = [{**paypal, "amount": amount / 7} for amount in range(1, 50)]
+        results = PayPalProcessor().process_batch(payments)
+        charged = sum(to_cents(result["commission"]) for result in results)
+        recorded = SettlementAggregator()
+        recorded.record_many(("paypal", result) for result in results)
+        uncharged = SettlementAggregator()
+        uncharged.record_many(("paypal", {**data, "success": True}) for data in payments)
+        batched = SettlementAggregator()
+        batched.record_batch(PaymentBatch.from_payments(payments))
+        batched_results = SettlementAggregator()
+        batched_results.record_batch(PaymentBatch.from_payments([{**result, "payment_method": "paypal"} for result in results]))
+        assert recorded.snapshot()[PaymentMethod.PAYPAL].commission_cents == charged
+        assert recorded.snapshot() == uncharged.snapshot() == batched.snapshot() == batched_results.snapshot()
+
+    def test_merge_shards(self):
+        """Test that partial results from shards merge into the overall totals"""
+        first = {PaymentMethod.PAYPAL: MethodTotals(1, 100, 2)}
+        second = {PaymentMethod.PAYPAL: MethodTotals(2, 300, 6), PaymentMethod.BANK_TRANSFER: MethodTotals(1, 50, 1)}
+        aggregator = SettlementAggregator()
+        aggregator.merge(first)
+        aggregator.merge(second)
+        assert aggregator.snapshot() == merge_totals(first, second) == {
+            PaymentMethod.PAYPAL: MethodTotals(3, 400, 8),
+            PaymentMethod.BANK_TRANSFER: MethodTotals(1, 50, 1),
+        }
+
+    def test_concurrent_writers_and_snapshots(self):
+        """Test that concurrent writers lose no updates while snapshots are taken"""
+        aggregator = SettlementAggregator()
+        stop = threading.Event()
+        snapshots = []
+
+        def write() -> None:
+            for _ in range(5000):
+                aggregator.record("bank_transfer", {"success": True, "amount": 1.0})
+
+        def read() -> None:
+            while not stop.is_set():
+                snapshots.append(aggregator.snapshot())
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        writers = [threading.Thread(target=write) for _ in range(4)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        stop.set()
+        reader.join()
+        assert aggregator.snapshot()[PaymentMethod.BANK_TRANSFER] == MethodTotals(20000, 2000000, 20000)
+        counts = [snapshot.get(PaymentMethod.BANK_TRANSFER, MethodTotals(0, 0, 0)).count for snapshot in snapshots]
+        assert counts == sorted(counts)
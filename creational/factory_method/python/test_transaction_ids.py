@@ -0,0 +1,107 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from . import transaction_ids
+from .payment_processors import CreditCardProcessor, PaymentProcessor
+from .transaction_ids import ContentHashIdGenerator, SnowflakeIdGenerator, canonical_payload, set_worker_id
+
+PAYMENT = {"card_number": "4111111111111111", "expiry_date": "12/25", "cvv": "123", "amount": 100.00}
+
+
+def content_hash_id(data: dict[str, str | float]) -> str:
+    return ContentHashIdGenerator().next_id("CC", data)
+
+
+def snowflake_ids(worker_id: int, count: int) -> list[int]:
+    generator = SnowflakeIdGenerator(worker_id)
+    return [generator.next_int() for _ in range(count)]
+
+
+def process_worker_id() -> int | None:
+    return transaction_ids._process_worker_id
+
+
+class TestContentHashIdGenerator:
+    def test_canonical_payload_ignores_key_order_and_number_type(self):
+        """Test that equivalent payloads serialize identically"""
+        assert canonical_payload({"a": "x", "amount": 100}) == canonical_payload({"amount": 100.0, "a": "x"})
+        assert canonical_payload({"a": "x"}) != canonical_payload({"a": "y"})
+
+    def test_ids_are_stable_across_processes(self):
+        """Test that processes with different hash seeds produce the same ID"""
+        expected = content_hash_id(PAYMENT)
+        with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as pool:
+            assert list(pool.map(content_hash_id, [PAYMENT, PAYMENT])) == [expected, expected]
+
+    def test_selected_fields(self):
+        """Test that only the configured fields contribute to the ID"""
+        generator = ContentHashIdGenerator(fields=["card_number", "amount"])
+        assert generator.next_int(PAYMENT) == generator.next_int({**PAYMENT, "cvv": "999"})
+        assert generator.next_int(PAYMENT) != generator.next_int({**PAYMENT, "amount": 1.0})
+
+
+class TestSnowflakeIdGenerator:
+    def test_ids_are_unique_and_increasing(self):
+        """Test that IDs from one generator never repeat and keep increasing"""
+        ids = snowflake_ids(1, 20_000)
+        assert len(set(ids)) == len(ids)
+        assert ids == sorted(ids)
+
+    def test_decode(self):
+        """Test that an ID can be split into timestamp, worker id and sequence"""
+        generator = SnowflakeIdGenerator(worker_id=42)
+        timestamp, worker_id, _ = SnowflakeIdGenerator.decode(generator.next_int())
+        assert worker_id == 42
+        assert abs(timestamp - time.time() * 1000) < 5000
+
+    def test_no_collisions_across_processes(self):
+        """Test that worker processes with distinct worker ids never collide"""
+        with ProcessPoolExecutor(4) as pool:
+            batches = list(pool.map(snowflake_ids, range(8), [10_000] * 8))
+        ids = [value for batch in batches for value in batch]
+        assert len(set(ids)) == len(ids) == 80_000
+
+    def test_process_worker_id(self, monkeypatch):
+        """Test that set_worker_id applies to generators created without a worker id"""
+        monkeypatch.setattr(transaction_ids, "_process_worker_id", None)
+        existing = SnowflakeIdGenerator()
+        explicit = SnowflakeIdGenerator(worker_id=3)
+        set_worker_id(7)
+        assert SnowflakeIdGenerator.decode(existing.next_int())[1] == 7
+        assert SnowflakeIdGenerator.decode(SnowflakeIdGenerator().next_int())[1] == 7
+        assert SnowflakeIdGenerator.decode(explicit.next_int())[1] == 3
+        with pytest.raises(ValueError):
+            set_worker_id(1024)
+
+    def test_generators_share_one_fork_handler(self, monkeypatch):
+        """Test that generators register no fork handler each and keep their lock on set_worker_id"""
+        monkeypatch.setattr(transaction_ids, "_process_worker_id", None)
+        registered = []
+        monkeypatch.setattr(transaction_ids.os, "register_at_fork", lambda **kwargs: registered.append(kwargs), raising=False)
+        generators = [SnowflakeIdGenerator() for _ in range(100)]
+        assert registered == []
+        lock = generators[0]._lock
+        set_worker_id(9)
+        assert generators[0]._lock is lock and generators[0].worker_id == 9
+
+    def test_forked_child_forgets_worker_id(self, monkeypatch):
+        """Test that a forked child does not keep the parent's worker id"""
+        monkeypatch.setattr(transaction_ids, "_process_worker_id", None)
+        set_worker_id(11)
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("fork")) as pool:
+            assert pool.submit(process_worker_id).result() is None
+
+
+class TestProcessorTransactionIds:
+    def test_processor_uses_configured_generator(self, monkeypatch):
+        """Test that processors format IDs from the configured generator"""
+        processor = CreditCardProcessor()
+        transaction_id = processor.process_payment(PAYMENT)["transaction_id"]
+        assert transaction_id == content_hash_id(PAYMENT)
+
+        monkeypatch.setattr(PaymentProcessor, "id_generator", SnowflakeIdGenerator(worker_id=5))
+        first = processor.process_payment(PAYMENT)["transaction_id"]
+        second = processor.process_payment(PAYMENT)["transaction_id"]
+        assert first != second
+        assert str(first).startswith("CC-") and len(str(first)) == 19
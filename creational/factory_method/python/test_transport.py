@@ -0,0 +1,176 @@
+import socket
+import pytest
+from .payment_processors import CreditCardProcessor
+from .transport import (
+    CircuitBreaker,
+    CircuitOpenError,
+    SocketTransport,
+    StubGatewayServer,
+    TransportError,
+)
+
+CARD = {"card_number": "4111111111111111", "expiry_date": "12/25", "cvv": "123", "amount": 100.00}
+
+
+def _unused_address():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()
+
+
+@pytest.fixture
+def server():
+    with StubGatewayServer(approve_limit=1000.0) as stub:
+        yield stub
+
+
+@pytest.fixture
+def transport(server):
+    transport = SocketTransport({"credit_card": server.address}, pool_size=2)
+    yield transport
+    transport.close()
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self, clock):
+        """Test that the breaker opens after consecutive failures and fails fast"""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10.0, clock=clock)
+        for _ in range(2):
+            breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+
+    def test_half_open_probe(self, clock):
+        """Test that after the timeout one probe decides whether the breaker closes or re-opens"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=clock)
+        breaker.record_failure()
+        clock.now = 10.0
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        clock.now = 20.0
+        breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_allows_one_probe(self, clock):
+        """Test that while half open only one trial call goes through until it is recorded"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=clock)
+        breaker.record_failure()
+        clock.now = 10.0
+        breaker.allow()
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+        breaker.record_success()
+        breaker.allow()
+        breaker.allow()
+
+
+class TestSocketTransport:
+    def test_connections_are_reused(self, server, transport):
+        """Test that sequential requests share one keep-alive connection"""
+        for _ in range(10):
+            assert transport.send("credit_card", {"amount": 10.0})["approved"]
+        assert transport.pools["credit_card"].connections_opened == 1
+        assert server.connections == 1
+
+    def test_pipelined_send_many(self, server, transport):
+        """Test that send_many returns one response per request, in order"""
+        responses = transport.send_many("credit_card", [{"amount": float(amount)} for amount in range(995, 1005)])
+        assert [response["approved"] for response in responses] == [True] * 6 + [False] * 4
+        assert server.requests == 10
+
+    def test_batch_provider(self, server):
+        """Test that batch providers receive a single batch message"""
+        transport = SocketTransport({"credit_card": server.address}, batch_providers=["credit_card"])
+        responses = transport.send_many("credit_card", [{"amount": 1.0}] * 5)
+        transport.close()
+        assert len(responses) == 5
+        assert all(response["approved"] for response in responses)
+
+    def test_partial_failure_keeps_answered_responses(self):
+        """Test that requests answered before the provider drops keep their responses"""
+        with StubGatewayServer(drop_after=3) as stub:
+            transport = SocketTransport({"credit_card": stub.address}, max_pipeline=2)
+            results = transport.send_many("credit_card", [{"amount": 1.0}] * 5)
+            transport.close()
+        assert [response["approved"] for response in results[:3]] == [True] * 3
+        assert all(isinstance(result, TransportError) for result in results[3:])
+
+    def test_unavailable_provider_opens_circuit(self):
+        """Test that connection failures open the circuit and later calls fail fast"""
+        transport = SocketTransport({"credit_card": _unused_address()}, failure_threshold=2, timeout=0.5)
+        for _ in range(2):
+            with pytest.raises(TransportError):
+                transport.send("credit_card", {"amount": 1.0})
+        with pytest.raises(CircuitOpenError):
+            transport.send("credit_card", {"amount": 1.0})
+
+    def test_unknown_provider(self, transport):
+        """Test that an unconfigured provider is rejected"""
+        with pytest.raises(TransportError):
+            transport.send("paypal", {"amount": 1.0})
+
+
+class TestProcessorTransport:
+    def test_process_payment_authorizes(self, server, transport):
+        """Test that process_payment authorizes through the transport"""
+        processor = CreditCardProcessor()
+        processor.transport = transport
+        result = processor.process_payment(CARD)
+        assert result["success"]
+        assert result["authorization"].startswith("AUTH-")
+        assert server.requests == 1
+
+    def test_declined_payment(self, transport):
+        """Test that a declined payment fails the result instead of raising"""
+        processor = CreditCardProcessor()
+        processor.transport = transport
+        result = processor.process_payment({**CARD, "amount": 5000.0})
+        assert not result["success"]
+        assert result["error"].startswith("Payment declined")
+
+    def test_client_authorization_is_ignored(self, server, transport):
+        """Test that an "authorization" field in the payment data does not skip the provider"""
+        processor = CreditCardProcessor()
+        processor.transport = transport
+        result = processor.process_payment({**CARD, "amount": 5000.0, "authorization": "x"})
+        assert not result["success"]
+        assert server.requests == 1
+
+    def test_provider_down(self):
+        """Test that an unreachable provider fails the result instead of raising"""
+        processor = CreditCardProcessor()
+        processor.transport = SocketTransport({"credit_card": _unused_address()}, timeout=0.5)
+        assert not processor.process_payment(CARD)["success"]
+
+    def test_process_batch_single_round_trip(self, server, transport):
+        """Test that process_batch authorizes every payment over one connection and reports declines"""
+        processor = CreditCardProcessor()
+        processor.transport = transport
+        results = processor.process_batch([CARD, {**CARD, "amount": 5000.0}, CARD])
+        assert [result["success"] for result in results] == [True, False, True]
+        assert results[1]["error"].startswith("Payment declined")
+        assert server.requests == 3
+        assert server.connections == 1
+
+    def test_process_batch_provider_down(self):
+        """Test that a failing provider fails the batch records instead of raising"""
+        processor = CreditCardProcessor()
+        processor.transport = SocketTransport({"credit_card": _unused_address()}, timeout=0.5)
+        results = processor.process_batch([CARD, CARD])
+        assert not any(result["success"] for result in results)
+
+    def test_process_batch_partial_failure(self):
+        """Test that payments authorized before the provider drops succeed and only the rest are retryable"""
+        with StubGatewayServer(drop_after=2) as stub:
+            processor = CreditCardProcessor()
+            processor.transport = SocketTransport({"credit_card": stub.address})
+            results = processor.process_batch([CARD] * 4)
+            processor.transport.close()
+        assert [result["success"] for result in results] == [True, True, False, False]
+        assert all(result["authorization"].startswith("AUTH-") for result in results[:2])
+        assert all(result["retryable"] for result in results[2:])
@@ -0,0 +1,69 @@
+from .payment_processors import (
+    BankTransferProcessor,
+    CreditCardProcessor,
+    DigitalWalletProcessor,
+    PaymentProcessor
+)
+from .validation import ValidationSchema, validate_batch
+
+
+class TestValidationSchema:
+    def test_compiled_check_reports_first_failed_rule(self):
+        """Test that a compiled schema returns None or the reason of the failure"""
+        check = ValidationSchema(
+            required=("code", "name"),
+            min_length={"code": 4},
+            patterns={"code": r"[A-Z]+"},
+            strip={"code": r"-"},
+        ).compile()
+        assert check({"code": "AB-CD", "name": "x"}) is None
+        assert check({"code": "ABCD"}) == "Missing required fields: name"
+        assert check({"code": "ABC", "name": "x"}) == "code must be at least 4 characters long"
+        assert check({"code": "ab-cd", "name": "x"}) == "code has an invalid format"
+
+    def test_validate_batch_bitmap_and_reasons(self):
+        """Test that batch validation returns a validity bitmap and failure reasons"""
+        check = ValidationSchema(required=("email",)).compile()
+        report = validate_batch(check, [{"email": "a"}, {}, {"email": "b"}])
+        assert report.valid == bytearray([1, 0, 1])
+        assert report.reasons == {1: "Missing required fields: email"}
+        assert len(report) == 3
+        assert report.all_valid is False
+
+
+class TestProcessorSchemas:
+    def test_schema_is_compiled_per_class(self):
+        """Test that each concrete processor gets its own compiled check"""
+        assert CreditCardProcessor._check is not BankTransferProcessor._check
+        assert PaymentProcessor._check is None
+
+    def test_credit_card_missing_cvv_is_invalid(self):
+        """Test that a missing CVV is rejected instead of raising"""
+        processor = CreditCardProcessor()
+        assert processor.validate_data({"card_number": "4111111111111111", "expiry_date": "12/25"}) is False
+
+    def test_bank_account_number_length(self):
+        """Test that bank account numbers need at least 10 characters"""
+        processor = BankTransferProcessor()
+        data = {"account_number": "123456789", "routing_number": "987654321", "account_holder": "John Doe"}
+        assert processor.validate_data(data) is False
+        data["account_number"] = "1234567890"
+        assert processor.validate_data(data) is True
+
+    def test_digital_wallet_phone_formats(self):
+        """Test the phone number formats accepted by the digital wallet"""
+        processor = DigitalWalletProcessor()
+        for phone in ["+1-234-567-8900", "+1 234 567 8900", "(234) 567-8900", "234.567.8900", "2345678900"]:
+            assert processor.validate_data({"wallet_id": "W1", "phone_number": phone}) is True
+        for phone in ["234-567-890", "+123", "234567890a", "invalid-phone"]:
+            assert processor.validate_data({"wallet_id": "W1", "phone_number": phone}) is False
+
+    def test_processor_validate_batch(self):
+        """Test batch validation through a processor"""
+        processor = DigitalWalletProcessor()
+        report = processor.validate_batch([
+            {"wallet_id": "W1", "phone_number": "+1234567890"},
+            {"wallet_id": "W2", "phone_number": "nope"},
+        ])
+        assert report.valid == bytearray([1, 0])
+        assert report.reasons == {1: "phone_number has an invalid format"}
@@ -0,0 +1,57 @@
+import multiprocessing
+import pytest
+from .payment_factory import PaymentFactory, PaymentMethod
+from .payment_processors import PaymentProcessor
+from .transaction_ids import SnowflakeIdGenerator
+from .worker_pool import ShardedPaymentRunner, shard_by_account, shard_by_method
+
+
+def make_payments(count: int) -> list[dict[str, str | float]]:
+    templates = [
+        {"payment_method": "credit_card", "card_number": "4111111111111111", "expiry_date": "12/25", "cvv": "123"},
+        {"payment_method": "paypal", "email": "test@example.com", "password": "secret"},
+        {"payment_method": "bank_transfer", "account_number": "1234567890", "routing_number": "987654321",
+         "account_holder": "John Doe"},
+        {"payment_method": "digital_wallet", "wallet_id": "W1", "phone_number": "+1234567890"},
+    ]
+    return [{**templates[index % 4], "amount": float(index)} for index in range(count)]
+
+
+class TestSharding:
+    def test_shard_by_method_is_stable(self):
+        """Test that enum and string methods land in the same shard"""
+        assert shard_by_method({"payment_method": PaymentMethod.PAYPAL}, 8) == shard_by_method({"payment_method": "paypal"}, 8)
+
+    def test_shard_by_account(self):
+        """Test that the same account always lands in the same shard"""
+        first = shard_by_account({"card_number": "4111111111111111", "amount": 1.0}, 16)
+        assert first == shard_by_account({"card_number": "4111111111111111", "amount": 2.0}, 16)
+        assert 0 <= first < 16
+
+    def test_invalid_strategy(self):
+        """Test that unknown shard strategies raise ValueError"""
+        with pytest.raises(ValueError):
+            ShardedPaymentRunner(shard_by="region")
+
+
+class TestShardedPaymentRunner:
+    @pytest.mark.parametrize("shard_by", ["method", "account"])
+    def test_matches_single_process_results(self, shard_by: str):
+        """Test that sharded results equal in-process results, in input order"""
+        payments = make_payments(1003) + [{"payment_method": "bitcoin", "amount": 1.0}]
+        with ShardedPaymentRunner(workers=3, shard_by=shard_by, chunk_size=100, max_pending_chunks=2) as runner:
+            results = runner.run(payments)
+        assert results == PaymentFactory.process_batch(payments)
+        assert sum(stats.payments for stats in runner.stats.values()) == len(payments)
+        assert all(throughput >= 0 for throughput in runner.throughput().values())
+
+    def test_workers_get_distinct_worker_ids(self, monkeypatch):
+        """Test that every worker process generates Snowflake IDs under its own worker id"""
+        monkeypatch.setattr(PaymentProcessor, "id_generator", SnowflakeIdGenerator())
+        context = multiprocessing.get_context("fork")
+        with ShardedPaymentRunner(workers=4, shard_by="account", chunk_size=10, mp_context=context) as runner:
+            results = runner.run(make_payments(400))
+        worker_ids = {SnowflakeIdGenerator.decode(int(str(result["transaction_id"]).split("-")[1], 16))[1]
+                      for result in results}
+        assert worker_ids == {shard for shard, stats in runner.stats.items() if stats.payments}
+        assert len(worker_ids) > 1
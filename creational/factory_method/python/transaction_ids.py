@@ -0,0 +1,154 @@
+"""
+Pluggable transaction ID generators.
+
+Every generator produces a 64-bit integer, formatted by processors as
+"<prefix>-<16 hex digits>". Unlike hash(str(data)), neither generator
+depends on PYTHONHASHSEED, so IDs are reproducible across worker processes.
+"""
+from abc import ABC, abstractmethod
+from hashlib import blake2b
+from typing import Iterable, Mapping, Union
+import os
+import threading
+import time
+import weakref
+
+
+def canonical_payload(data: Mapping[str, object], fields: Union[Iterable[str], None] = None) -> bytes:
+    """
+    Serialize the given fields (all fields by default) in a stable form:
+    keys are sorted and numbers are normalized, so 100 and 100.0 match.
+    """
+    names = sorted(data) if fields is None else fields
+    parts: list[str] = []
+    for name in names:
+        value = data.get(name)
+        if type(value) is int:
+            value = float(value)
+        parts.append(f"{name}\x1f{value}")
+    return "\x1e".join(parts).encode()
+
+
+def fingerprint(data: Mapping[str, object], fields: Union[Iterable[str], None] = None) -> int:
+    """Stable 64-bit hash of the canonical payload."""
+    return int.from_bytes(blake2b(canonical_payload(data, fields), digest_size=8).digest(), "big")
+
+
+class TransactionIdGenerator(ABC):
+    @abstractmethod
+    def next_int(self, data: Mapping[str, object]) -> int:
+        pass
+
+    def next_id(self, prefix: str, data: Mapping[str, object]) -> str:
+        return f"{prefix}-{self.next_int(data):016x}"
+
+
+class ContentHashIdGenerator(TransactionIdGenerator):
+    """
+    Deterministic IDs: the same payload always gets the same ID, in any process.
+    Restricting `fields` to the identifying fields avoids hashing large payloads.
+    """
+
+    def __init__(self, fields: Union[Iterable[str], None] = None):
+        self.fields = None if fields is None else tuple(fields)
+
+    def next_int(self, data: Mapping[str, object]) -> int:
+        return fingerprint(data, self.fields)
+
+
+class SnowflakeIdGenerator(TransactionIdGenerator):
+    """
+    Unique, time-ordered IDs: 41 bits of milliseconds since EPOCH_MS, 10 bits of
+    worker id and a 12-bit per-millisecond sequence. IDs are unique across
+    processes only if each process uses a distinct worker id: pass worker_id,
+    or leave it out and call set_worker_id() once per process, as
+    ShardedPaymentRunner does for its workers. Without either, the worker id
+    falls back to the process id modulo 1024, which is only safe in a single
+    process since different process ids can share it.
+    """
+    EPOCH_MS = 1_704_067_200_000  # 2024-01-01T00:00:00Z
+    WORKER_BITS = 10
+    SEQUENCE_BITS = 12
+    MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+    SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+    def __init__(self, worker_id: Union[int, None] = None):
+        if worker_id is not None and not 0 <= worker_id <= self.MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {self.MAX_WORKER_ID}")
+        self._fixed_worker_id = worker_id
+        self._lock = threading.Lock()
+        self._start()
+        _generators.add(self)
+
+    def _default_worker_id(self) -> int:
+        if self._fixed_worker_id is not None:
+            return self._fixed_worker_id
+        if _process_worker_id is not None:
+            return _process_worker_id
+        return os.getpid() & self.MAX_WORKER_ID
+
+    def _start(self) -> None:
+        self.worker_id = self._default_worker_id()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_int(self, data: Union[Mapping[str, object], None] = None) -> int:
+        with self._lock:
+            now = time.time_ns() // 1_000_000 - self.EPOCH_MS
+            if now <= self._last_ms:
+                # Same millisecond (or the clock went backwards): bump the sequence,
+                # borrowing the next millisecond once it is exhausted
+                now = self._last_ms
+                self._sequence = (self._sequence + 1) & self.SEQUENCE_MASK
+                if self._sequence == 0:
+                    now += 1
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (now << (self.WORKER_BITS + self.SEQUENCE_BITS)) | (self.worker_id << self.SEQUENCE_BITS) | self._sequence
+
+    @classmethod
+    def decode(cls, value: int) -> tuple[int, int, int]:
+        """Split an ID into (unix milliseconds, worker id, sequence)."""
+        sequence = value & cls.SEQUENCE_MASK
+        worker_id = (value >> cls.SEQUENCE_BITS) & cls.MAX_WORKER_ID
+        timestamp = (value >> (cls.WORKER_BITS + cls.SEQUENCE_BITS)) + cls.EPOCH_MS
+        return timestamp, worker_id, sequence
+
+
+# Worker id given to SnowflakeIdGenerators created without one, see set_worker_id
+_process_worker_id: Union[int, None] = None
+# Every live generator, for set_worker_id and the fork handler
+_generators: "weakref.WeakSet[SnowflakeIdGenerator]" = weakref.WeakSet()
+
+
+def set_worker_id(worker_id: int) -> None:
+    """
+    Set the worker id of this process for every SnowflakeIdGenerator created
+    without one, including those that already exist. Meant to run once in each
+    worker process, e.g. as a process pool initializer.
+    """
+    global _process_worker_id
+    if not 0 <= worker_id <= SnowflakeIdGenerator.MAX_WORKER_ID:
+        raise ValueError(f"worker_id must be between 0 and {SnowflakeIdGenerator.MAX_WORKER_ID}")
+    _process_worker_id = worker_id
+    for generator in list(_generators):
+        if generator._fixed_worker_id is None:
+            # Under the generator's own lock, so concurrent next_int calls see either id
+            with generator._lock:
+                generator.worker_id = worker_id
+
+
+def _after_fork_in_child() -> None:
+    # A forked child is another process: it must not share its parent's worker id
+    # or continue its sequence. Only the forking thread survives, so a lock held
+    # by another parent thread would never be released: each generator gets a new one.
+    global _process_worker_id
+    _process_worker_id = None
+    for generator in list(_generators):
+        generator._lock = threading.Lock()
+        generator._start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,314 @@
+"""
+Gateway transport for payment processors.
+
+SocketTransport talks to payment providers over newline-delimited JSON on
+TCP. It keeps a pool of keep-alive connections per provider, pipelines many
+requests over one connection (or sends a single batch message to providers
+that accept batches), and guards every provider with a circuit breaker that
+fails fast while the provider is degraded.
+
+StubGatewayServer is a local stand-in provider for tests and load runs.
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Mapping, Sequence, Union
+import itertools
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+Request = dict[str, Any]
+Response = dict[str, Any]
+Address = tuple[str, int]
+
+
+class TransportError(Exception):
+    """Raised when a provider cannot be reached or answers garbage."""
+
+
+class CircuitOpenError(TransportError):
+    """Raised without contacting the provider while its circuit is open."""
+
+
+class PaymentDeclinedError(Exception):
+    """Raised when the provider answered but did not approve the payment."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> None:
+        """
+        Raise CircuitOpenError unless a call may go through. While half open
+        only one trial call is let through until it is recorded.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN:
+                raise CircuitOpenError("Circuit open: provider is failing, retry later")
+            if state == self.HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError("Circuit half open: a trial call is in progress, retry later")
+                self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            # A failed probe while half open re-opens the circuit immediately
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class _Connection:
+    def __init__(self, address: Address, timeout: float):
+        self.socket = socket.create_connection(address, timeout=timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.socket.makefile("rb")
+
+    def exchange(self, messages: Sequence[Request], responses: list[Response]) -> None:
+        """
+        Write every message at once, then read one response line per message
+        into `responses`, which keeps the ones read before a failure.
+        """
+        payload = b"".join(json.dumps(message, separators=(",", ":")).encode() + b"\n" for message in messages)
+        self.socket.sendall(payload)
+        for _ in messages:
+            line = self.reader.readline()
+            if not line:
+                raise ConnectionError("Connection closed by provider")
+            responses.append(json.loads(line))
+
+    def close(self) -> None:
+        self.reader.close()
+        self.socket.close()
+
+
+class ConnectionPool:
+    def __init__(self, address: Address, size: int = 8, timeout: float = 5.0):
+        self.address = address
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self) -> Iterator[_Connection]:
+        self._slots.acquire()
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = _Connection(self.address, self.timeout)
+                self.connections_opened += 1
+            try:
+                yield connection
+            except BaseException:
+                # The stream may hold unread responses: never reuse it
+                connection.close()
+                raise
+            self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class GatewayTransport(ABC):
+    @abstractmethod
+    def send(self, provider: str, request: Request) -> Response:
+        pass
+
+    def send_many(self, provider: str, requests: Sequence[Request]) -> list[Union[Response, TransportError]]:
+        """
+        One result per request, in order: the provider's response, or the
+        TransportError that kept that request from being answered. Requests
+        answered before a failure keep their responses.
+        """
+        results: list[Union[Response, TransportError]] = []
+        for request in requests:
+            try:
+                results.append(self.send(provider, request))
+            except TransportError as exc:
+                results.append(exc)
+        return results
+
+
+class SocketTransport(GatewayTransport):
+    def __init__(
+        self,
+        addresses: Mapping[str, Address],
+        pool_size: int = 8,
+        timeout: float = 5.0,
+        batch_providers: Sequence[str] = (),
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        max_pipeline: int = 256,
+    ):
+        """
+        `addresses` maps provider names to (host, port). Providers listed in
+        `batch_providers` receive send_many calls as a single batch message;
+        the others get pipelined requests, at most `max_pipeline` per write.
+        """
+        self.pools = {provider: ConnectionPool(address, pool_size, timeout) for provider, address in addresses.items()}
+        self.breakers = {provider: CircuitBreaker(failure_threshold, reset_timeout) for provider in addresses}
+        self.batch_providers = frozenset(batch_providers)
+        self.max_pipeline = max_pipeline
+        self._ids = itertools.count(1)
+
+    def _exchange(self, provider: str, messages: Sequence[Request], responses: list[Response]) -> None:
+        try:
+            pool = self.pools[provider]
+            breaker = self.breakers[provider]
+        except KeyError:
+            raise TransportError(f"Unknown provider: {provider}")
+        breaker.allow()
+        try:
+            with pool.connection() as connection:
+                connection.exchange(messages, responses)
+        except (OSError, ValueError) as exc:
+            breaker.record_failure()
+            raise TransportError(f"{provider} gateway unavailable: {exc}") from exc
+        except BaseException:
+            # Never leave a half-open trial call unrecorded
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+
+    def send(self, provider: str, request: Request) -> Response:
+        result = self.send_many(provider, [request])[0]
+        if isinstance(result, TransportError):
+            raise result
+        return result
+
+    def send_many(self, provider: str, requests: Sequence[Request]) -> list[Union[Response, TransportError]]:
+        messages = [{**request, "id": next(self._ids)} for request in requests]
+        responses: list[Response] = []
+        error: Union[TransportError, None] = None
+        try:
+            if provider in self.batch_providers and len(messages) > 1:
+                replies: list[Response] = []
+                self._exchange(provider, [{"op": "batch", "items": messages}], replies)
+                responses = replies[0].get("items", [])
+            else:
+                for start in range(0, len(messages), self.max_pipeline):
+                    self._exchange(provider, messages[start:start + self.max_pipeline], responses)
+        except TransportError as exc:
+            # Later chunks are not sent: their requests fail with the same error
+            error = exc
+        answered = [message["id"] for message in messages[:len(responses)]]
+        if [response.get("id") for response in responses] != answered or (error is None and len(answered) != len(messages)):
+            raise TransportError(f"{provider} gateway answered out of order")
+        if error is None:
+            return list(responses)
+        return [*responses, *[error] * (len(messages) - len(responses))]
+
+    def close(self) -> None:
+        for pool in self.pools.values():
+            pool.close()
+
+
+class StubGatewayServer:
+    """
+    Local provider answering newline-delimited JSON. A request is approved
+    unless its amount exceeds `approve_limit`; `latency` is added per message.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 approve_limit: Union[float, None] = None, drop_after: Union[int, None] = None):
+        self.latency = latency
+        self.approve_limit = approve_limit
+        self.drop_after = drop_after
+        self.requests = 0
+        self.connections = 0
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                stub.connections += 1
+                for line in self.rfile:
+                    message = json.loads(line)
+                    if stub.drop_after is not None and stub.requests >= stub.drop_after:
+                        return
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    if message.get("op") == "batch":
+                        reply = {"id": message.get("id"), "items": [stub._answer(item) for item in message["items"]]}
+                    else:
+                        reply = stub._answer(message)
+                    self.wfile.write(json.dumps(reply, separators=(",", ":")).encode() + b"\n")
+                    self.wfile.flush()
+
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Union[threading.Thread, None] = None
+
+    @property
+    def address(self) -> Address:
+        host, port = self._server.server_address[:2]
+        return str(host), int(port)
+
+    def _answer(self, message: Mapping[str, Any]) -> Response:
+        self.requests += 1
+        amount = float(message.get("amount", 0.0))
+        approved = self.approve_limit is None or amount <= self.approve_limit
+        response: Response = {"id": message.get("id"), "approved": approved}
+        if approved:
+            response["authorization"] = f"AUTH-{message.get('id')}"
+        else:
+            response["reason"] = "Amount over limit"
+        return response
+
+    def start(self) -> "StubGatewayServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubGatewayServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
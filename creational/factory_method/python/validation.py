@@ -0,0 +1,82 @@
+"""
+Declarative validation schemas for payment processors.
+
+A schema is compiled once into a check function that returns None for valid
+data or a short reason string explaining the first failed rule.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Mapping, Pattern, Union
+import re
+
+Check = Callable[[Mapping[str, object]], Union[str, None]]
+
+
+@dataclass(frozen=True)
+class ValidationSchema:
+    required: tuple[str, ...] = ()
+    min_length: Mapping[str, int] = field(default_factory=dict)
+    patterns: Mapping[str, Union[str, Pattern[str]]] = field(default_factory=dict)
+    # Characters removed from a field before its pattern is matched
+    strip: Mapping[str, Union[str, Pattern[str]]] = field(default_factory=dict)
+
+    def compile(self) -> Check:
+        required = tuple(self.required)
+        required_keys = frozenset(required)
+        length_rules = tuple(self.min_length.items())
+        pattern_rules = tuple(
+            (
+                name,
+                re.compile(pattern).fullmatch,
+                re.compile(self.strip[name]).sub if name in self.strip else None,
+            )
+            for name, pattern in self.patterns.items()
+        )
+
+        def check(data: Mapping[str, object]) -> Union[str, None]:
+            if not required_keys <= data.keys():
+                missing = [name for name in required if name not in data]
+                return f"Missing required fields: {', '.join(missing)}"
+            for name, minimum in length_rules:
+                value = data.get(name)
+                if not isinstance(value, str) or len(value) < minimum:
+                    return f"{name} must be at least {minimum} characters long"
+            for name, match, strip in pattern_rules:
+                value = data.get(name)
+                if not isinstance(value, str):
+                    return f"{name} has an invalid format"
+                if strip is not None:
+                    value = strip("", value)
+                if match(value) is None:
+                    return f"{name} has an invalid format"
+            return None
+
+        return check
+
+
+@dataclass
+class ValidationReport:
+    # One byte per payment: 1 when valid, 0 otherwise
+    valid: bytearray
+    # Failure reason for every invalid payment, keyed by its position
+    reasons: dict[int, str]
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    @property
+    def all_valid(self) -> bool:
+        return not self.reasons
+
+
+def validate_batch(check: Check, payments: Iterable[Mapping[str, object]]) -> ValidationReport:
+    valid = bytearray()
+    reasons: dict[int, str] = {}
+    append = valid.append
+    for index, data in enumerate(payments):
+        reason = check(data)
+        if reason is None:
+            append(1)
+        else:
+            append(0)
+            reasons[index] = reason
+    return ValidationReport(valid, reasons)
@@ -0,0 +1,155 @@
+"""
+Sharded multi-process payment runner.
+
+Payments are split into shards, by PaymentMethod or by a stable hash of the
+account, and each shard is pinned to its own worker process. Workers run
+PaymentFactory.process_batch on whole chunks, so processors are built once per
+worker and inter-process traffic is amortized over `chunk_size` payments.
+"""
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from multiprocessing.context import BaseContext
+from typing import Callable, Iterable, Iterator, Mapping, Union
+import os
+import time
+import zlib
+from .payment_factory import PAYMENT_METHOD_FIELD, PaymentFactory, PaymentMethod
+from .payment_processors import ACCOUNT_FIELDS
+from .transaction_ids import SnowflakeIdGenerator, set_worker_id
+
+Payment = dict[str, str | float]
+Result = dict[str, str | bool | float]
+ShardFunction = Callable[[Mapping[str, object], int], int]
+
+
+def shard_by_method(data: Mapping[str, object], shards: int) -> int:
+    method = data.get(PAYMENT_METHOD_FIELD, "")
+    if isinstance(method, PaymentMethod):
+        method = method.value
+    return zlib.crc32(str(method).encode()) % shards
+
+
+def shard_by_account(data: Mapping[str, object], shards: int) -> int:
+    for name in ACCOUNT_FIELDS:
+        account = data.get(name)
+        if account is not None:
+            return zlib.crc32(str(account).encode()) % shards
+    return 0
+
+
+SHARD_FUNCTIONS: dict[str, ShardFunction] = {
+    "method": shard_by_method,
+    "account": shard_by_account,
+}
+
+
+@dataclass
+class ShardStats:
+    shard: int
+    payments: int = 0
+    chunks: int = 0
+    # Time spent processing inside the worker, excluding IPC and queueing
+    busy_seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Payments per second of worker time."""
+        return self.payments / self.busy_seconds if self.busy_seconds else 0.0
+
+
+def _process_chunk(records: list[Payment]) -> tuple[list[Result], float]:
+    start = time.perf_counter()
+    results = PaymentFactory.process_batch(records)
+    return results, time.perf_counter() - start
+
+
+class ShardedPaymentRunner:
+    def __init__(
+        self,
+        workers: Union[int, None] = None,
+        shard_by: Union[str, ShardFunction] = "method",
+        chunk_size: int = 1000,
+        max_pending_chunks: Union[int, None] = None,
+        mp_context: Union[BaseContext, None] = None,
+    ):
+        if isinstance(shard_by, str):
+            try:
+                shard_by = SHARD_FUNCTIONS[shard_by]
+            except KeyError:
+                raise ValueError(f"Invalid shard strategy: {shard_by}")
+        self.workers = workers or os.cpu_count() or 1
+        if self.workers > SnowflakeIdGenerator.MAX_WORKER_ID + 1:
+            raise ValueError(f"workers must be at most {SnowflakeIdGenerator.MAX_WORKER_ID + 1}")
+        self.shard_by = shard_by
+        self.chunk_size = chunk_size
+        # Bounds memory on long streams: input is read only while fewer chunks are in flight
+        self.max_pending_chunks = max_pending_chunks or 2 * self.workers
+        self.mp_context = mp_context
+        self.stats = {shard: ShardStats(shard) for shard in range(self.workers)}
+        self._executors: list[ProcessPoolExecutor] = []
+
+    def __enter__(self) -> "ShardedPaymentRunner":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for executor in self._executors:
+            executor.shutdown()
+        self._executors = []
+
+    def _executor(self, shard: int) -> ProcessPoolExecutor:
+        if not self._executors:
+            # One single-process executor per shard pins every shard to one worker,
+            # and the shard number is that worker's Snowflake worker id
+            self._executors = [
+                ProcessPoolExecutor(max_workers=1, mp_context=self.mp_context, initializer=set_worker_id, initargs=(shard,))
+                for shard in range(self.workers)
+            ]
+        return self._executors[shard]
+
+    def stream(self, payments: Iterable[Payment]) -> Iterator[tuple[int, Result]]:
+        """Yield (input position, result) pairs as chunks complete."""
+        buffers: list[tuple[list[int], list[Payment]]] = [([], []) for _ in range(self.workers)]
+        pending: dict[Future[tuple[list[Result], float]], tuple[int, list[int]]] = {}
+
+        def submit(shard: int) -> None:
+            indexes, records = buffers[shard]
+            buffers[shard] = ([], [])
+            pending[self._executor(shard).submit(_process_chunk, records)] = (shard, indexes)
+
+        def collect(return_when: str) -> Iterator[tuple[int, Result]]:
+            done, _ = wait(pending, return_when=return_when)
+            for future in done:
+                shard, indexes = pending.pop(future)
+                results, elapsed = future.result()
+                stats = self.stats[shard]
+                stats.payments += len(results)
+                stats.chunks += 1
+                stats.busy_seconds += elapsed
+                yield from zip(indexes, results)
+
+        for index, data in enumerate(payments):
+            shard = self.shard_by(data, self.workers)
+            indexes, records = buffers[shard]
+            indexes.append(index)
+            records.append(data)
+            if len(records) >= self.chunk_size:
+                while len(pending) >= self.max_pending_chunks:
+                    yield from collect(FIRST_COMPLETED)
+                submit(shard)
+
+        for shard, (indexes, _) in enumerate(buffers):
+            if indexes:
+                submit(shard)
+        while pending:
+            yield from collect(FIRST_COMPLETED)
+
+    def run(self, payments: Iterable[Payment]) -> list[Result]:
+        """Process every payment and return the results in input order."""
+        results: dict[int, Result] = dict(self.stream(payments))
+        return [results[index] for index in range(len(results))]
+
+    def throughput(self) -> dict[int, float]:
+        return {shard: stats.throughput for shard, stats in self.stats.items()}